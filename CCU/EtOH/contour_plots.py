@@ -6,285 +6,214 @@ Created on Mon Jan 19 15:12:18 2026
 """
 
 
+import os
 import CCU
 import numpy as np
 import biosteam as bst
-
-#%% For sys_MeOH_water_electrolyzer_renewable system
-system = CCU.create_full_system(ID='sys_MeOH_water_electrolyzer_renewable', water_electrolyzer=True)
-system.flowsheet.BT.satisfy_system_electricity_demand=False
-
-CCU.load_preferences_and_process_settings(T='K',
-                                      flow_units='kg/hr',
-                                      N=100,
-                                      P_units='Pa',
-                                      CE=798, # Average 2023 https://toweringskills.com/financial-analysis/cost-indices/
-                                      indicator='GWP100',
-                                      electricity_EI=CCU.CFs['GWP_100']['Electricity'],
-                                      electricity_price=CCU.price['Electricity'])
-u = system.flowsheet.unit
-s = system.flowsheet.stream
-
-feedstock_ID = 'cornstover'
-feedstock = s.cornstover
-product_stream = s.ethanol
-
-U101 = u.U101
-@U101.add_specification(run=True, args=[83333.33333,0.2,0.3611,0.206,0.2005,0.041])
-def set_feedstock_composition(feedstock_dry_flow, water_content, glucan_dry, xylan_dry, lignin_dry, ash_dry):
-    cs = U101.ins[0]
-    
-    specified_components = ('Water', 'Glucan', 'Xylan', 'Lignin', 'Ash')
-    other_components = [i.ID for i in cs.available_chemicals if i.ID not in specified_components]
+from functools import partial
+
+def create_contour_system(ID):
+    if ID == 'sys_MeOH_water_electrolyzer_renewable':
+        system = CCU.create_full_system(ID=ID, water_electrolyzer=True)
+        system.flowsheet.BT.satisfy_system_electricity_demand=False
+    elif ID == 'sys_MeOH_hydrogen_renewable':
+        system = CCU.system_hydrogen_purchased(ID=ID, water_electrolyzer=False)
+    else:
+        raise ValueError(f'no contour setup for {ID!r}')
     
-    a = water_content
-    b = glucan_dry
-    c = xylan_dry
-    d = lignin_dry
-    e = ash_dry
-    
-    # new_water_mass = a
-    dry_mass = 1-a
-    new_glucan = b * (1-a)
-    new_xylan = c * (1-a)
-    new_lignin = d * (1-a)
-    new_ash = e * (1-a)
-    
-    feedstock_flow = feedstock_dry_flow / (1-a)
+    CCU.load_preferences_and_process_settings(T='K',
+                                          flow_units='kg/hr',
+                                          N=100,
+                                          P_units='Pa',
+                                          CE=798, # Average 2023 https://toweringskills.com/financial-analysis/cost-indices/
+                                          indicator='GWP100',
+                                          electricity_EI=CCU.CFs['GWP_100']['Electricity'],
+                                          electricity_price=CCU.price['Electricity'])
+    u = system.flowsheet.unit
+    s = system.flowsheet.stream
+
+    feedstock_ID = 'cornstover'
+    feedstock = s.cornstover
+    product_stream = s.ethanol
+
+    U101 = u.U101
+    @U101.add_specification(run=True, args=[83333.33333,0.2,0.3611,0.206,0.2005,0.041])
+    def set_feedstock_composition(feedstock_dry_flow, water_content, glucan_dry, xylan_dry, lignin_dry, ash_dry):
+        cs = U101.ins[0]
+
+        specified_components = ('Water', 'Glucan', 'Xylan', 'Lignin', 'Ash')
+        other_components = [i.ID for i in cs.available_chemicals if i.ID not in specified_components]
+
+        a = water_content
+        b = glucan_dry
+        c = xylan_dry
+        d = lignin_dry
+        e = ash_dry
+
+        # new_water_mass = a
+        dry_mass = 1-a
+        new_glucan = b * (1-a)
+        new_xylan = c * (1-a)
+        new_lignin = d * (1-a)
+        new_ash = e * (1-a)
+
+        feedstock_flow = feedstock_dry_flow / (1-a)
+
+        old_other_imass = {i:cs.imass[i] / sum([cs.imass[j] for j in other_components]) 
+                           for i in other_components}
+        new_other_mass_total = feedstock_flow * (1 - a - new_glucan - new_xylan - new_lignin - new_ash)
+        new_other_mass = {i: new_other_mass_total * old_other_imass[i]
+                           for i in other_components}
+
+        # scaled by new flowrate
+        updated_flows = {'Water': feedstock_flow * a,
+                         'Glucan': feedstock_flow * new_glucan,
+                         'Xylan': feedstock_flow * new_xylan,
+                         'Lignin': feedstock_flow * new_lignin,
+                         'Ash': feedstock_flow * new_ash,
+                         **new_other_mass
+                         }
+
+        cs.reset_flow(units='kg/hr', **updated_flows)
+
+    # =============================================================================
+    # create TEA
+    # =============================================================================
+    get_flow_tpd = lambda: (feedstock.F_mass-feedstock.imass['H2O'])*24/907.185
+
+    tea = CCU.CellulosicIncentivesTEA(system=system, IRR=0.10, duration=(2023, 2053),
+                   depreciation='MACRS7', income_tax=0.35, operating_days=0.9*365,
+                   lang_factor=None, construction_schedule=(0.08, 0.60, 0.32),
+                   startup_months=3, startup_FOCfrac=1, startup_salesfrac=0.5,
+                   startup_VOCfrac=0.75, WC_over_FCI=0.05, finance_interest=0.08,
+                   finance_years=10, finance_fraction=0.6, 
+                   OSBL_units=(u.BT, u.CT, u.CWP, u.PWC, u.ADP, u.FWT, u.CIP),
+                   warehouse=0.04, site_development=0.09, additional_piping=0.045,
+                   proratable_costs=0.10, field_expenses=0.10, construction=0.20,
+                   contingency=0.10, other_indirect_costs=0.10, 
+                   labor_cost=3651112*get_flow_tpd()/2205,
+                   labor_burden=0.9, property_insurance=0.007, maintenance=0.03,
+                   steam_power_depreciation='MACRS20', boiler_turbogenerator=u.BT,
+                   carbon_credit=85, credit_years=12,)
+
+    system.operating_hours = tea.operating_days * 24
+    get_annual_factor = lambda: tea.operating_days * 24
+
+    feedstock.price = 0.091146891
+    s.sulfuric_acid.price = 0.145967079
+    s.ammonia.price = 0.875802473
+    s.cellulase.price = 0.408742354
+    s.DAP.price = 1.200932679
+    s.CSL.price = 0.099133292
+    s.caustic.price = 0.912957729
+    s.denaturant.price = 0.919936623
+    s.cooling_tower_chemicals.price = 2.144704919
+    s.FGD_lime.price = 0.13514
+    s.boiler_chemicals.price = 3.563518793
+    s.makeup_process_water.price = 0.001092283
+    s.makeup_RO_water.price = 0.002265475
+    u.BT.ash_disposal_price = -0.055494448
+    u.M301.solids_loading = 0.2
+    u.M301.enzyme_loading = 0.02
+    u.R303.saccharification_split = 0.1
+    u.R303.saccharification[2].X = 0.9
+    u.R303.cofermentation[0].X = 0.95
+    u.R303.cofermentation[4].X = 0.85
+    u.R302.glucose_to_ethanol.X = 0.9
+    u.R302.xylose_to_ethanol.X = 0.8
+    u.BT.boiler_efficiency = 0.8
+    u.BT.turbogenerator_efficiency = 0.85
+    s.natural_gas.price = 0.289367356
+    s.makeup_MEA.price = 1.44
+    s.catalyst_MeOH.price = 32.48578024
+
     
-    old_other_imass = {i:cs.imass[i] / sum([cs.imass[j] for j in other_components]) 
-                       for i in other_components}
-    new_other_mass_total = feedstock_flow * (1 - a - new_glucan - new_xylan - new_lignin - new_ash)
-    new_other_mass = {i: new_other_mass_total * old_other_imass[i]
-                       for i in other_components}
+    if ID == 'sys_MeOH_water_electrolyzer_renewable': s.O2.price = 0.23
     
-    # scaled by new flowrate
-    updated_flows = {'Water': feedstock_flow * a,
-                     'Glucan': feedstock_flow * new_glucan,
-                     'Xylan': feedstock_flow * new_xylan,
-                     'Lignin': feedstock_flow * new_lignin,
-                     'Ash': feedstock_flow * new_ash,
-                     **new_other_mass
-                     }
-                            
-    cs.reset_flow(units='kg/hr', **updated_flows)
-
-# =============================================================================
-# create TEA
-# =============================================================================
-get_flow_tpd = lambda: (feedstock.F_mass-feedstock.imass['H2O'])*24/907.185
+    s.MeOH.price = 0.35
+    return system
 
-tea = CCU.CellulosicIncentivesTEA(system=system, IRR=0.10, duration=(2023, 2053),
-               depreciation='MACRS7', income_tax=0.35, operating_days=0.9*365,
-               lang_factor=None, construction_schedule=(0.08, 0.60, 0.32),
-               startup_months=3, startup_FOCfrac=1, startup_salesfrac=0.5,
-               startup_VOCfrac=0.75, WC_over_FCI=0.05, finance_interest=0.08,
-               finance_years=10, finance_fraction=0.6, 
-               OSBL_units=(u.BT, u.CT, u.CWP, u.PWC, u.ADP, u.FWT, u.CIP),
-               warehouse=0.04, site_development=0.09, additional_piping=0.045,
-               proratable_costs=0.10, field_expenses=0.10, construction=0.20,
-               contingency=0.10, other_indirect_costs=0.10, 
-               labor_cost=3651112*get_flow_tpd()/2205,
-               labor_burden=0.9, property_insurance=0.007, maintenance=0.03,
-               steam_power_depreciation='MACRS20', boiler_turbogenerator=u.BT,
-               carbon_credit=85, credit_years=12,)
-               
-system.operating_hours = tea.operating_days * 24
-get_annual_factor = lambda: tea.operating_days * 24
+#%% Parameter setters and metric (picklable, for the contour engine)
 
-feedstock.price = 0.091146891
-s.sulfuric_acid.price = 0.145967079
-s.ammonia.price = 0.875802473
-s.cellulase.price = 0.408742354
-s.DAP.price = 1.200932679
-s.CSL.price = 0.099133292
-s.caustic.price = 0.912957729
-s.denaturant.price = 0.919936623
-s.cooling_tower_chemicals.price = 2.144704919
-s.FGD_lime.price = 0.13514
-s.boiler_chemicals.price = 3.563518793
-s.makeup_process_water.price = 0.001092283
-s.makeup_RO_water.price = 0.002265475
-u.BT.ash_disposal_price = -0.055494448
-u.M301.solids_loading = 0.2
-u.M301.enzyme_loading = 0.02
-u.R303.saccharification_split = 0.1
-u.R303.saccharification[2].X = 0.9
-u.R303.cofermentation[0].X = 0.95
-u.R303.cofermentation[4].X = 0.85
-u.R302.glucose_to_ethanol.X = 0.9
-u.R302.xylose_to_ethanol.X = 0.8
-u.BT.boiler_efficiency = 0.8
-u.BT.turbogenerator_efficiency = 0.85
-s.natural_gas.price = 0.289367356
-s.makeup_MEA.price = 1.44
-s.catalyst_MeOH.price = 32.48578024
+def set_carbon_credit(system, carbon_credit):
+    system.TEA.carbon_credit = carbon_credit
 
+def set_electricity_price(system, price):
+    bst.PowerUtility.price = price
 
-s.O2.price = 0.23
+def set_hydrogen_price(system, price):
+    system.flowsheet.stream.hydrogen.price = price
 
-s.MeOH.price = 0.35
+def get_MSP(system):
+    product_stream = system.flowsheet.stream.ethanol
+    return system.TEA.solve_price(product_stream) / (product_stream.imass['Ethanol'] / product_stream.F_mass)
 
-
-# Contour plotting
-y_data = np.linspace(85, 200, 9)
-x_data = np.linspace(0.,0.07,8)
-w_data = []
-
-def MSP_at_x_and_y_1(x,y):
-    tea.carbon_credit = y
-    bst.PowerUtility.price = x
+def get_linear_MSP_grid(ID, x_setter, y_setter, x_data, y_data, verify=3):
+    """
+    Return MSP over the grid of two price-like inputs from one simulation,
+    using the linear cash-flow sensitivities (see `CCU.PriceSensitivity`);
+    `verify` grid points are spot-checked against `tea.solve_price`.
+    """
+    system = create_contour_system(ID)
     for i in range(3): system.simulate()
-    MSP = tea.solve_price(product_stream) / (product_stream.imass['Ethanol'] / product_stream.F_mass)
-    return MSP
-
-results = []
-for j in y_data:
-    w_data.append([])
-    for i in x_data:
-        try:
-            print(i, j, MSP_at_x_and_y_1(i,j))
-            w_data[-1].append(MSP_at_x_and_y_1(i,j))        
-        except:
-            print('Needs_interpolation')
-            w_data[-1].append(0)
-
-
-#%% For sys_MeOH_hydrogen_renewable system
-system = CCU.system_hydrogen_purchased(ID='sys_MeOH_hydrogen_renewable', water_electrolyzer=False)
-
-CCU.load_preferences_and_process_settings(T='K',
-                                      flow_units='kg/hr',
-                                      N=100,
-                                      P_units='Pa',
-                                      CE=798, # Average 2023 https://toweringskills.com/financial-analysis/cost-indices/
-                                      indicator='GWP100',
-                                      electricity_EI=CCU.CFs['GWP_100']['Electricity'],
-                                      electricity_price=CCU.price['Electricity'])
-u = system.flowsheet.unit
-s = system.flowsheet.stream
-
-feedstock_ID = 'cornstover'
-feedstock = s.cornstover
-product_stream = s.ethanol
-
-U101 = u.U101
-@U101.add_specification(run=True, args=[83333.33333,0.2,0.3611,0.206,0.2005,0.041])
-def set_feedstock_composition(feedstock_dry_flow, water_content, glucan_dry, xylan_dry, lignin_dry, ash_dry):
-    cs = U101.ins[0]
+    product_stream = system.flowsheet.stream.ethanol
+    sensitivity = CCU.PriceSensitivity(system, product_stream,
+                                       {'x': x_setter, 'y': y_setter},
+                                       [x_data[0], y_data[0]])
+    X, Y = np.meshgrid(x_data, y_data)
+    prices = sensitivity.solve_price(np.column_stack([X.ravel(), Y.ravel()]), verify=verify)
+    purity = product_stream.imass['Ethanol'] / product_stream.F_mass
+    return (prices / purity).reshape(X.shape)
+
+#%% Contour grids
+
+if __name__ == '__main__':
+    results_folder = os.path.join(os.path.dirname(__file__), 'analyses', 'results')
+    os.makedirs(results_folder, exist_ok=True)
+    n_workers = None # all cores
+    compare_orders = False # report iterations saved by the serpentine, warm-started sweep
+    linear = False # dense grids from one simulation each, through linear cash-flow sensitivities
     
-    specified_components = ('Water', 'Glucan', 'Xylan', 'Lignin', 'Ash')
-    other_components = [i.ID for i in cs.available_chemicals if i.ID not in specified_components]
+    # Each point is simulated three times (as before) but evaluated only once;
+    # grids are walked in serpentine order, seeding recycles from the nearest
+    # converged point. Grids start coarse and are refined where MSP changes
+    # fast (or crosses `levels`, if given); failed points are retried with
+    # other solvers and otherwise interpolated and flagged (flags == 2)
+    # Both axes are prices or credits, so each shard simulates only once and
+    # re-evaluates the TEA on the converged flows at every other point
     
-    a = water_content
-    b = glucan_dry
-    c = xylan_dry
-    d = lignin_dry
-    e = ash_dry
+    #%% For sys_MeOH_water_electrolyzer_renewable system
+    if linear:
+        x_data, y_data = np.linspace(0., 0.07, 71), np.linspace(85, 200, 116)
+        w_data = get_linear_MSP_grid('sys_MeOH_water_electrolyzer_renewable', set_electricity_price,
+                                     set_carbon_credit, x_data, y_data)
+        CCU.save_contour_grid(os.path.join(results_folder, 'contour_MSP_electricity_price_carbon_credit_linear.npz'),
+                              x_data, y_data, w_data)
+    x_data, y_data, w_data, flags = CCU.refine_contour_grid(
+        partial(create_contour_system, 'sys_MeOH_water_electrolyzer_renewable'),
+        set_electricity_price, set_carbon_credit, (0., 0.07), (85, 200), get_MSP,
+        levels=None, shape=(4, 5), depth=2, n_workers=n_workers, n_simulations=3,
+        economic=(True, True), notify=True,
+        file=os.path.join(results_folder, 'contour_MSP_electricity_price_carbon_credit.npz'),
+    )
+    if compare_orders:
+        print(CCU.compare_sweep_orders(
+            partial(create_contour_system, 'sys_MeOH_water_electrolyzer_renewable'),
+            set_electricity_price, set_carbon_credit, np.linspace(0.,0.07,8),
+            np.linspace(85, 200, 9), get_MSP, n_simulations=3,
+        ))
     
-    # new_water_mass = a
-    dry_mass = 1-a
-    new_glucan = b * (1-a)
-    new_xylan = c * (1-a)
-    new_lignin = d * (1-a)
-    new_ash = e * (1-a)
-    
-    feedstock_flow = feedstock_dry_flow / (1-a)
-    
-    old_other_imass = {i:cs.imass[i] / sum([cs.imass[j] for j in other_components]) 
-                       for i in other_components}
-    new_other_mass_total = feedstock_flow * (1 - a - new_glucan - new_xylan - new_lignin - new_ash)
-    new_other_mass = {i: new_other_mass_total * old_other_imass[i]
-                       for i in other_components}
-    
-    # scaled by new flowrate
-    updated_flows = {'Water': feedstock_flow * a,
-                     'Glucan': feedstock_flow * new_glucan,
-                     'Xylan': feedstock_flow * new_xylan,
-                     'Lignin': feedstock_flow * new_lignin,
-                     'Ash': feedstock_flow * new_ash,
-                     **new_other_mass
-                     }
-                            
-    cs.reset_flow(units='kg/hr', **updated_flows)
-
-# =============================================================================
-# create TEA
-# =============================================================================
-get_flow_tpd = lambda: (feedstock.F_mass-feedstock.imass['H2O'])*24/907.185
-
-tea = CCU.CellulosicIncentivesTEA(system=system, IRR=0.10, duration=(2023, 2053),
-               depreciation='MACRS7', income_tax=0.35, operating_days=0.9*365,
-               lang_factor=None, construction_schedule=(0.08, 0.60, 0.32),
-               startup_months=3, startup_FOCfrac=1, startup_salesfrac=0.5,
-               startup_VOCfrac=0.75, WC_over_FCI=0.05, finance_interest=0.08,
-               finance_years=10, finance_fraction=0.6, 
-               OSBL_units=(u.BT, u.CT, u.CWP, u.PWC, u.ADP, u.FWT, u.CIP),
-               warehouse=0.04, site_development=0.09, additional_piping=0.045,
-               proratable_costs=0.10, field_expenses=0.10, construction=0.20,
-               contingency=0.10, other_indirect_costs=0.10, 
-               labor_cost=3651112*get_flow_tpd()/2205,
-               labor_burden=0.9, property_insurance=0.007, maintenance=0.03,
-               steam_power_depreciation='MACRS20', boiler_turbogenerator=u.BT,
-               carbon_credit=85, credit_years=12,)
-               
-system.operating_hours = tea.operating_days * 24
-get_annual_factor = lambda: tea.operating_days * 24
-
-feedstock.price = 0.091146891
-s.sulfuric_acid.price = 0.145967079
-s.ammonia.price = 0.875802473
-s.cellulase.price = 0.408742354
-s.DAP.price = 1.200932679
-s.CSL.price = 0.099133292
-s.caustic.price = 0.912957729
-s.denaturant.price = 0.919936623
-s.cooling_tower_chemicals.price = 2.144704919
-s.FGD_lime.price = 0.13514
-s.boiler_chemicals.price = 3.563518793
-s.makeup_process_water.price = 0.001092283
-s.makeup_RO_water.price = 0.002265475
-u.BT.ash_disposal_price = -0.055494448
-u.M301.solids_loading = 0.2
-u.M301.enzyme_loading = 0.02
-u.R303.saccharification_split = 0.1
-u.R303.saccharification[2].X = 0.9
-u.R303.cofermentation[0].X = 0.95
-u.R303.cofermentation[4].X = 0.85
-u.R302.glucose_to_ethanol.X = 0.9
-u.R302.xylose_to_ethanol.X = 0.8
-u.BT.boiler_efficiency = 0.8
-u.BT.turbogenerator_efficiency = 0.85
-s.natural_gas.price = 0.289367356
-s.makeup_MEA.price = 1.44
-s.catalyst_MeOH.price = 32.48578024
-
-
-s.MeOH.price = 0.35
-
-
-# Contour plotting
-y_data = np.linspace(85, 200, 9)
-x_data = np.linspace(0.,4.0, 9)
-w_data = []
-
-def MSP_at_x_and_y_1(x,y):
-    tea.carbon_credit = y
-    s.hydrogen.price = x
-    for i in range(3): system.simulate()
-    MSP = tea.solve_price(product_stream) / (product_stream.imass['Ethanol'] / product_stream.F_mass)
-    return MSP
-
-results = []
-for j in y_data:
-    w_data.append([])
-    for i in x_data:
-        try:
-            print(i, j, MSP_at_x_and_y_1(i,j))
-            w_data[-1].append(MSP_at_x_and_y_1(i,j))        
-        except:
-            print('Needs_interpolation')
-            w_data[-1].append(0)  
-
-
-
+    #%% For sys_MeOH_hydrogen_renewable system
+    if linear:
+        x_data, y_data = np.linspace(0., 4.0, 81), np.linspace(85, 200, 116)
+        w_data = get_linear_MSP_grid('sys_MeOH_hydrogen_renewable', set_hydrogen_price,
+                                     set_carbon_credit, x_data, y_data)
+        CCU.save_contour_grid(os.path.join(results_folder, 'contour_MSP_hydrogen_price_carbon_credit_linear.npz'),
+                              x_data, y_data, w_data)
+    x_data, y_data, w_data, flags = CCU.refine_contour_grid(
+        partial(create_contour_system, 'sys_MeOH_hydrogen_renewable'),
+        set_hydrogen_price, set_carbon_credit, (0., 4.0), (85, 200), get_MSP,
+        levels=None, shape=(5, 5), depth=2, n_workers=n_workers, n_simulations=3,
+        economic=(True, True), notify=True,
+        file=os.path.join(results_folder, 'contour_MSP_hydrogen_price_carbon_credit.npz'),
+    )
@@ -7,6 +7,7 @@ Created on Fri Jul 18 11:09:04 2025
 
 
 import os
+import re
 import numpy as np
 import pandas as pd
 import chaospy as cp
@@ -38,8 +39,19 @@ fixed_params = None
 
 N=1000
 
+parameter_distributions_folder = os.path.join(os.path.dirname(__file__), 'analyses', 'parameter_distributions')
+
+def load_dist_table(filepath=None):
+    if filepath is None:
+        filepath = os.path.join(parameter_distributions_folder, 'parameter-distributions_full.xlsx')
+    return pd.read_excel(filepath)
+
 #%%
-def create_model(system_name):
+def create_model(system_name, dist_table=None, snapshot_folder=None):
+    if dist_table is None: dist_table = load_dist_table()
+    # Each system gets a flowsheet of its own, so models of several systems
+    # can live in one process without replacing each other's streams and units
+    bst.main_flowsheet.set_flowsheet(system_name)
     if system_name == available_systems[0]:
         system = CCU.create_ethanol_system(ID='sys_ethanol_conventional')
     elif system_name == available_systems[1]:
@@ -236,20 +248,23 @@ def create_model(system_name):
     # create LCA
     # =============================================================================
                                   
+    # Each LCA gets its own copy of the CFs so that models built in the same
+    # process (e.g., in batch runs) do not share CF changes
+    CFs = {key: dict(value) for key, value in CCU.CFs.items()}
     if system_name == available_systems[0] or system_name == available_systems[1]:
-        CCU.CFs['GWP_100']['O2'] = 0 # set once from dic, not function not param
+        CFs['GWP_100']['O2'] = 0 # set once from dic, not function not param
         input_biogenic_carbon_streams = (feedstock, s.cellulase, s.CSL)
         by_products = []  # No coproducts for ethanol system
     elif system_name == available_systems[2] or system_name == available_systems[3]:
         input_biogenic_carbon_streams = (feedstock, s.cellulase, s.CSL, s.makeup_MEA)
         by_products = [s.MeOH, s.O2]  # MeOH and O2
     else:
-        CCU.CFs['GWP_100']['O2'] = 0
+        CFs['GWP_100']['O2'] = 0
         input_biogenic_carbon_streams = (feedstock, s.cellulase, s.CSL, s.makeup_MEA)
         by_products = [s.MeOH] 
 
     lca = CCU.create_CCU_lca(system=system,
-                             CFs=CCU.CFs,
+                             CFs=CFs,
                              feedstock=feedstock,
                              feedstock_ID=feedstock_ID,
                              main_product=product_stream,
@@ -265,11 +280,14 @@ def create_model(system_name):
     # =============================================================================
     # Metrics
     # ============================================================================
+    # Quantities shared by several metrics are computed once per system state
+    cache = CCU.SimulationCache.for_system(system)
+    memoize = cache.memoize
+    
     # 0. TEA
+    @memoize
     def get_MSP():
-        for i in range(3):
-            product_price = tea.solve_price(product_stream)
-        return product_price
+        return tea.solve_price(product_stream)
 
     get_yield = lambda: product_stream.F_mass * get_annual_factor() / 1e6 # in 1000 MT
     get_purity = lambda: product_stream.imass['Ethanol'] / product_stream.F_mass
@@ -278,23 +296,28 @@ def create_model(system_name):
     get_adjusted_MSP = lambda: get_MSP() / get_purity()
     get_adjusted_yield = lambda: get_yield() / get_purity()
 
-    get_overall_TCI = lambda: tea.TCI / 1e6
+    get_TCI = memoize(lambda: tea.TCI)
+    get_overall_TCI = lambda: get_TCI() / 1e6
     get_overall_installed_cost = lambda: tea.installed_equipment_cost / 1e6
 
     # annual operating cost
-    get_overall_AOC = lambda: tea.AOC / 1e6
-    get_material_cost = lambda: (tea.material_cost + abs(s.ash.F_mass * s.ash.price)) / 1e6
+    get_AOC = memoize(lambda: tea.AOC)
+    get_overall_AOC = lambda: get_AOC() / 1e6
+    # Streams and units used by metrics are bound here, so that metrics keep
+    # reading this system even if a later model registers items of the same ID
+    ash, hydrogen, natural_gas = s.ash, s.search('hydrogen'), s.natural_gas
+    get_material_cost = lambda: (tea.material_cost + abs(ash.F_mass * ash.price)) / 1e6
     get_overall_FOC = lambda: tea.FOC / 1e6
     
-    get_hydrogen_AOC = lambda: s.hydrogen.cost * get_annual_factor() / 1e6
-    get_NG_AOC = lambda: s.natural_gas.cost * get_annual_factor() / 1e6
+    get_hydrogen_AOC = lambda: hydrogen.cost * get_annual_factor() / 1e6
+    get_NG_AOC = lambda: natural_gas.cost * get_annual_factor() / 1e6
     # annual sale revenue from products, note that electricity credit is not included,
     # but negative sales from waste disposal are included
     # (i.e., wastes are products of negative selling price)
     get_annual_sale = lambda: tea.sales / 1e6
 
     # system power usage 
-    get_excess_electricity = lambda: system.get_electricity_production() - system.get_electricity_consumption() # kWh per year
+    get_excess_electricity = memoize(lambda: system.get_electricity_production() - system.get_electricity_consumption()) # kWh per year
     get_electricity_revenue = lambda: get_excess_electricity() * bst.PowerUtility.price / 1e6 # 10^6 $ per year
     
 
@@ -329,7 +352,12 @@ def create_model(system_name):
     
     for m, u_i in metrics_labels_dict.items():
         for ug in process_groups:
-            metrics.append(Metric(ug.name, ug.metrics[u_i[0]], u_i[1], m))
+            if m == 'Installed cost':
+                # Masked sum of the TEA's per-unit cost vector (read at each evaluation)
+                getter = lambda units=ug.units: tea.get_installed_cost(units)
+            else:
+                getter = ug.metrics[u_i[0]]
+            metrics.append(Metric(ug.name, getter, u_i[1], m))
 
     # 1. Carbon use
     all_products = [product_stream] + by_products
@@ -343,16 +371,18 @@ def create_model(system_name):
     
     get_C_in = lambda: sum([i.get_atomic_flow('C') for i in system.feeds])
     get_C_feedstock = lambda: feedstock.get_atomic_flow('C')
-    get_C_CSL = lambda: system.flowsheet.CSL.get_atomic_flow('C')
-    get_C_cellulase = lambda: system.flowsheet.cellulase.get_atomic_flow('C')
-    get_C_denaturant = lambda: system.flowsheet.denaturant.get_atomic_flow('C')
+    CSL, cellulase, denaturant = s.CSL, s.cellulase, s.denaturant
+    D401, BT, R602, S604 = u.D401, u.BT, u.R602, u.S604
+    get_C_CSL = lambda: CSL.get_atomic_flow('C')
+    get_C_cellulase = lambda: cellulase.get_atomic_flow('C')
+    get_C_denaturant = lambda: denaturant.get_atomic_flow('C')
     
-    get_C_ethanol = lambda: system.flowsheet.ethanol.get_atomic_flow('C')
+    get_C_ethanol = lambda: product_stream.get_atomic_flow('C')
    
     get_C_emissions = lambda: sum([i.get_atomic_flow('C') for i in emissions])
-    get_C_emissions_fermentation = lambda: system.flowsheet.D401.outs[0].get_atomic_flow('C')
-    get_C_emissions_boiler = lambda: system.flowsheet.BT.outs[0].get_atomic_flow('C')
-    get_C_emissions_WWT = lambda: system.flowsheet.R602.outs[0].get_atomic_flow('C') + system.flowsheet.S604.outs[1].get_atomic_flow('C')
+    get_C_emissions_fermentation = lambda: D401.outs[0].get_atomic_flow('C')
+    get_C_emissions_boiler = lambda: BT.outs[0].get_atomic_flow('C')
+    get_C_emissions_WWT = lambda: R602.outs[0].get_atomic_flow('C') + S604.outs[1].get_atomic_flow('C')
     
     
     
@@ -374,15 +404,17 @@ def create_model(system_name):
     # metrics for CCU
     if system_name in [available_systems[2], available_systems[3], available_systems[4], available_systems[5], available_systems[6]]:
         
-        get_S1300_split = lambda: system.flowsheet.S1300.split[0]
+        S1300, M1302 = u.S1300, u.M1302
+        natural_gas_2, MeOH, gas_out = s.natural_gas_2, s.MeOH, s.gas_out
+        get_S1300_split = lambda: S1300.split[0]
         
-        get_C_fermentation_used = lambda: system.flowsheet.M1302.ins[0].get_atomic_flow('C')
-        get_C_boiler_used = lambda: system.flowsheet.M1302.ins[1].get_atomic_flow('C')
-        get_C_natural_gas = lambda: system.flowsheet.BT.ins[3].get_atomic_flow('C')
-        get_C_natural_gas_reforming = lambda: system.flowsheet.natural_gas_2.get_atomic_flow('C')
+        get_C_fermentation_used = lambda: M1302.ins[0].get_atomic_flow('C')
+        get_C_boiler_used = lambda: M1302.ins[1].get_atomic_flow('C')
+        get_C_natural_gas = lambda: BT.ins[3].get_atomic_flow('C')
+        get_C_natural_gas_reforming = lambda: natural_gas_2.get_atomic_flow('C')
         
-        get_C_methanol = lambda: system.flowsheet.MeOH.get_atomic_flow('C')
-        get_C_emissions_MeOH_offgas = lambda: system.flowsheet.gas_out.get_atomic_flow('C')
+        get_C_methanol = lambda: MeOH.get_atomic_flow('C')
+        get_C_emissions_MeOH_offgas = lambda: gas_out.get_atomic_flow('C')
         
         get_C_emissions_per_ethanol_MeOH = lambda: get_C_emissions() / (get_C_ethanol() + get_C_methanol())
         
@@ -407,10 +439,11 @@ def create_model(system_name):
     
     if system_name in [available_systems[2]]:
         # Changes in TEA
-        get_electricity_input = lambda: (system.get_electricity_consumption() - system.get_electricity_production()) / get_annual_factor() # kWh per hour
-        get_annual_electricity_cost = lambda: (system.get_electricity_consumption() - system.get_electricity_production()) * bst.PowerUtility.price / 1e6
-        get_electricity_consumption_R1101 = lambda: system.flowsheet.R1101.power_utility.rate  # kWh per hour
-        get_hydrogen_flow_R1101 = lambda: system.flowsheet.R1101.outs[0].imass['H2']
+        get_electricity_input = lambda: -get_excess_electricity() / get_annual_factor() # kWh per hour
+        get_annual_electricity_cost = lambda: -get_excess_electricity() * bst.PowerUtility.price / 1e6
+        R1101 = u.R1101
+        get_electricity_consumption_R1101 = lambda: R1101.power_utility.rate  # kWh per hour
+        get_hydrogen_flow_R1101 = lambda: R1101.outs[0].imass['H2']
         get_normalized_hydrogen_power_consump = lambda: get_electricity_consumption_R1101() / get_hydrogen_flow_R1101()
         check_electricity = lambda: get_electricity_input() / get_electricity_consumption_R1101()
         
@@ -423,89 +456,68 @@ def create_model(system_name):
         pass
 
     # 2. LCA
+    get_lca_GWP = memoize(lambda: lca.GWP)
+    get_lca_material_GWP = memoize(lambda: lca.material_GWP)
+    get_material_GWP_breakdown = memoize(lambda: lca.material_GWP_breakdown)
+    get_net_electricity_GWP = memoize(lambda: lca.net_electricity_GWP)
+    get_byproduct_credit_total = memoize(lca.GWP_byproduct_credit_total)
+    
     if system_name == available_systems[0] or system_name == available_systems[1]:
-        get_GWP = lambda: lca.GWP
-        get_material_GWP = lambda: lca.material_GWP
-        get_other_materials_GWP = lambda: get_material_GWP() - lca.material_GWP_breakdown['CSL'] -\
-            lca.material_GWP_breakdown['DAP'] - lca.material_GWP_breakdown['CH4'] -\
-                lca.material_GWP_breakdown['Cellulase']
-        
-        # using energy allocation
-        sec_per_hr = 60 * 60
-        kJ_per_GGE = 120276
-        GGE_electricity = lambda: sec_per_hr/kJ_per_GGE * get_excess_electricity()
-        GGE_ethanol = lambda: s.ethanol.get_property('LHV', 'GGE/hr') * system.operating_hours
-        ethanol_energy_allocation = lambda: GGE_ethanol() / (GGE_electricity() + GGE_ethanol())
-        electricity_energy_allocation = lambda: GGE_electricity() / (GGE_electricity() + GGE_ethanol())
-        
-        ethanol_GWP_by_energy = lambda: get_GWP_before_electricity_offset() * ethanol_energy_allocation()
-        electricity_GWP_by_energy = lambda: get_GWP_before_electricity_offset() * electricity_energy_allocation()
+        get_GWP = get_lca_GWP
+        get_material_GWP = get_lca_material_GWP
+        get_other_materials_GWP = lambda: get_material_GWP() - get_material_GWP_breakdown()['CSL'] -\
+            get_material_GWP_breakdown()['DAP'] - get_material_GWP_breakdown()['CH4'] -\
+                get_material_GWP_breakdown()['Cellulase']
         
-        metrics.append(Metric('Total GWP100a - ethanol by allocation', ethanol_GWP_by_energy, 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('Total GWP100a - electricity by allocation', electricity_GWP_by_energy, 'kg-CO2-eq/kg', 'LCA'))
+        # using energy allocation (EtOH and electricity)
+        allocation = CCU.GWPAllocation(lca, [s.ethanol], electricity=True)
         
     elif system_name == available_systems[2] or system_name == available_systems[3]:
-        get_GWP = lambda: lca.GWP - lca.material_GWP_breakdown['O2']
-        get_material_GWP = get_material_GWP_no_O2 = lambda: lca.material_GWP - lca.material_GWP_breakdown['O2']
+        get_GWP = lambda: get_lca_GWP() - get_material_GWP_breakdown()['O2']
+        get_material_GWP = get_material_GWP_no_O2 = lambda: get_lca_material_GWP() - get_material_GWP_breakdown()['O2']
         get_other_materials_GWP = lambda: get_material_GWP_no_O2() -\
-            lca.material_GWP_breakdown['CSL'] - lca.material_GWP_breakdown['DAP'] - lca.material_GWP_breakdown['CH4'] -\
-                lca.material_GWP_breakdown['Cellulase']
+            get_material_GWP_breakdown()['CSL'] - get_material_GWP_breakdown()['DAP'] - get_material_GWP_breakdown()['CH4'] -\
+                get_material_GWP_breakdown()['Cellulase']
         Metric('H2 cost', get_hydrogen_AOC, '10^6 $/yr', 'TEA'),
         metrics.append(Metric('GWP100a - Coproduct credit - Methanol', lambda: lca.GWP_byproduct_credit(0), 'kg-CO2-eq/kg', 'LCA'))
         metrics.append(Metric('GWP100a - Coproduct credit - O2', lambda: lca.GWP_byproduct_credit(1), 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('GWP100a - Coproduct credit - total', lambda: lca.GWP_byproduct_credit_total(), 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('GWP - O2', lambda: CCU.CFs['GWP_100']['O2'], 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('Amount - O2', lambda: s.O2.imass['O2'], 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('Amount - ETOH', lambda: s.ethanol.imass['Ethanol'], 'kg-CO2-eq/kg', 'LCA'))
+        metrics.append(Metric('GWP100a - Coproduct credit - total', get_byproduct_credit_total, 'kg-CO2-eq/kg', 'LCA'))
+        metrics.append(Metric('GWP - O2', lambda: lca.CFs['GWP_100']['O2'], 'kg-CO2-eq/kg', 'LCA'))
+        O2 = s.O2
+        metrics.append(Metric('Amount - O2', lambda: O2.imass['O2'], 'kg-CO2-eq/kg', 'LCA'))
+        metrics.append(Metric('Amount - ETOH', lambda: product_stream.imass['Ethanol'], 'kg-CO2-eq/kg', 'LCA'))
         
         # using hybrid allocation (O2 displaced, MeOH and EtOH energy allocation)
-        GWP_total_energy = lambda: get_GWP() + lca.GWP_byproduct_credit_total()
-        ethanol_energy_allocation = lambda: s.ethanol.get_property('LHV', 'GGE/hr') / (s.ethanol.get_property('LHV', 'GGE/hr')
-                                                                                       +s.MeOH.get_property('LHV', 'GGE/hr'))
-        MeOH_energy_allocation = lambda: s.MeOH.get_property('LHV', 'GGE/hr') / (s.ethanol.get_property('LHV', 'GGE/hr')
-                                                                                       +s.MeOH.get_property('LHV', 'GGE/hr'))
-        ethanol_GWP_by_energy = lambda: GWP_total_energy() * ethanol_energy_allocation()
-        MeOH_GWP_by_energy = lambda: GWP_total_energy() * MeOH_energy_allocation()
-        
-        metrics.append(Metric('Total GWP100a - ethanol by allocation', ethanol_GWP_by_energy, 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('Total GWP100a - MeOH by allocation', MeOH_GWP_by_energy, 'kg-CO2-eq/kg', 'LCA'))
+        allocation = CCU.GWPAllocation(lca, [s.ethanol, s.MeOH])
     elif system_name == available_systems[4] or system_name == available_systems[5]:
-        get_GWP = lambda: lca.GWP
-        get_material_GWP = lambda: lca.material_GWP
-        get_other_materials_GWP = lambda: get_material_GWP() - lca.material_GWP_breakdown['CSL'] -\
-            lca.material_GWP_breakdown['DAP'] - lca.material_GWP_breakdown['CH4'] -\
-                lca.material_GWP_breakdown['Cellulase'] - lca.material_GWP_breakdown['H2']
+        get_GWP = get_lca_GWP
+        get_material_GWP = get_lca_material_GWP
+        get_other_materials_GWP = lambda: get_material_GWP() - get_material_GWP_breakdown()['CSL'] -\
+            get_material_GWP_breakdown()['DAP'] - get_material_GWP_breakdown()['CH4'] -\
+                get_material_GWP_breakdown()['Cellulase'] - get_material_GWP_breakdown()['H2']
         Metric('H2 cost', get_hydrogen_AOC, '10^6 $/yr', 'TEA'),
         metrics.append(Metric('GWP100a - Coproduct credit - Methanol', lambda: lca.GWP_byproduct_credit(0), 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('GWP100a - Materials breakdown - H2', lambda: lca.material_GWP_breakdown['H2'], 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('GWP - H2', lambda: CCU.CFs['GWP_100']['H2'], 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('Amount - H2', lambda: s.hydrogen.imass['H2'], 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('Amount - ETOH', lambda: s.ethanol.imass['Ethanol'], 'kg-CO2-eq/kg', 'LCA'))
+        metrics.append(Metric('GWP100a - Materials breakdown - H2', lambda: get_material_GWP_breakdown()['H2'], 'kg-CO2-eq/kg', 'LCA'))
+        metrics.append(Metric('GWP - H2', lambda: lca.CFs['GWP_100']['H2'], 'kg-CO2-eq/kg', 'LCA'))
+        metrics.append(Metric('Amount - H2', lambda: hydrogen.imass['H2'], 'kg-CO2-eq/kg', 'LCA'))
+        metrics.append(Metric('Amount - ETOH', lambda: product_stream.imass['Ethanol'], 'kg-CO2-eq/kg', 'LCA'))
         
         # using energy allocation (MeOH and EtOH)
-        ethanol_energy_allocation = lambda: s.ethanol.get_property('LHV', 'GGE/hr') / (s.ethanol.get_property('LHV', 'GGE/hr')
-                                                                                       +s.MeOH.get_property('LHV', 'GGE/hr'))
-        MeOH_energy_allocation = lambda: s.MeOH.get_property('LHV', 'GGE/hr') / (s.ethanol.get_property('LHV', 'GGE/hr')
-                                                                                       +s.MeOH.get_property('LHV', 'GGE/hr'))
-        ethanol_GWP_by_energy = lambda: (get_GWP() + lca.GWP_byproduct_credit_total()) * ethanol_energy_allocation()
-        MeOH_GWP_by_energy = lambda: (get_GWP() + lca.GWP_byproduct_credit_total()) * MeOH_energy_allocation()
-        
-        metrics.append(Metric('Total GWP100a - ethanol by allocation', ethanol_GWP_by_energy, 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('Total GWP100a - MeOH by allocation', MeOH_GWP_by_energy, 'kg-CO2-eq/kg', 'LCA'))
+        allocation = CCU.GWPAllocation(lca, [s.ethanol, s.MeOH])
     else:
-        get_GWP = lambda: lca.GWP
-        get_material_GWP = lambda: lca.material_GWP
-        get_other_materials_GWP = lambda: get_material_GWP() - lca.material_GWP_breakdown['CSL'] -\
-            lca.material_GWP_breakdown['DAP'] - lca.material_GWP_breakdown['CH4'] -\
-                lca.material_GWP_breakdown['Cellulase']
+        get_GWP = get_lca_GWP
+        get_material_GWP = get_lca_material_GWP
+        get_other_materials_GWP = lambda: get_material_GWP() - get_material_GWP_breakdown()['CSL'] -\
+            get_material_GWP_breakdown()['DAP'] - get_material_GWP_breakdown()['CH4'] -\
+                get_material_GWP_breakdown()['Cellulase']
         
-        NG_C_mol = lambda: s.natural_gas.imol['CH4']
-        NG_reforming_C_mol = lambda: s.natural_gas_2.imol['CH4']
+        NG_C_mol = lambda: natural_gas.imol['CH4']
+        NG_reforming_C_mol = lambda: natural_gas_2.imol['CH4']
         
         NG_reforming_C_ratio = lambda: NG_reforming_C_mol() / (NG_C_mol() + NG_reforming_C_mol())
              
         metrics.append(Metric('GWP100a - Coproduct credit - Methanol', lambda: lca.GWP_byproduct_credit(0), 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('GWP100a - Materials breakdown - CH4_reforming', lambda: lca.material_GWP_breakdown['CH4']*\
+        metrics.append(Metric('GWP100a - Materials breakdown - CH4_reforming', lambda: get_material_GWP_breakdown()['CH4']*\
                               NG_reforming_C_ratio(), 'kg-CO2-eq/kg', 'LCA'))
         
         metrics.append(Metric('Amount - NG_C_mol', NG_C_mol, 'kmol/hr', 'LCA'))
@@ -513,21 +525,19 @@ def create_model(system_name):
         metrics.append(Metric('Amount - NG_reforming_C_ratio', NG_reforming_C_ratio, '', 'LCA'))
         
         # using energy allocation (MeOH and EtOH)
-        ethanol_energy_allocation = lambda: s.ethanol.get_property('LHV', 'GGE/hr') / (s.ethanol.get_property('LHV', 'GGE/hr')
-                                                                                       +s.MeOH.get_property('LHV', 'GGE/hr'))
-        MeOH_energy_allocation = lambda: s.MeOH.get_property('LHV', 'GGE/hr') / (s.ethanol.get_property('LHV', 'GGE/hr')
-                                                                                       +s.MeOH.get_property('LHV', 'GGE/hr'))
-        ethanol_GWP_by_energy = lambda: (get_GWP() + lca.GWP_byproduct_credit_total()) * ethanol_energy_allocation()
-        MeOH_GWP_by_energy = lambda: (get_GWP() + lca.GWP_byproduct_credit_total()) * MeOH_energy_allocation()
-        
-        metrics.append(Metric('Total GWP100a - ethanol by allocation', ethanol_GWP_by_energy, 'kg-CO2-eq/kg', 'LCA'))
-        metrics.append(Metric('Total GWP100a - MeOH by allocation', MeOH_GWP_by_energy, 'kg-CO2-eq/kg', 'LCA'))
+        allocation = CCU.GWPAllocation(lca, [s.ethanol, s.MeOH])
+    
+    # By-product (and electricity) credits are removed from the GWP, which is
+    # then shared by LHV; all allocated GWPs come from one array per system state
+    get_allocated_GWP = memoize(lambda: allocation.allocate(get_GWP()))
+    for i, name in enumerate(allocation.names):
+        metrics.append(Metric(f'Total GWP100a - {name} by allocation', lambda i=i: get_allocated_GWP()[i], 'kg-CO2-eq/kg', 'LCA'))
         
-    get_GWP_before_electricity_offset = lambda: get_GWP() - lca.net_electricity_GWP
+    get_GWP_before_electricity_offset = lambda: get_GWP() - get_net_electricity_GWP()
     
     metrics.append(Metric('Total GWP100a', get_GWP, 'kg-CO2-eq/kg', 'LCA'))
     metrics.append(Metric('Total GWP100a before electricity offset', get_GWP_before_electricity_offset, 'kg-CO2-eq/kg', 'LCA'))
-    metrics.append(Metric('GWP100a - Electricity', lambda: lca.net_electricity_GWP, 'kg-CO2-eq/kg', 'LCA'))
+    metrics.append(Metric('GWP100a - Electricity', get_net_electricity_GWP, 'kg-CO2-eq/kg', 'LCA'))
     metrics.append(Metric('GWP100a - Direct emissions', lambda: lca.direct_emissions_GWP, 'kg-CO2-eq/kg', 'LCA'))
     metrics.append(Metric('GWP100a - Direct biogenic emissions', lambda: lca.biogenic_emissions_GWP, 'kg-CO2-eq/kg', 'LCA'))
     metrics.append(Metric('GWP100a - EoL emissions', lambda: lca.EOL_GWP, 'kg-CO2-eq/kg', 'LCA'))
@@ -537,10 +547,10 @@ def create_model(system_name):
     metrics.append(Metric('GWP100a - Materials (except feedstock)', get_material_GWP, 'kg-CO2-eq/kg', 'LCA'))
     
     metrics.append(Metric('GWP100a - Materials other', get_other_materials_GWP, 'kg-CO2-eq/kg', 'LCA'))
-    metrics.append(Metric('GWP100a - Materials breakdown - CSL', lambda: lca.material_GWP_breakdown['CSL'], 'kg-CO2-eq/kg', 'LCA'))
-    metrics.append(Metric('GWP100a - Materials breakdown - DAP', lambda: lca.material_GWP_breakdown['DAP'], 'kg-CO2-eq/kg', 'LCA'))
-    metrics.append(Metric('GWP100a - Materials breakdown - CH4', lambda: lca.material_GWP_breakdown['CH4'], 'kg-CO2-eq/kg', 'LCA'))
-    metrics.append(Metric('GWP100a - Materials breakdown - Cellulase', lambda: lca.material_GWP_breakdown['Cellulase'], 'kg-CO2-eq/kg', 'LCA'))
+    metrics.append(Metric('GWP100a - Materials breakdown - CSL', lambda: get_material_GWP_breakdown()['CSL'], 'kg-CO2-eq/kg', 'LCA'))
+    metrics.append(Metric('GWP100a - Materials breakdown - DAP', lambda: get_material_GWP_breakdown()['DAP'], 'kg-CO2-eq/kg', 'LCA'))
+    metrics.append(Metric('GWP100a - Materials breakdown - CH4', lambda: get_material_GWP_breakdown()['CH4'], 'kg-CO2-eq/kg', 'LCA'))
+    metrics.append(Metric('GWP100a - Materials breakdown - Cellulase', lambda: get_material_GWP_breakdown()['Cellulase'], 'kg-CO2-eq/kg', 'LCA'))
     
     # =============================================================================
     # Set up model
@@ -574,6 +584,10 @@ def create_model(system_name):
     
     namespace = system.flowsheet.to_dict() | namespace_dict
     
+    # Economic-only parameters (prices, incentives, TEA financials, CFs) do not
+    # change the flows; declare them in an optional 'Economic' column or let
+    # them be detected from the statement
+    economic_parameters = []
     for i, row in dist_table.iterrows():
         param_name = row['Parameter name']
         element = row['Element']
@@ -586,60 +600,213 @@ def create_model(system_name):
             continue
             
 
-        param(name=param_name,
-              setter=create_function(statement, namespace), 
-              element=element, 
-              kind=kind, 
-              units=units,
-              baseline=baseline,
-              distribution=None)
+        parameter = param(name=param_name,
+                          setter=create_function(statement, namespace), 
+                          element=element, 
+                          kind=kind, 
+                          units=units,
+                          baseline=baseline,
+                          distribution=None)
+        economic = row.get('Economic')
+        if economic is None or pd.isna(economic): economic = CCU.is_economic_statement(statement)
+        if economic: economic_parameters.append(parameter)
     # =============================================================================
     # Bugfix barrage
     # =============================================================================
-    def reset_and_reload():
-        print('Resetting cache and emptying recycles ...')
-        system.reset_cache()
-        system.empty_recycles()
-    def reset_and_switch_solver(solver_ID):
-        system.reset_cache()
-        system.empty_recycles()
-        system.converge_method = solver_ID
-        print(f"Trying {solver_ID} ...")
-    def run_bugfix_barrage():
-        try:
-            reset_and_reload()
-            system.simulate()
-        except Exception as e:
-            print(str(e))
-            try:
-                reset_and_switch_solver('fixedpoint')
-                system.simulate()
-            except Exception as e:
-                print(str(e))
-                try:
-                    reset_and_switch_solver('aitken')
-                    system.simulate()
-                except Exception as e:
-                    print(str(e))
-                    # print(_yellow_text+"Bugfix barrage failed.\n"+_reset_text)
-                    print("Bugfix barrage failed.\n")
-                    # breakpoint()
-                    raise e
-
-    def model_specification():
-        try:
-            system.simulate()
-        except Exception as e:
-            str_e = str(e).lower()
-            print('Error in model spec: %s'%str_e)
-            run_bugfix_barrage()
-    model.specification = model_specification()
+    # Simulates the system and retries with reset recycles and other solvers on
+    # failure, keeping solver telemetry of every sample; the simulation is
+    # skipped when only economic-only parameters changed; with a snapshot
+    # folder, every converged sample is saved for post-hoc recomputation
+    model.specification = CCU.BugfixBarrage(
+        system, fast_path=CCU.EconomicFastPath(model, economic_parameters),
+        snapshots=None if snapshot_folder is None else CCU.SnapshotStore(snapshot_folder, system, lca),
+    )
     return model
 
+def get_warm_start_streams(system):
+    # Recycles plus the MeOH loop (M1102/C1104), the HXprocess inlets, and the capture splitter feed
+    streams = system.get_all_recycles()
+    search = system.flowsheet.unit.search
+    for ID, index in (('M1102', 1), ('H1101', 1), ('H1103', 1), ('S1300', 0)):
+        unit = search(ID)
+        if unit is None or len(unit.ins) <= index: continue
+        stream = unit.ins[index]
+        if not any(stream is i for i in streams): streams.append(stream)
+    return streams
+
+def create_warm_start(model, samples=None):
+    return CCU.RecycleWarmStart.from_model(model, get_warm_start_streams(model.system), samples)
+
 #%% Generate parameters and samples
 
+def get_distributions(dist_table, fixed_params=None):
+    """
+    Return the distributions of the parameters in `dist_table` that are not
+    fixed, and the mask and values of the fixed ones.
+    """
+    fixed_params = fixed_params or {}
+    names = dist_table['Parameter name'].astype(str).str.strip()
+    fixed = names.isin(list(fixed_params)).to_numpy()
+    sampled = dist_table[~fixed]
+    shapes = sampled['Shape'].str.strip().str.lower()
+    unsupported = ~shapes.isin(('triangular', 'uniform'))
+    if unsupported.any():
+        raise ValueError(f"Unsupported shape: {shapes[unsupported].iloc[0]}")
+    distributions = [cp.Triangle(lower, mode, upper) if shape == 'triangular' else cp.Uniform(lower, upper)
+                     for shape, lower, mode, upper in zip(shapes, sampled['Lower'], sampled['Midpoint'], sampled['Upper'])]
+    return distributions, fixed, [fixed_params[i] for i in names[fixed]]
+
+def get_CF_distributions(dist_table, system_name, key='GWP_100'):
+    """
+    Return a dictionary of inventory ID to the distribution of its CF for the
+    CF parameters of the given system (statements "lca.change_CF(key, ID, x)"),
+    to sample CFs without simulating (see `SnapshotStore.get_nested_GWP`).
+    """
+    rows = dist_table[dist_table['Element'].isin(system_element_mapping.get(system_name, set()))]
+    IDs = []
+    for statement in rows['Statement'].astype(str):
+        match = re.fullmatch(r"\s*lca\.change_CF\(\s*'(.+)'\s*,\s*'(.+)'\s*,\s*x\s*\)\s*", statement)
+        IDs.append(match[2] if match and match[1] == key else None)
+    mask = np.array([i is not None for i in IDs], bool)
+    distributions, _, _ = get_distributions(rows[mask])
+    return dict(zip([i for i in IDs if i is not None], distributions))
+
+def sample_from_dist_table(dist_table, N=N, seed=3221, fixed_params=None):
+    """Return the N x P matrix of Latin hypercube samples of all parameters in `dist_table`."""
+    distributions, fixed, fixed_values = get_distributions(dist_table, fixed_params)
+    full_samples = np.empty((N, len(dist_table)), dtype=float)
+    if distributions:
+        joint_dist = cp.J(*distributions)
+        full_samples[:, ~fixed] = joint_dist.sample(size=N, rule="L", seed=seed).reshape(len(distributions), N).T
+    full_samples[:, fixed] = fixed_values
+    return full_samples
+
+def sobol_from_dist_table(dist_table, N, start=0, seed=3221, fixed_params=None):
+    """
+    Return rows `start` to `start + N` of the scrambled Sobol samples of all
+    parameters in `dist_table`; unlike Latin hypercube samples, they can be
+    extended batch by batch (see `evaluate_adaptive`).
+    """
+    distributions, fixed, fixed_values = get_distributions(dist_table, fixed_params)
+    full_samples = np.empty((N, len(dist_table)), dtype=float)
+    if distributions:
+        full_samples[:, ~fixed] = CCU.sobol_sample(cp.J(*distributions), N, start, seed)
+    full_samples[:, fixed] = fixed_values
+    return full_samples
+
+def get_system_samples(samples, dist_table, system_name):
+    """Return the columns of `samples` for the parameters of the given system, in model order."""
+    mask = dist_table['Element'].isin(system_element_mapping.get(system_name, set())).to_numpy()
+    return samples[:, mask]
+
+def save_samples(file, samples, dist_table):
+    np.savez_compressed(file, samples=samples,
+                        parameter_names=dist_table['Parameter name'].to_numpy(dtype=str),
+                        elements=dist_table['Element'].to_numpy(dtype=str))
+
+def load_samples(file):
+    """Return samples, parameter names, and elements saved with `save_samples`."""
+    with np.load(file) as data:
+        return data['samples'], data['parameter_names'], data['elements']
+
+def export_samples_to_excel(file, samples, dist_table):
+    # Element and parameter name rows on top, sample number in the first column
+    header = pd.DataFrame([['Element', *dist_table['Element']],
+                           ['Parameter name', *dist_table['Parameter name']]])
+    body = pd.DataFrame(np.column_stack([np.arange(1, samples.shape[0] + 1), samples]))
+    pd.concat([header, body], ignore_index=True).to_excel(file, index=False, header=False)
+
+#%% Batch evaluation of several systems
+
+def evaluate_systems(system_names=available_systems, dist_table=None, N=N, seed=3221,
+                     fixed_params=None, n_workers=None, log_folder=None,
+                     warm_start=False, notify=0):
+    """
+    Evaluate several systems over one joint sample matrix (common random
+    numbers, filtered by `system_element_mapping`), with all system x sample
+    jobs on one process pool. Return a dictionary of system name to model,
+    with results in `model.table`. If `log_folder` is given, results are
+    logged per system and a rerun resumes from them.
+    """
+    from functools import partial
+    if dist_table is None: dist_table = load_dist_table()
+    samples = sample_from_dist_table(dist_table, N=N, seed=seed, fixed_params=fixed_params)
+    models = {}
+    for name in system_names:
+        models[name] = model = create_model(name, dist_table)
+        model.load_samples(get_system_samples(samples, dist_table, name))
+    factories = {name: partial(create_model, name, dist_table) for name in system_names}
+    logs = None if log_folder is None else {
+        name: CCU.ResultLog.from_model(os.path.join(log_folder, f'{name}_{seed}_{N}sims'), model)
+        for name, model in models.items()
+    }
+    convergence_model_factories = {
+        name: partial(create_warm_start, samples=model._samples) for name, model in models.items()
+    } if warm_start else None
+    CCU.evaluate_batch_in_parallel(models, factories, n_workers, logs=logs, notify=notify,
+                                   convergence_model_factories=convergence_model_factories)
+    return models
+
+def evaluate_system_adaptively(system_name, dist_table=None, seed=3221, fixed_params=None,
+                               log_folder=None, warm_start=False, model=None, **kwargs):
+    """
+    Evaluate a system over scrambled Sobol samples in batches until its
+    percentiles and Spearman's rho settle (see `CCU.evaluate_adaptive` for
+    the tolerances and other keyword arguments). Return the model, with
+    results in `model.table`, and the convergence history. A new model is
+    created unless one is given.
+    """
+    if dist_table is None: dist_table = load_dist_table()
+    if model is None: model = create_model(system_name, dist_table)
+    sampler = lambda start, size: get_system_samples(
+        sobol_from_dist_table(dist_table, size, start, seed, fixed_params), dist_table, system_name
+    )
+    if warm_start:
+        # Normalize by the distribution bounds as the samples are not known upfront
+        bounds = dist_table[['Lower', 'Upper']].to_numpy(dtype=float).T
+        kwargs['convergence_model'] = CCU.RecycleWarmStart.from_model(
+            model, get_warm_start_streams(model.system),
+            get_system_samples(bounds, dist_table, system_name),
+        )
+    log = None if log_folder is None else CCU.ResultLog.from_model(
+        os.path.join(log_folder, f'{system_name}_{seed}_sobol'), model
+    )
+    history = CCU.evaluate_adaptive(model, sampler, log=log, **kwargs)
+    return model, history
+
+def get_combined_table(models):
+    """Return the results of all systems in one table indexed by system and sample."""
+    return pd.concat({name: model.table for name, model in models.items()}, names=['System', 'Sample'])
+
+def get_paired_differences(models, reference=available_systems[0],
+                           metrics=('Minimum selling price', 'Total GWP100a'),
+                           percentiles=(0.05, 0.25, 0.50, 0.75, 0.95)):
+    """
+    Return statistics of the sample-wise difference (system - reference) of
+    each metric, for every system evaluated over the same samples as the
+    reference system.
+    """
+    reference_table = models[reference].table
+    percentiles = np.asarray(percentiles)
+    stats = {}
+    for name, model in models.items():
+        if name == reference: continue
+        for metric in metrics:
+            differences = (CCU.get_metric_column(model.table, metric)
+                           - CCU.get_metric_column(reference_table, metric)).to_numpy(dtype=float)
+            differences = differences[~np.isnan(differences)]
+            stats[name, metric] = {'Mean': differences.mean(),
+                                   'Std': differences.std(ddof=1),
+                                   **dict(zip([f'{i:.0%}' for i in percentiles],
+                                              np.quantile(differences, percentiles))),
+                                   'Fraction below reference': (differences < 0).mean(),
+                                   'Samples': differences.size}
+    stats = pd.DataFrame.from_dict(stats, orient='index')
+    stats.index.names = ['System', 'Metric']
+    return stats
+
 if __name__ == '__main__':
-    EtOH_MeOH_filepath = CCU.EtOH.__file__.replace('\\__init__.py', '')
+    EtOH_MeOH_filepath = os.path.dirname(CCU.EtOH.__file__)
     input_folder = os.path.join(EtOH_MeOH_filepath, 'analyses', 'parameter_distributions')
     os.makedirs(input_folder, exist_ok=True)
     
@@ -647,77 +814,7 @@ if __name__ == '__main__':
     full_parameter_distributions_filepath = os.path.join(input_folder, full_parameter_distributions_filename)
     
     # Read the table
-    dist_table  = pd.read_excel(full_parameter_distributions_filepath) 
-    
-    param_names = dist_table['Parameter name'].tolist()
-    elements = dist_table['Element'].tolist()
-    
-    distributions = []
-    sample_positions = []
-    
-    def sample_from_dist_table(dist_table, N=N, seed=3221, fixed_params=None):
-        fixed_params = fixed_params or {}
-        
-        for pos, (_, row) in enumerate(dist_table.iterrows()):
-            name = str(row["Parameter name"]).strip()
-            
-            if name in fixed_params:
-                continue
-            
-            shape = row['Shape'].strip().lower()
-            lower = row['Lower']
-            upper = row['Upper']
-        
-            if shape == 'triangular':
-                mode = row['Midpoint']
-                dist = cp.Triangle(lower, mode, upper)
-            elif shape == 'uniform':
-                dist = cp.Uniform(lower, upper)
-            else:
-                raise ValueError(f"Unsupported shape: {shape}")
-        
-            distributions.append(dist)
-            sample_positions.append(pos)
-        
-        if distributions:
-            joint_dist = cp.J(*distributions)
-            rand_samples = joint_dist.sample(size=N, rule="L", seed=seed).T 
-        else:
-            rand_samples = np.empty((N, 0), dtype=float)
-        
-        full_samples = np.empty((N, len(dist_table)), dtype=float)
-        
-        for pos, name in enumerate(param_names):
-            if name in fixed_params:
-                full_samples[:, pos] = fixed_params[name]
-        
-        for j, pos in enumerate(sample_positions):
-            full_samples[:, pos] = rand_samples[:, j]
-        
-        sample_df = pd.DataFrame(full_samples, columns=param_names)
-        # Shift samples one column right by adding empty column at index 0
-        sample_df.insert(0, 'Empty', '')
-    
-        # Prepare metadata rows (row 0 and 1) with empty first cell for alignment
-        row1 = ['Element'] + elements
-        row2 = ['Parameter name'] + param_names
-    
-        # Build full data as list of lists
-        output_data = [row1, row2]
-    
-        # Append samples with index in column A
-        for i, sample_row in enumerate(sample_df.values, start=1):
-            # replace first cell (empty) with index i
-            sample_row[0] = i
-            output_data.append(sample_row.tolist())
-
-        # Convert to DataFrame and export
-        output_df = pd.DataFrame(output_data)
-        output_filename = f'{N}_full_samples.xlsx'
-        output_path = os.path.join(input_folder, output_filename)
-        output_df.to_excel(output_path, index=False, header=False)
-        return output_df
-    
+    dist_table = load_dist_table(full_parameter_distributions_filepath)
     
     #%%
     from datetime import datetime
@@ -728,42 +825,61 @@ if __name__ == '__main__':
     
     minute = '0' + str(dateTimeObj.minute) if len(str(dateTimeObj.minute))==1 else str(dateTimeObj.minute)
     
-    def run_model(sys_name, notify_runs=10):
-        model = create_model(system_name=sys_name)
-        
-        allowed_elements = system_element_mapping.get(sys_name, set())
-    
-        # Filter parameter names based on element
-        allowed_param_names = [
-            name for name, elem in zip(param_names, elements)
-            if elem in allowed_elements
-        ]
-    
-        sample_columns = ['Parameter name'] + param_names
-        param_col_indices = [
-            sample_columns.index(pname)
-            for pname in allowed_param_names
-        ]
+    def get_snapshot_folder(sys_name, seed=3221):
+        return os.path.join(EtOH_MeOH_filepath, 'analyses', 'results', 'snapshots', f'{sys_name}_{seed}_{N}sims')
+    
+    def run_model(sys_name, notify_runs=10, n_workers=None, seed=3221, warm_start=False,
+                  export_samples=False, surrogate=False, adaptive=False, snapshots=False):
+        # With snapshots, metrics can be recomputed later with recompute_model
+        snapshot_folder = get_snapshot_folder(sys_name, seed) if snapshots else None
+        model = create_model(system_name=sys_name, dist_table=dist_table, snapshot_folder=snapshot_folder)
         
-        output_df = sample_from_dist_table(dist_table, N=N, seed=3221, fixed_params=fixed_params)
-    
-        # Sample rows (skip metadata rows 0 and 1)
-        sample_list = []
-        for i in range(2, N + 2):  # row index in output_df
-            row = output_df.iloc[i]
-            sample_row = [row[j] for j in param_col_indices]
-            sample_list.append(sample_row)
+        if not adaptive:
+            samples = sample_from_dist_table(dist_table, N=N, seed=seed, fixed_params=fixed_params)
+            samples_file = os.path.join(input_folder, f'{N}_full_samples')
+            save_samples(samples_file + '.npz', samples, dist_table)
+            if export_samples: export_samples_to_excel(samples_file + '.xlsx', samples, dist_table)
             
-        sample_array = np.array(sample_list)
-        
-        model.load_samples(sample_array)
+            model.load_samples(get_system_samples(samples, dist_table, sys_name))
         
         # Baseline results
         baseline_initial = model.metrics_at_baseline()
         baseline = pd.DataFrame(data=np.array([[i for i in baseline_initial.values],]), 
                                 columns=baseline_initial.keys())
-
-        model.evaluate(notify=notify_runs)
+        # Piecewise-linear Newton vs. root finder for MSP at the baseline
+        price_solvers = CCU.compare_price_solvers(model.system.TEA, model.system.flowsheet.stream.ethanol)
+
+        # Every finished sample is appended to the log right away; rerunning
+        # with the same system, seed, and N resumes from the completed samples
+        log_folder = os.path.join(EtOH_MeOH_filepath, 'analyses', 'results', 'logs')
+        if adaptive:
+            # Sobol samples in batches until the percentiles and Spearman's rho
+            # of MSP and GWP settle, with at most N samples
+            model, convergence = evaluate_system_adaptively(
+                sys_name, dist_table, seed, fixed_params, log_folder, warm_start,
+                model=model, max_samples=N, notify=notify_runs,
+            )
+            samples = sobol_from_dist_table(dist_table, model.table.shape[0], seed=seed,
+                                            fixed_params=fixed_params)
+            samples_file = os.path.join(input_folder, f'{samples.shape[0]}_full_sobol_samples')
+            save_samples(samples_file + '.npz', samples, dist_table)
+            if export_samples: export_samples_to_excel(samples_file + '.xlsx', samples, dist_table)
+        else:
+            log = CCU.ResultLog.from_model(os.path.join(log_folder, f'{sys_name}_{seed}_{N}sims'), model)
+            if n_workers and n_workers > 1:
+                # Each worker builds its own copy of the model once
+                from functools import partial
+                CCU.evaluate_in_parallel(model, partial(create_model, sys_name, dist_table, snapshot_folder),
+                                         n_workers=n_workers, log=log, notify=notify_runs,
+                                         convergence_model_factory=partial(create_warm_start, samples=model._samples)
+                                         if warm_start else None)
+            else:
+                CCU.evaluate_samples(model, log=log, notify=notify_runs,
+                                     convergence_model=create_warm_start(model) if warm_start else None)
+            # Results below are built from the log
+            log.fill_table(model)
+        N_samples = model.table.shape[0]
+        telemetry = model.specification.get_table()
         
         # Percentiles
         percentiles = [0.05, 0.25, 0.50, 0.75, 0.95]
@@ -777,17 +893,86 @@ if __name__ == '__main__':
         
         sig_params = CCU.get_significant_params(rho_df=df_rho, p_df = df_p, 
                                                 indicator_filter = target_indicators)
+        
+        # Polynomial chaos surrogate for instant MSP/GWP/TCI predictions;
+        # load it later with CCU.PolynomialSurrogate.load. It is only saved
+        # if its cross-validated Q2 is good enough for every metric
+        if surrogate:
+            try:
+                surrogate = CCU.PolynomialSurrogate.from_model(model)
+            except ValueError as error:
+                print(f'No surrogate saved: {error}')
+                surrogate = None
+            else:
+                surrogate_folder = os.path.join(EtOH_MeOH_filepath, 'analyses', 'results', 'surrogates')
+                os.makedirs(surrogate_folder, exist_ok=True)
+                surrogate.save(os.path.join(surrogate_folder, f'{sys_name}_{seed}_{N_samples}sims.npz'))
             
 
         file_to_save = EtOH_MeOH_results_filepath\
             +'_' + sys_name + '_%s.%s.%s-%s.%s'%(dateTimeObj.year, dateTimeObj.month, dateTimeObj.day, dateTimeObj.hour, minute)\
-            + '_' + '_' + str(N) + 'sims'
+            + '_' + '_' + str(N_samples) + 'sims'
         # Output to Excel
         with pd.ExcelWriter(file_to_save+'_'+'_1_full_evaluation.xlsx') as writer:
             baseline.to_excel(writer, sheet_name='Baseline')
+            price_solvers.to_excel(writer, sheet_name='Price solvers')
             percentiles_df.to_excel(writer, sheet_name='Percentile results')
             sig_params.to_excel(writer, sheet_name='Significant parameters')
             df_rho.to_excel(writer, sheet_name='df_rho')
             df_rho.to_excel(writer, sheet_name='df_p')
             model.table.to_excel(writer, sheet_name='Raw data')
-        
\ No newline at end of file
+            telemetry.to_excel(writer, sheet_name='Solver telemetry')
+            if surrogate: surrogate.cross_validation.to_excel(writer, sheet_name='Surrogate CV')
+            if adaptive: convergence.to_excel(writer, sheet_name='Convergence')
+        
+
+    #%% Metrics recomputed from snapshots (e.g., after changing CFs or metric definitions)
+    def recompute_model(sys_name, seed=3221):
+        model = create_model(system_name=sys_name, dist_table=dist_table,
+                             snapshot_folder=get_snapshot_folder(sys_name, seed))
+        samples = sample_from_dist_table(dist_table, N=N, seed=seed, fixed_params=fixed_params)
+        model.load_samples(get_system_samples(samples, dist_table, sys_name))
+        model.metrics_at_baseline() # Only simulation; samples are restored from snapshots
+        snapshots = model.specification.snapshots
+        table = snapshots.recompute(model)
+        impacts = snapshots.get_impacts(snapshots.lca.CFs) # Every sample at the baseline CFs
+        file_to_save = EtOH_MeOH_results_filepath\
+            +'_' + sys_name + '_%s.%s.%s-%s.%s'%(dateTimeObj.year, dateTimeObj.month, dateTimeObj.day, dateTimeObj.hour, minute)\
+            + '_' + '_' + str(table.shape[0]) + 'sims'
+        with pd.ExcelWriter(file_to_save+'_'+'_2_recomputed_evaluation.xlsx') as writer:
+            table.to_excel(writer, sheet_name='Raw data')
+            impacts.to_excel(writer, sheet_name='Impacts')
+        return table
+
+    #%% Nested CF uncertainty from snapshots: N_CF CF samples per process sample
+    def run_nested_CF(sys_name, N_CF=2000, seed=3221):
+        model = create_model(system_name=sys_name, dist_table=dist_table,
+                             snapshot_folder=get_snapshot_folder(sys_name, seed))
+        snapshots = model.specification.snapshots
+        index, GWP = snapshots.get_nested_GWP(snapshots.lca.CFs, get_CF_distributions(dist_table, sys_name),
+                                              N_CF, seed=seed)
+        summary, shares = CCU.summarize_nested(GWP, index=index)
+        file_to_save = EtOH_MeOH_results_filepath\
+            +'_' + sys_name + '_%s.%s.%s-%s.%s'%(dateTimeObj.year, dateTimeObj.month, dateTimeObj.day, dateTimeObj.hour, minute)\
+            + '_' + '_' + str(len(index)) + 'x' + str(N_CF) + 'sims'
+        with pd.ExcelWriter(file_to_save+'_'+'_3_nested_CF_evaluation.xlsx') as writer:
+            summary.to_excel(writer, sheet_name='GWP over CF samples')
+            shares.to_frame('Share of variance').to_excel(writer, sheet_name='Variance shares')
+        return summary, shares
+
+    #%% Batch run of several systems over shared samples
+    def run_batch(system_names=available_systems, notify_runs=10, n_workers=None, seed=3221):
+        models = evaluate_systems(system_names, dist_table, N=N, seed=seed, fixed_params=fixed_params,
+                                  n_workers=n_workers, notify=notify_runs,
+                                  log_folder=os.path.join(EtOH_MeOH_filepath, 'analyses', 'results', 'logs'))
+        paired_differences = get_paired_differences(models) if available_systems[0] in models else None
+        file_to_save = EtOH_MeOH_results_filepath\
+            +'_batch_%s.%s.%s-%s.%s'%(dateTimeObj.year, dateTimeObj.month, dateTimeObj.day, dateTimeObj.hour, minute)\
+            + '_' + '_' + str(N) + 'sims'
+        with pd.ExcelWriter(file_to_save+'_'+'_1_full_evaluation.xlsx') as writer:
+            if paired_differences is not None:
+                paired_differences.to_excel(writer, sheet_name='Paired differences')
+            get_combined_table(models).to_excel(writer, sheet_name='Raw data')
+            pd.concat({name: model.specification.get_table() for name, model in models.items()},
+                      names=['System']).to_excel(writer, sheet_name='Solver telemetry')
+        return models
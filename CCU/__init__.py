@@ -5,5 +5,19 @@ from ._process_settings import *
 from ._tea import *
 from ._units import *
 from ._model_utils import *
+from ._metric_cache import *
+from ._bugfix_barrage import *
+from ._result_log import *
+from ._parallel import *
+from ._warm_start import *
+from ._surrogate import *
+from ._adaptive import *
+from ._contour import *
+from ._fast_path import *
+from ._price_sensitivity import *
+from ._impact_matrix import *
+from ._nested_uncertainty import *
+from ._snapshots import *
+from ._allocation import *
 from .EtOH import *
 from . import EtOH
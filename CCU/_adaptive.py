@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:31:08 2026
+
+@author: IGB
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc, rankdata
+from biosteam.evaluation._utils import var_indices
+from ._model_utils import get_metric_index
+from ._parallel import _evaluate_index, _save_values
+
+__all__ = ('sobol_sample', 'get_bootstrap_widths', 'evaluate_adaptive')
+
+
+def sobol_sample(distribution, N, start=0, seed=None):
+    """
+    Return rows `start` to `start + N` of a scrambled Sobol sequence mapped
+    through the inverse CDF of a (joint) chaospy `distribution`. The sequence
+    is extensible: samples drawn batch by batch with the same seed match
+    those drawn at once. Batches of powers of 2 keep Sobol balance.
+    """
+    sobol = qmc.Sobol(len(distribution), scramble=True, seed=seed)
+    if start: sobol.fast_forward(start)
+    return np.asarray(distribution.inv(sobol.random(N).T), float).reshape(-1, N).T
+
+def _spearman(X_ranks, y_ranks):
+    X = X_ranks - X_ranks.mean(0)
+    y = y_ranks - y_ranks.mean()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (X.T @ y) / np.sqrt((X * X).sum(0) * (y @ y))
+
+def get_bootstrap_widths(X, Y, percentiles=(0.05, 0.5, 0.95), n_bootstrap=200,
+                         confidence=0.95, seed=0):
+    """
+    Return bootstrap confidence interval widths of the `percentiles` of each
+    metric and of the Spearman's rho between each parameter and metric.
+
+    X : Parameter samples (N x P).
+    Y : Metric values (N x M); samples with NaN values are omitted per metric.
+
+    Percentile widths (K x M) are relative to the range between the lowest
+    and highest requested percentile (or to the standard deviation for a
+    single percentile), which stays meaningful for metrics crossing zero
+    (e.g., GWP). Rho widths (P x M) are absolute; constant parameters give NaN.
+    """
+    X = np.asarray(X, float)
+    Y = np.asarray(Y, float).reshape(len(X), -1)
+    percentiles = np.atleast_1d(percentiles)
+    alpha = (1 - confidence) / 2
+    rng = np.random.default_rng(seed)
+    percentile_widths = np.full((percentiles.size, Y.shape[1]), np.nan)
+    rho_widths = np.full((X.shape[1], Y.shape[1]), np.nan)
+    for m, y in enumerate(Y.T):
+        finite = np.isfinite(y)
+        x, y = X[finite], y[finite]
+        N = y.size
+        if N < 3: continue
+        resamples = rng.integers(0, N, (n_bootstrap, N))
+        bootstrap = np.quantile(y[resamples], percentiles, axis=1)
+        lb, ub = np.quantile(bootstrap, (alpha, 1 - alpha), axis=1)
+        if percentiles.size > 1:
+            scale = np.subtract(*np.quantile(y, (percentiles.max(), percentiles.min())))
+        else:
+            scale = y.std()
+        if scale > 0: percentile_widths[:, m] = (ub - lb) / scale
+        rho = np.array([_spearman(rankdata(x[i], axis=0), rankdata(y[i])) for i in resamples])
+        lb, ub = np.quantile(rho, (alpha, 1 - alpha), axis=0)
+        rho_widths[:, m] = ub - lb
+    return percentile_widths, rho_widths
+
+def _max_width(widths):
+    # Too few finite results to estimate any width counts as not converged
+    finite = np.isfinite(widths)
+    return widths[finite].max() if finite.any() else np.inf
+
+def evaluate_adaptive(model, sampler, metrics=('Minimum selling price', 'Total GWP100a'),
+                      percentiles=(0.05, 0.5, 0.95), percentile_tolerance=0.1,
+                      rho_tolerance=0.15, batch_size=128, min_samples=256,
+                      max_samples=4096, n_bootstrap=200, confidence=0.95, seed=0,
+                      log=None, notify=0, convergence_model=None):
+    """
+    Evaluate `model` in batches drawn from an extensible design until the
+    bootstrap confidence intervals of the chosen percentiles and of the
+    Spearman's rho of the `metrics` are narrow enough, and save the results
+    of all evaluated samples to `model.table`.
+
+    sampler : Callable taking the first row and number of rows and returning
+        those samples of the design in model order (e.g., Sobol rows, see
+        `sobol_sample`).
+    percentile_tolerance : Largest relative confidence interval width of any
+        percentile (see `get_bootstrap_widths`); None to skip the check.
+    rho_tolerance : Largest confidence interval width of any Spearman's rho;
+        None to skip the check.
+    min_samples, max_samples : Bounds on the number of samples.
+    log : ResultLog to append finished samples to; samples already in the
+        log are skipped, so a rerun resumes batch by batch.
+
+    Return the convergence history, one row per batch checked; the number
+    of samples needed is in the last row.
+    """
+    metric_indices = None
+    parameter_indices = var_indices(model.parameters)
+    samples = np.zeros((0, len(parameter_indices)))
+    values = []
+    history = []
+    while samples.shape[0] < max_samples:
+        start = samples.shape[0]
+        size = min(batch_size if start >= min_samples else min_samples - start,
+                   max_samples - start)
+        samples = np.vstack([samples, sampler(start, size)])
+        model.load_samples(samples, sort=False)
+        values.extend([None] * size)
+        if log is not None:
+            for i, row in log.completed(samples).items(): values[i] = row
+        _evaluate_index(model, range(start, start + size), values, log, notify, convergence_model)
+        table = _save_values(model, values)
+        if metric_indices is None: metric_indices = [get_metric_index(table, i) for i in metrics]
+        if samples.shape[0] < min_samples: continue
+        percentile_widths, rho_widths = get_bootstrap_widths(
+            table[parameter_indices].to_numpy(dtype=float),
+            table[metric_indices].to_numpy(dtype=float),
+            percentiles, n_bootstrap, confidence, seed,
+        )
+        percentile_width = _max_width(percentile_widths)
+        rho_width = _max_width(rho_widths)
+        converged = ((percentile_tolerance is None or percentile_width <= percentile_tolerance)
+                     and (rho_tolerance is None or rho_width <= rho_tolerance))
+        history.append({'Samples': samples.shape[0],
+                        'Failed samples': int(np.isnan(table[metric_indices].to_numpy(dtype=float)).any(1).sum()),
+                        'Percentile CI width': percentile_width,
+                        'Rho CI width': rho_width,
+                        'Converged': converged})
+        if notify:
+            print(f"[{samples.shape[0]} samples] percentile CI width: {percentile_width:.3g}, "
+                  f"rho CI width: {rho_width:.3g}")
+        if converged: break
+    return pd.DataFrame(history, columns=['Samples', 'Failed samples', 'Percentile CI width',
+                                          'Rho CI width', 'Converged'])
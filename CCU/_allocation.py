@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:31:27 2026
+
+@author: IGB
+"""
+
+import numpy as np
+import biosteam as bst
+from ._metric_cache import SimulationCache
+
+__all__ = ('GWPAllocation',)
+
+
+class GWPAllocation:
+    """
+    Allocation of the GWP of a system among its products by energy (LHV in
+    gasoline gallon equivalents), mass, or economic value. Product
+    quantities and by-product credits are read once per converged state
+    and shared by all allocated GWPs.
+
+    lca : create_CCU_lca of the system.
+    products : Product streams sharing the GWP.
+    electricity : Whether exported electricity is also a product (energy by
+        GGE, value at `bst.PowerUtility.price`, no mass); its displacement
+        credit is then removed from the GWP.
+    displaced : By-products of the LCA that keep their displacement credits
+        (hybrid allocation); the credits of the other by-products are
+        removed from the GWP before allocating.
+
+    Examples
+    --------
+    >>> allocation = GWPAllocation(lca, [ethanol, MeOH], displaced=[O2]) # doctest: +SKIP
+    >>> allocation.allocate() # kg-CO2-eq per functional unit for ethanol and MeOH # doctest: +SKIP
+
+    """
+    sec_per_hr = 60 * 60
+    kJ_per_GGE = 120276
+    bases = ('energy', 'mass', 'economic')
+
+    def __init__(self, lca, products, electricity=False, displaced=()):
+        self.lca = lca
+        self.system = lca.system
+        self.products = list(products)
+        self.electricity = electricity
+        displaced = set([id(i) for i in displaced])
+        self._credited = np.array([id(i) not in displaced for i in lca.by_products], bool)
+
+    @property
+    def names(self):
+        """Names of the products, ending with 'electricity' if it is one."""
+        return [i.ID for i in self.products] + (['electricity'] if self.electricity else [])
+
+    def _load(self):
+        products = self.products
+        quantities = np.array([[i.get_property('LHV', 'GGE/hr') for i in products],
+                               [i.F_mass for i in products],
+                               [i.F_mass * i.price for i in products]])
+        lca = self.lca
+        credits = lca.GWP_byproduct_credits()[self._credited].sum() if lca.by_products else 0.
+        if self.electricity:
+            system = self.system
+            excess = (system.get_electricity_production() - system.get_electricity_consumption()) / system.operating_hours # kWh/hr
+            electricity = [self.sec_per_hr / self.kJ_per_GGE * excess, 0., excess * bst.PowerUtility.price]
+            quantities = np.column_stack([quantities, electricity])
+            credits -= lca.net_electricity_GWP
+        return quantities, credits
+
+    def _get_data(self):
+        return SimulationCache.for_system(self.system).get((self, 'data'), self._load)
+
+    def get_factors(self, basis='energy'):
+        """Return the allocation factor of each product for an energy, mass or economic basis."""
+        try:
+            quantities = self._get_data()[0][self.bases.index(basis)]
+        except ValueError:
+            raise ValueError(f"basis must be one of {', '.join(self.bases)}; not {basis!r}") from None
+        return quantities / quantities.sum()
+
+    def allocate(self, GWP=None, basis='energy'):
+        """
+        Return the GWP [per functional unit] allocated to each product as an
+        array; `GWP` defaults to the total GWP of the LCA (net of by-product
+        and electricity credits).
+        """
+        if GWP is None: GWP = self.lca.GWP
+        return (GWP + self._get_data()[1]) * self.get_factors(basis)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(self.names)})"
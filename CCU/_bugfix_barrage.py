@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:52:06 2026
+
+@author: IGB
+"""
+
+import numpy as np
+import pandas as pd
+from time import perf_counter
+
+__all__ = ('BugfixBarrage',)
+
+
+def iter_systems(system):
+    yield system
+    for i in system.subsystems: yield from iter_systems(i)
+
+
+def _last_exception(exceptions):
+    exceptions = [i for i in exceptions if i]
+    return exceptions[-1] if exceptions else ''
+
+
+class BugfixBarrage:
+    """
+    Model specification that simulates the system and, if that fails, retries
+    after resetting the cache and emptying recycles, and then with the
+    'fixedpoint' and 'aitken' solvers. Solver telemetry of every simulation
+    attempt (the first one and each retry) is appended to `records`; set
+    `sample` to the index of the sample being evaluated to label them (the
+    evaluation drivers in CCU do this).
+
+    If an EconomicFastPath is given, the simulation is skipped when only
+    economic-only parameters changed since the last converged simulation.
+    If a SnapshotStore is given, a snapshot of every converged sample is saved.
+    """
+    solvers = ('fixedpoint', 'aitken')
+    aggregation = {'Wall time [s]': 'sum',
+                   'Simulated': 'max',
+                   'Solver': 'last',
+                   'Iterations': 'sum',
+                   'Recycle loop iterations': 'sum',
+                   'Retries': 'sum',
+                   'Residual [kmol/hr]': 'last',
+                   'Exception': _last_exception}
+
+    def __init__(self, system, fast_path=None, snapshots=None):
+        self.system = system
+        self.fast_path = fast_path
+        self.snapshots = snapshots
+        self.sample = None
+        self.records = []
+
+    def reset_and_reload(self):
+        print('Resetting cache and emptying recycles ...')
+        system = self.system
+        system.reset_cache()
+        system.empty_recycles()
+
+    def reset_and_switch_solver(self, solver_ID):
+        system = self.system
+        system.reset_cache()
+        system.empty_recycles()
+        system.converge_method = solver_ID
+        print(f"Trying {solver_ID} ...")
+
+    def simulate(self, retry=False):
+        """Simulate the system and record the telemetry of the attempt."""
+        exception = None
+        start = perf_counter()
+        try:
+            self.system.simulate()
+        except Exception as e:
+            exception = e
+            raise
+        finally:
+            self.records.append(self._record(perf_counter() - start, retry=retry, exception=exception))
+
+    def run_bugfix_barrage(self):
+        for solver_ID in (None, *self.solvers):
+            if solver_ID is None:
+                self.reset_and_reload()
+            else:
+                self.reset_and_switch_solver(solver_ID)
+            try:
+                self.simulate(retry=True)
+            except Exception as e:
+                print(str(e))
+                self.exception = e
+            else:
+                return
+        print("Bugfix barrage failed.\n")
+        raise self.exception
+
+    def __call__(self):
+        self.exception = None
+        fast_path = self.fast_path
+        if fast_path is not None:
+            start = perf_counter()
+            if fast_path.skip_simulation():
+                self.records.append(self._record(perf_counter() - start, simulated=False))
+                self.save_snapshot()
+                return
+        try:
+            try:
+                self.simulate()
+            except Exception as e:
+                print('Error in model spec: %s'%str(e).lower())
+                self.exception = e
+                self.run_bugfix_barrage()
+        except:
+            if fast_path is not None: fast_path.reset()
+            raise
+        else:
+            if fast_path is not None: fast_path.converged()
+        self.save_snapshot()
+
+    def save_snapshot(self):
+        snapshots = self.snapshots
+        if snapshots is not None and self.sample is not None: snapshots.save(self.sample)
+
+    def _record(self, time, simulated=True, retry=False, exception=None):
+        if not simulated:
+            return {'Sample': self.sample,
+                    'Wall time [s]': time,
+                    'Simulated': False,
+                    'Solver': None,
+                    'Iterations': 0,
+                    'Recycle loop iterations': 0,
+                    'Retries': 0,
+                    'Residual [kmol/hr]': np.nan,
+                    'Exception': ''}
+        system = self.system
+        subsystems = list(iter_systems(system))[1:]
+        return {'Sample': self.sample,
+                'Wall time [s]': time,
+                'Simulated': True,
+                'Solver': system.converge_method,
+                'Iterations': getattr(system, '_iter', 0),
+                'Recycle loop iterations': sum([getattr(i, '_iter', 0) for i in subsystems]),
+                'Retries': int(retry),
+                'Residual [kmol/hr]': max([getattr(i, '_mol_error', np.nan) for i in (system, *subsystems)]),
+                'Exception': '' if exception is None else type(exception).__name__}
+
+    def get_table(self):
+        """
+        Return the telemetry per sample: attempts (retries and retried
+        evaluations of the same sample) are summed, the solver and residual
+        of the last one are kept, and so is the last exception raised.
+        """
+        records = pd.DataFrame([i for i in self.records if i['Sample'] is not None],
+                               columns=list(self.aggregation) + ['Sample'])
+        return records.groupby('Sample').agg(self.aggregation).sort_index()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.system.ID}, {len(self.records)} records)'
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:20:45 2026
+
+@author: IGB
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from scipy.interpolate import griddata
+from ._parallel import get_shards
+from ._warm_start import RecycleWarmStart
+from ._bugfix_barrage import BugfixBarrage, iter_systems
+from ._fast_path import refresh_economics
+
+__all__ = ('get_grid_order', 'evaluate_contour_grid', 'refine_contour_grid',
+           'fill_failed_points', 'compare_sweep_orders', 'save_contour_grid',
+           'load_contour_grid')
+
+# Flags of contour grid points
+SIMULATED = 0 # Converged simulation
+INTERPOLATED = 1 # Skipped by refinement and interpolated
+FAILED = 2 # Failed after retries; interpolated from converged neighbours
+
+
+#%% Worker side
+
+# Systems built by each process, keyed by the factory's representation;
+# a process builds each system only once and reuses it for every shard it receives
+_worker_systems = {}
+
+def _get_worker_system(key, system_factory):
+    try:
+        return _worker_systems[key]
+    except KeyError:
+        _worker_systems[key] = system = system_factory()
+        return system
+
+def _get_iterations(system):
+    return sum([getattr(i, '_iter', 0) for i in iter_systems(system)])
+
+def _evaluate_point(system, x_setter, y_setter, metric, x, y, n_simulations, retry):
+    x_setter(system, x)
+    y_setter(system, y)
+    iterations = 0
+    for i in range(n_simulations):
+        if retry:
+            # Reset recycles and try other solvers on failure, then go back
+            # to the original solver for the next point
+            method = system.converge_method
+            try: BugfixBarrage(system)()
+            finally: system.converge_method = method
+        else:
+            system.simulate()
+        iterations += _get_iterations(system)
+    return metric(system), iterations
+
+def _evaluate_points(key, system_factory, x_setter, y_setter, metric, points,
+                     n_simulations=1, bounds=None, warm_start_streams=None, retry=False,
+                     economic=(False, False)):
+    system = _get_worker_system(key, system_factory)
+    # Every shard starts its own warm start so results do not depend on
+    # which worker picked up which shard
+    warm_start = None if bounds is None else RecycleWarmStart(
+        system, None if warm_start_streams is None else warm_start_streams(system), *bounds
+    )
+    args = (system, x_setter, y_setter, metric)
+    values = []
+    iterations = []
+    converged = None # Process coordinates of the last converged point
+    for x, y in points:
+        process = tuple([i for i, j in zip((x, y), economic) if not j])
+        try:
+            if process == converged:
+                # Only economic-only coordinates changed; reuse the converged flows
+                x_setter(system, x)
+                y_setter(system, y)
+                refresh_economics(system)
+                value, n = metric(system), 0
+            elif warm_start is None:
+                value, n = _evaluate_point(*args, x, y, n_simulations, retry)
+            else:
+                with warm_start.practice((x, y)):
+                    value, n = _evaluate_point(*args, x, y, n_simulations, retry)
+            converged = process
+        except Exception as e:
+            print(f'Failed at ({x:.4g}, {y:.4g}): {e}')
+            value = np.nan
+            n = _get_iterations(system)
+            converged = None
+        values.append(value)
+        iterations.append(n)
+    return values, iterations
+
+
+#%% Parent side
+
+def get_grid_order(nx, ny, order='serpentine'):
+    """
+    Return flat (row-major) indices of an ny x nx grid in evaluation order.
+    'serpentine' walks every other row backwards (boustrophedon), so
+    consecutive points are always neighbours; 'row-major' jumps back to the
+    first column at every row.
+    """
+    index = np.arange(nx * ny).reshape(ny, nx)
+    if order == 'serpentine':
+        index[1::2] = index[1::2, ::-1]
+    elif order != 'row-major':
+        raise ValueError(f"order must be 'serpentine' or 'row-major', not {order!r}")
+    return index.ravel().tolist()
+
+def _evaluate_path(system_factory, x_setter, y_setter, metric, points, bounds,
+                   n_workers=None, shards_per_worker=2, n_simulations=1,
+                   warm_start_streams=None, retry=False, economic=(False, False),
+                   notify=False, executor=None):
+    # Evaluate points (in evaluation order) and return their values and iterations;
+    # shards go to `executor` if given, so that its workers keep their systems
+    values = np.full(len(points), np.nan)
+    iterations = np.zeros(len(points), int)
+    args = (repr(system_factory), system_factory, x_setter, y_setter, metric)
+    kwargs = dict(n_simulations=n_simulations, bounds=bounds,
+                  warm_start_streams=warm_start_streams, retry=retry, economic=economic)
+    if n_workers == 1 and executor is None:
+        values[:], iterations[:] = _evaluate_points(*args, points, **kwargs)
+        return values, iterations
+    if n_workers is None: n_workers = os.cpu_count() or 1
+    if executor is None:
+        with ProcessPoolExecutor(n_workers) as executor:
+            return _evaluate_path(system_factory, x_setter, y_setter, metric, points, bounds,
+                                  n_workers, shards_per_worker, n_simulations,
+                                  warm_start_streams, retry, economic, notify, executor)
+    shards = get_shards(range(len(points)), n_workers * shards_per_worker)
+    futures = {executor.submit(_evaluate_points, *args, [points[i] for i in shard], **kwargs): shard
+               for shard in shards}
+    for count, future in enumerate(as_completed(futures), 1):
+        values[futures[future]], iterations[futures[future]] = future.result()
+        if notify: print(f'[{count}/{len(shards)} shards]')
+    return values, iterations
+
+def evaluate_contour_grid(system_factory, x_setter, y_setter, x_data, y_data, metric,
+                          n_workers=None, shards_per_worker=2, n_simulations=1,
+                          order='serpentine', warm_start=True, warm_start_streams=None,
+                          retry=True, economic=(False, False), file=None, notify=False,
+                          iterations=False):
+    """
+    Evaluate `metric` once at every point of the grid spanned by `x_data` and
+    `y_data` on a process pool, and return the values as an array of shape
+    (len(y_data), len(x_data)), ready for contour plotting. Failed points
+    are NaN (see `fill_failed_points`).
+
+    system_factory : Picklable callable returning the system; each worker
+        calls it once (e.g., `functools.partial(create_system, ID)`).
+    x_setter, y_setter : Picklable callables taking the system and a value.
+    metric : Picklable callable taking the converged system (e.g., the MSP).
+    n_workers : Number of worker processes; defaults to the number of cores.
+        If 1, the grid is evaluated in this process.
+    n_simulations : Number of times the system is simulated per point.
+    order : Evaluation order, see `get_grid_order`; shards are contiguous
+        pieces of it.
+    warm_start : Whether to seed recycles at each point with the converged
+        state of the nearest point computed so far (see `RecycleWarmStart`).
+    warm_start_streams : Picklable callable taking the system and returning
+        the streams to seed; defaults to all recycles.
+    retry : Whether to retry failed simulations with emptied recycles and
+        other solvers (see `BugfixBarrage`).
+    economic : Whether the x and y setters only change prices, incentives,
+        or characterization factors (see `is_economic_statement`). The system
+        is then simulated only when a process coordinate changes, and TEA and
+        LCA are re-evaluated on the converged flows otherwise; if only y is
+        economic, the grid is walked column by column.
+    file : If given, the grid is saved there (see `save_contour_grid`).
+    iterations : Whether to also return the number of solver iterations
+        spent at each point (same shape as the values).
+    """
+    x_data = np.asarray(x_data, float)
+    y_data = np.asarray(y_data, float)
+    points = [(x, y) for y in y_data for x in x_data]
+    if economic[1] and not economic[0]:
+        # Walk columns so that each one is simulated only once
+        path = [(i % y_data.size) * x_data.size + i // y_data.size
+                for i in get_grid_order(y_data.size, x_data.size, order)]
+    else:
+        path = get_grid_order(x_data.size, y_data.size, order)
+    values = np.full(len(points), np.nan)
+    point_iterations = np.zeros(len(points), int)
+    bounds = ((x_data.min(), y_data.min()), (x_data.max(), y_data.max())) if warm_start else None
+    values[path], point_iterations[path] = _evaluate_path(
+        system_factory, x_setter, y_setter, metric, [points[i] for i in path], bounds,
+        n_workers, shards_per_worker, n_simulations, warm_start_streams, retry,
+        economic, notify,
+    )
+    w_data = values.reshape(y_data.size, x_data.size)
+    if file is not None: save_contour_grid(file, x_data, y_data, w_data)
+    if iterations: return w_data, point_iterations.reshape(w_data.shape)
+    return w_data
+
+def _needs_refinement(corners, levels, atol):
+    # Refine cells with failed corners, fast changes, or crossing contour levels
+    if np.isnan(corners).any(): return True
+    lb = corners.min()
+    ub = corners.max()
+    if ub - lb > atol: return True
+    return levels is not None and ((levels > lb) & (levels < ub)).any()
+
+def refine_contour_grid(system_factory, x_setter, y_setter, x_bounds, y_bounds, metric,
+                        levels=None, shape=(5, 5), depth=2, rtol=0.05, n_workers=None,
+                        n_simulations=1, warm_start=True, warm_start_streams=None,
+                        retry=True, economic=(False, False), file=None, notify=False,
+                        executor=None):
+    """
+    Evaluate `metric` over a grid refined quadtree-style and return x_data,
+    y_data, w_data, and flags on the finest grid, with
+    `(shape[i] - 1) * 2**depth + 1` points per axis.
+
+    The coarse grid of the given `shape` is simulated first. Each cell is
+    then split in four (simulating its edge midpoints and center) while its
+    corners change by more than `rtol` times the range of the metric, cross
+    one of the contour `levels`, or include a failed point, up to `depth`
+    times. Points not simulated are interpolated from the simulated ones,
+    and points that still fail after retries are interpolated from their
+    converged neighbours. Flags are 0 for simulated points, 1 for points
+    skipped by refinement, and 2 for failed points.
+
+    executor : ProcessPoolExecutor to evaluate points on. By default, one
+        pool of `n_workers` is created for all levels, so each worker builds
+        the system only once.
+
+    Other arguments are as in `evaluate_contour_grid`.
+    """
+    if executor is None and n_workers != 1:
+        with ProcessPoolExecutor(n_workers or os.cpu_count() or 1) as executor:
+            return refine_contour_grid(system_factory, x_setter, y_setter, x_bounds, y_bounds,
+                                       metric, levels, shape, depth, rtol, n_workers,
+                                       n_simulations, warm_start, warm_start_streams, retry,
+                                       economic, file, notify, executor)
+    nx, ny = shape
+    stride = 2 ** depth
+    x_data = np.linspace(*x_bounds, (nx - 1) * stride + 1)
+    y_data = np.linspace(*y_bounds, (ny - 1) * stride + 1)
+    w_data = np.full((y_data.size, x_data.size), np.nan)
+    simulated = np.zeros(w_data.shape, bool)
+    levels = None if levels is None else np.asarray(levels, float)
+    bounds = ((x_data[0], y_data[0]), (x_data[-1], y_data[-1])) if warm_start else None
+    kwargs = dict(n_workers=n_workers, n_simulations=n_simulations,
+                  warm_start_streams=warm_start_streams, retry=retry, economic=economic,
+                  notify=notify, executor=executor)
+    cells = [(i, j) for i in range(0, y_data.size - 1, stride)
+                    for j in range(0, x_data.size - 1, stride)]
+    new = {(i, j) for i in range(0, y_data.size, stride) for j in range(0, x_data.size, stride)}
+    while True:
+        # Serpentine order over the rows of the finest grid
+        new = sorted(new, key=lambda ij: (ij[0], ij[1] if ij[0] % 2 == 0 else -ij[1]))
+        if new:
+            values, _ = _evaluate_path(system_factory, x_setter, y_setter, metric,
+                                       [(x_data[j], y_data[i]) for i, j in new], bounds, **kwargs)
+            index = tuple(np.array(new).T)
+            w_data[index] = values
+            simulated[index] = True
+        if notify: print(f'[stride {stride}] {simulated.sum()} points simulated')
+        if stride == 1: break
+        finite = w_data[simulated & ~np.isnan(w_data)]
+        atol = rtol * (finite.max() - finite.min()) if finite.size else 0.
+        half = stride // 2
+        refined = [(i, j) for i, j in cells
+                   if _needs_refinement(w_data[[i, i, i + stride, i + stride], [j, j + stride, j, j + stride]],
+                                        levels, atol)]
+        cells = [(i + di, j + dj) for i, j in refined for di in (0, half) for dj in (0, half)]
+        new = {(i + di, j + dj) for i, j in refined for di in (0, half, stride)
+               for dj in (0, half, stride)}
+        new = {ij for ij in new if not simulated[ij]}
+        stride = half
+    w_data, flags = fill_failed_points(x_data, y_data, w_data, simulated)
+    if file is not None: save_contour_grid(file, x_data, y_data, w_data, flags)
+    return x_data, y_data, w_data, flags
+
+def fill_failed_points(x_data, y_data, w_data, simulated=None):
+    """
+    Return a copy of `w_data` with NaN (failed) and not simulated points
+    linearly interpolated from the converged ones (nearest outside their
+    hull), and the flags of every point (see `refine_contour_grid`).
+    """
+    w_data = np.array(w_data, float)
+    if simulated is None: simulated = np.ones(w_data.shape, bool)
+    failed = simulated & np.isnan(w_data)
+    converged = simulated & ~failed
+    flags = np.full(w_data.shape, SIMULATED, np.int8)
+    flags[~simulated] = INTERPOLATED
+    flags[failed] = FAILED
+    missing = ~converged
+    if missing.any() and converged.any():
+        X, Y = np.meshgrid(x_data, y_data)
+        known = np.column_stack([X[converged], Y[converged]])
+        unknown = np.column_stack([X[missing], Y[missing]])
+        # Normalize axes so that triangles are not skewed by their units
+        scale = np.ptp(known, 0)
+        scale[scale == 0] = 1.
+        known = known / scale
+        unknown = unknown / scale
+        try:
+            values = griddata(known, w_data[converged], unknown, method='linear')
+        except Exception: # e.g., converged points all in a line
+            values = np.full(len(unknown), np.nan)
+        nearest = np.isnan(values)
+        if nearest.any():
+            values[nearest] = griddata(known, w_data[converged], unknown[nearest], method='nearest')
+        w_data[missing] = values
+    return w_data, flags
+
+def compare_sweep_orders(system_factory, x_setter, y_setter, x_data, y_data, metric,
+                         n_simulations=1, warm_start_streams=None):
+    """
+    Evaluate the grid in this process in row-major order without warm start
+    and in serpentine order with warm start, and return a report of solver
+    iterations and wall time of each, the iterations saved, and the largest
+    difference in the metric. Each order runs on a new system from
+    `system_factory`, so neither starts from the recycles the other converged.
+    """
+    key = repr(system_factory)
+    report = {}
+    grids = []
+    for name, order, warm_start in (('Row-major', 'row-major', False),
+                                    ('Serpentine, warm start', 'serpentine', True)):
+        _worker_systems[key] = system_factory()
+        start = perf_counter()
+        w_data, iterations = evaluate_contour_grid(
+            system_factory, x_setter, y_setter, x_data, y_data, metric, n_workers=1,
+            n_simulations=n_simulations, order=order, warm_start=warm_start,
+            warm_start_streams=warm_start_streams, iterations=True,
+        )
+        grids.append(w_data)
+        report[name] = {'Iterations': iterations.sum(),
+                        'Wall time [s]': perf_counter() - start,
+                        'Failed points': int(np.isnan(w_data).sum())}
+    del _worker_systems[key]
+    report = pd.DataFrame.from_dict(report, orient='index')
+    naive = report['Iterations'].iloc[0]
+    report['Iterations saved [%]'] = 100 * (naive - report['Iterations']) / naive if naive else 0.
+    report['Max metric difference'] = [0., np.nanmax(np.abs(grids[1] - grids[0]), initial=0)]
+    return report
+
+def save_contour_grid(file, x_data, y_data, w_data, flags=None):
+    """Save a contour grid; flags default to 2 for NaN (failed) points and 0 otherwise."""
+    if flags is None: flags = np.where(np.isnan(w_data), FAILED, SIMULATED).astype(np.int8)
+    np.savez_compressed(file, x_data=x_data, y_data=y_data, w_data=w_data, flags=flags)
+
+def load_contour_grid(file):
+    """Return x_data, y_data, w_data, and flags saved with `save_contour_grid`."""
+    with np.load(file) as data:
+        return data['x_data'], data['y_data'], data['w_data'], data['flags']
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:26:51 2026
+
+@author: IGB
+"""
+
+import ast
+import numpy as np
+from ._metric_cache import SimulationCache
+
+__all__ = ('is_economic_statement', 'refresh_economics', 'EconomicFastPath')
+
+# Attributes that only enter TEA/LCA, never the mass and energy balances:
+# stream prices and PowerUtility.price, stream utility prices, and TEA
+# financials (except operating days/hours, which units may use)
+economic_attributes = {'price', 'ash_disposal_price'}
+process_TEA_attributes = {'operating_days', 'operating_hours'}
+economic_calls = {('lca', 'change_CF')}
+
+
+def _is_economic_target(target):
+    if isinstance(target, ast.Attribute):
+        if target.attr in economic_attributes: return True
+        return (isinstance(target.value, ast.Name) and target.value.id == 'tea'
+                and target.attr not in process_TEA_attributes)
+    return False
+
+def is_economic_statement(statement):
+    """
+    Return whether a parameter statement (as in the distribution table, e.g.,
+    'feedstock.price = x' or "lca.change_CF('GWP_100', 'H2', x)") only
+    changes prices, incentives, TEA financials, or characterization factors,
+    so that the converged flows stay valid.
+    """
+    try:
+        body = ast.parse(statement.strip()).body
+    except SyntaxError:
+        return False
+    if not body: return False
+    for node in body:
+        if isinstance(node, ast.Assign):
+            if not all([_is_economic_target(i) for i in node.targets]): return False
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            f = node.value.func
+            if not (isinstance(f, ast.Attribute) and isinstance(f.value, ast.Name)
+                    and (f.value.id, f.attr) in economic_calls): return False
+        else:
+            return False
+    return True
+
+def refresh_economics(system):
+    """
+    Update a converged system after economic-only changes without simulating:
+    clear the simulation cache of metrics and reload unit operating costs
+    (utility and stream utility prices).
+    """
+    cache = SimulationCache.find(system)
+    if cache is not None: cache.clear()
+    for unit in system.cost_units: unit._load_operation_costs()
+
+
+class EconomicFastPath:
+    """
+    Keeps track of the process parameters (all but the economic-only ones)
+    of a model at the last converged simulation, so that a simulation can be
+    skipped when only economic-only parameters changed; TEA and LCA are
+    then re-evaluated on the cached converged flows. Pass it as `fast_path`
+    to `BugfixBarrage`.
+
+    model : Model whose parameters are tracked.
+    economic : Economic-only parameters (e.g., detected with
+        `is_economic_statement`).
+    """
+
+    def __init__(self, model, economic):
+        economic = set([id(i) for i in economic])
+        self.system = model.system
+        self.process_parameters = [i for i in model.parameters if id(i) not in economic]
+        self.skipped = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the converged state so that the next call simulates."""
+        self.converged_values = None
+
+    def _values(self):
+        values = [i.last_value for i in self.process_parameters]
+        # Parameters never set (e.g., the system was simulated outside the model)
+        if any([i is None for i in values]): return None
+        return np.array(values, dtype=float)
+
+    def skip_simulation(self):
+        """
+        Return True and refresh economics if no process parameter changed
+        since the last converged simulation, otherwise return False.
+        """
+        converged_values = self.converged_values
+        values = self._values()
+        if (converged_values is None or values is None
+            or not np.array_equal(values, converged_values, equal_nan=True)):
+            return False
+        refresh_economics(self.system)
+        self.skipped += 1
+        return True
+
+    def converged(self):
+        """Store the process parameters of the simulation that just converged."""
+        self.converged_values = self._values()
+
+    def __repr__(self):
+        return (f'{type(self).__name__}({self.system.ID}, '
+                f'{len(self.process_parameters)} process parameters, {self.skipped} skipped)')
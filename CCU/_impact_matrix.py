@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:12:44 2026
+
+@author: IGB
+"""
+
+import numpy as np
+
+__all__ = ('get_CF_matrix', 'get_impact_breakdowns')
+
+
+def get_CF_matrix(CFs, IDs, indicators=None):
+    """
+    Return the indicators and their characterization factors as a matrix
+    (indicators x IDs); IDs without a CF for an indicator get 0.
+
+    CFs : Dictionary of indicators and dictionaries of CFs by ID (e.g., `CCU.CFs`).
+    IDs : IDs of the inventory items (materials, complex feeds, electricity, by-products).
+    indicators : Indicators to include; defaults to all in `CFs`.
+    """
+    if indicators is None: indicators = list(CFs)
+    return indicators, np.array([[CFs[i].get(j, 0.) for j in IDs] for i in indicators],
+                                float).reshape(len(indicators), len(IDs))
+
+def get_impact_breakdowns(inventory, CF_matrix):
+    """
+    Return the impact of each inventory item for each indicator as an array
+    (indicators x items, or samples x indicators x items for stacked
+    inventories or CF matrices); totals are the sums over the last axis.
+    """
+    return np.asarray(CF_matrix) * np.asarray(inventory)[..., None, :]
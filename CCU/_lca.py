@@ -5,7 +5,11 @@ Created on Tue Jun 10 09:31:08 2025
 @author: IGB
 """
 
+import numpy as np
 from biorefineries.lca.lca import LCA
+from ._metric_cache import SimulationCache
+from ._impact_matrix import get_CF_matrix, get_impact_breakdowns
+
 
 
 class create_CCU_lca(LCA):
@@ -49,16 +53,33 @@ class create_CCU_lca(LCA):
         
         self.feedstock_ID = feedstock_ID
         self.feedstock_mass_kind = feedstock_mass_kind
+        self._cache = None
+    
+    # Impacts only change with the flows and CFs, so each one is computed once
+    # per system state; change CFs through `change_CF` so that they are recomputed
+    
+    def _get_cache(self):
+        cache = self._cache
+        if cache is None or cache.system is not self.system:
+            self._cache = cache = SimulationCache.for_system(self.system)
+        return cache
+    
+    def _memoize(self, key, f):
+        return self._get_cache().get((self, key), f)
+    
+    def change_CF(self, *args, **kwargs):
+        super().change_CF(*args, **kwargs)
+        self._get_cache().clear()
         
     # 100-year global warming potential (GWP_100)
 
     @property
     def material_GWP(self): 
-        return self.get_material_impact(self.GWP_key)
+        return self._memoize('material_GWP', lambda: self.get_material_impact(self.GWP_key))
 
     @property
     def material_GWP_breakdown(self):
-        return self.get_material_impact_breakdown(self.GWP_key)
+        return self._memoize('material_GWP_breakdown', lambda: self.get_material_impact_breakdown(self.GWP_key))
     
     @property
     def material_GWP_breakdown_fractional(self):
@@ -70,7 +91,7 @@ class create_CCU_lca(LCA):
     
     @property
     def FGHTP_GWP(self):
-        return self.get_complex_feed_impact_by_ID(self.GWP_key, self.feedstock_ID)/ self.functional_quantity_per_h
+        return self._memoize('FGHTP_GWP', lambda: self.get_complex_feed_impact_by_ID(self.GWP_key, self.feedstock_ID)/ self.functional_quantity_per_h)
     
     @property
     def feedstock_GWP(self): 
@@ -78,15 +99,15 @@ class create_CCU_lca(LCA):
     
     @property
     def net_electricity_GWP(self): 
-        return self.get_net_electricity_impact(self.GWP_key)
+        return self._memoize('net_electricity_GWP', lambda: self.get_net_electricity_impact(self.GWP_key))
     
     @property
     def natural_gas_GWP(self):
-        return self.get_natural_gas_impact(self.GWP_key)
+        return self._memoize('natural_gas_GWP', lambda: self.get_natural_gas_impact(self.GWP_key))
     
     @property
     def GWP(self): 
-        return self.get_total_impact(self.GWP_key) - self.GWP_byproduct_credit_total()
+        return self._memoize('GWP', lambda: self.get_total_impact(self.GWP_key) - self.GWP_byproduct_credit_total())
 
     def GWP_by_ID(self, ID):
         if ID in self.complex_feeds.keys(): 
@@ -96,16 +117,99 @@ class create_CCU_lca(LCA):
         else:
             raise ValueError(f'{ID} is not a material or complex_feed with a given impact value in CFs.')
             
+    def GWP_byproduct_credits(self):
+        """Return the GWP credit of each by-product per functional unit."""
+        def get_credits():
+            CFs = self.CFs[self.GWP_key]
+            for i, stream in enumerate(self.by_products):
+                if stream.ID not in CFs:
+                    raise ValueError(f"No GWP factor found for stream '{i}' in CFs for '{self.GWP_key}'.")
+            CF_values = np.array([CFs[i.ID] for i in self.by_products])
+            flows = np.array([i.F_mass for i in self.by_products]) # kg/hr
+            return CF_values * flows / self.functional_quantity_per_h
+        return self._memoize('GWP_byproduct_credits', get_credits)
+    
     def GWP_byproduct_credit(self, index):
         if index >= len(self.by_products):
             raise IndexError(f"Index {index} is out of bounds for by-products list.")
-        stream = self.by_products[index]
-        try:
-            GWP_value = self.CFs[self.GWP_key][stream.ID]
-        except KeyError:
-            raise ValueError(f"No GWP factor found for stream '{index}' in CFs for '{self.GWP_key}'.")
-        credit = GWP_value * stream.get_total_flow('kg/hr') / self.functional_quantity_per_h
-        return credit
+        return self.GWP_byproduct_credits()[index]
     
     def GWP_byproduct_credit_total(self):
-        return sum(self.GWP_byproduct_credit(i) for i in range(len(self.by_products)))
\ No newline at end of file
+        return self.GWP_byproduct_credits().sum() if self.by_products else 0
+    
+    # Multiple indicators: every total impact is linear in the CFs of the
+    # inventory items (materials, complex feeds, electricity, by-products),
+    # with quantities shared by all indicators
+    
+    def get_inventory_quantities(self, IDs):
+        """
+        Return the quantity of each ID per functional unit, as the impact the
+        LCA's own methods give it with a CF of 1: complex feeds by wet or dry
+        mass, 'Electricity' as the net consumption [kWh] (negative if
+        exported), materials as their mass in the feeds, and by-products as
+        negative masses (credits, see `GWP_byproduct_credits`); IDs that are
+        none of these in the system (e.g., other feedstocks) have none.
+        """
+        key = '_quantity'
+        CFs = self.CFs
+        CFs[key] = dict.fromkeys(IDs, 1.)
+        try:
+            functional_quantity = self.functional_quantity_per_h
+            materials = self.get_material_impact_breakdown(key)
+            by_products = {i.ID: i for i in self.by_products}
+            quantities = np.zeros(len(IDs))
+            for n, ID in enumerate(IDs):
+                if ID in self.complex_feeds:
+                    quantities[n] = self.get_complex_feed_impact_by_ID(key, ID) / functional_quantity
+                elif ID == 'Electricity':
+                    quantities[n] = self.get_net_electricity_impact(key)
+                elif ID in by_products:
+                    quantities[n] = -by_products[ID].F_mass / functional_quantity
+                else:
+                    quantities[n] = materials.get(ID, 0.)
+        finally:
+            del CFs[key]
+        return quantities
+    
+    def _get_inventory(self):
+        # IDs with a CF for any indicator
+        IDs = list({i: None for CFs in self.CFs.values() for i in CFs})
+        inventory = self.get_inventory_quantities(IDs)
+        CFs = self.CFs[self.GWP_key]
+        return IDs, inventory, self.GWP - inventory @ np.array([CFs.get(i, 0.) for i in IDs])
+    
+    @property
+    def inventory(self):
+        """
+        Tuple of the IDs with a CF for any indicator, their quantity per
+        functional unit (negative for by-product credits and electricity
+        exports; see `get_inventory_quantities`), and the GWP that does not
+        depend on CFs (direct and end-of-life emissions). Computed once per
+        system state.
+        """
+        return self._memoize('inventory', self._get_inventory)
+    
+    def get_impact_breakdowns(self, CFs=None, indicators=None):
+        """
+        Return the indicators, the inventory IDs, and the impact of each ID per
+        functional unit as an array (indicators x IDs) for a CF table with any
+        number of indicators (defaults to `CFs`). Totals are the sums over IDs;
+        for GWP, add the CF-independent part of `inventory`.
+        """
+        IDs, inventory, offset = self.inventory
+        if CFs is None: CFs = self.CFs
+        known = set(IDs)
+        other_IDs = list({i: None for j in (CFs if indicators is None else indicators)
+                          for i in CFs[j] if i not in known})
+        if other_IDs:
+            IDs = IDs + other_IDs
+            inventory = np.concatenate([inventory, self.get_inventory_quantities(other_IDs)])
+        indicators, CF_matrix = get_CF_matrix(CFs, IDs, indicators)
+        return indicators, IDs, get_impact_breakdowns(inventory, CF_matrix)
+    
+    def get_impacts(self, CFs=None, indicators=None):
+        """Return the total impact of each indicator per functional unit as a dictionary."""
+        IDs, inventory, offset = self.inventory
+        indicators, IDs, breakdowns = self.get_impact_breakdowns(CFs, indicators)
+        totals = breakdowns.sum(-1)
+        return {i: j + (offset if i == self.GWP_key else 0.) for i, j in zip(indicators, totals)}
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:48:52 2026
+
+@author: IGB
+"""
+
+__all__ = ('SimulationCache',)
+
+
+# Caches by system ID (systems have no instance dictionary to keep one in);
+# a cached system is kept alive with its cache
+_caches = {}
+
+
+class SimulationCache:
+    """
+    Memo of quantities computed from a converged system (e.g., MSP, TCI, GWP),
+    so that every metric needing them for the same system state reuses one
+    value. Before each lookup, the cache compares a token of what these
+    quantities read (flows, conditions and prices of feeds and products,
+    and unit costs and utility costs) with the token of its values, and
+    forgets them if anything changed, however the system got there
+    (`simulate`, `run`, a unit simulation or editing a stream). Economic
+    inputs left out of the token (e.g., TEA assumptions or CFs) must be
+    followed by `clear` (see `refresh_economics`).
+
+    Use `SimulationCache.for_system` to share one cache per system.
+    """
+
+    def __init__(self, system):
+        self.system = system
+        self.data = {}
+        self.token = None
+        self.epoch = 0
+        _caches[id(system)] = self
+
+    @classmethod
+    def find(cls, system):
+        """Return the cache of `system`, or None if there is none."""
+        cache = _caches.get(id(system))
+        return cache if cache is not None and cache.system is system else None
+
+    @classmethod
+    def for_system(cls, system):
+        """Return the cache of `system`, creating one if needed."""
+        cache = cls.find(system)
+        return cls(system) if cache is None else cache
+
+    def clear(self):
+        """Forget all values."""
+        self.data.clear()
+        self.token = None
+        self.epoch += 1
+
+    def validate(self):
+        """Forget all values if the system changed since they were computed."""
+        token = _get_token(self.system)
+        if token != self.token:
+            self.clear()
+            self.token = token
+
+    def get(self, key, f):
+        """Return the value stored under `key`, computing it with `f()` if missing."""
+        self.validate()
+        data = self.data
+        try:
+            return data[key]
+        except KeyError:
+            data[key] = value = f()
+            return value
+
+    def memoize(self, f, key=None):
+        """Return a function that computes `f()` at most once per system state."""
+        if key is None: key = f
+        return lambda: self.get(key, f)
+
+    def __reduce__(self):
+        # Values (and memoized closures) are not pickled; the copy of the
+        # system gets an empty cache of its own
+        return type(self).for_system, (self.system,)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.system.ID}, epoch={self.epoch}, {len(self.data)} values)'
+
+
+def _get_flows(stream):
+    data = stream.imol.data
+    rows = data.rows if hasattr(data, 'rows') else (data,)
+    return tuple([tuple(i.dct.items()) for i in rows])
+
+def _get_token(system):
+    return ([(i.phases, i.T, i.P, i.price, _get_flows(i)) for i in system.feeds + system.products],
+            [(tuple(i.installed_costs.values()), i.utility_cost) for i in system.cost_units])
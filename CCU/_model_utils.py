@@ -6,8 +6,23 @@ Created on Mon Nov 24 15:47:12 2025
 """
 
 
+import re
+import numpy as np
 import pandas as pd
 
+__all__ = ('get_metric_index', 'get_metric_column', 'get_significant_params')
+
+
+def get_metric_index(table, name):
+    """Return the column of `table` whose feature is `name`, with or without units."""
+    for column in table.columns:
+        feature = column[1] if isinstance(column, tuple) else column
+        if feature == name or feature.startswith(name + ' ['): return column
+    raise ValueError(f'no metric named {name!r}')
+
+def get_metric_column(table, name):
+    return table[get_metric_index(table, name)]
+
 
 def get_significant_params(rho_df, p_df, 
                            cutoff_p=0.05,
@@ -23,45 +38,47 @@ def get_significant_params(rho_df, p_df,
     indicator_filter: list of substrings to select outputs/indicators by their name
         Example:
             ["Adjusted minimum selling price", "Total gwp100a"]
-        Matching is done on the *second element* if the column is a tuple.
+        Matching is done on the *second element* if the column is a tuple
+        (MultiIndex columns, as returned by `Model.spearman_r`, work directly).
     """
 
-    rows = []
-
-    for param in rho_df.index:              # input parameter (e.g. Ash disposal price)
-        for out in rho_df.columns:          # output indicator (e.g. Adjusted MSP, Total GWP)
-
-            # Resolve output/indicator name (if tuple, use 2nd element)
-            if isinstance(out, tuple):
-                out_name = out[1]
-            else:
-                out_name = out
-
-            # If filtering: keep only selected outputs
-            if indicator_filter is not None:
-                if not any(key in out_name for key in indicator_filter):
-                    continue
-
-            rho = rho_df.loc[param, out]
-            p   = p_df.loc[param, out]
-
-            if pd.isna(rho) or pd.isna(p):
-                continue
-
-            # significant?
-            if (p < cutoff_p) and (abs(rho) >= cutoff_rho):
-                rows.append({
-                    "indicator": param,   # input parameter (what’s on your Excel “indicator” col)
-                    "parameter": out,    # output indicator (Adjusted MSP, Total gwp100a, etc.)
-                    "rho": float(rho),
-                    "p_value": float(p),
-                })
+    rho_values = rho_df.to_numpy(dtype=float)
+    p_values = p_df.reindex(index=rho_df.index, columns=rho_df.columns).to_numpy(dtype=float)
+    columns = rho_df.columns
+
+    # Resolve output/indicator names (if tuple, use 2nd element)
+    if isinstance(columns, pd.MultiIndex):
+        out_names = columns.get_level_values(1)
+    else:
+        out_names = pd.Index([out[1] if isinstance(out, tuple) else out for out in columns])
+
+    # If filtering: keep only selected outputs
+    if indicator_filter is None:
+        selected = np.ones(len(columns), dtype=bool)
+    elif len(indicator_filter):
+        pattern = '|'.join([re.escape(key) for key in indicator_filter])
+        selected = np.asarray(out_names.astype(str).str.contains(pattern, regex=True), dtype=bool)
+    else:
+        selected = np.zeros(len(columns), dtype=bool)
+
+    # significant? (rows = input parameters, columns = outputs, in the order
+    # of a row-major walk through the matrix)
+    with np.errstate(invalid='ignore'):
+        mask = (selected[np.newaxis, :]
+                & ~np.isnan(rho_values) & ~np.isnan(p_values)
+                & (p_values < cutoff_p) & (np.abs(rho_values) >= cutoff_rho))
+    i, j = np.nonzero(mask)
 
     # Nothing significant
-    if not rows:
+    if not i.size:
         return pd.DataFrame(columns=["indicator", "parameter", "rank", "rho", "p_value"])
 
-    sig = pd.DataFrame(rows)
+    sig = pd.DataFrame({
+        "indicator": rho_df.index[i].tolist(),   # input parameter (what’s on your Excel “indicator” col)
+        "parameter": columns[j].tolist(),        # output indicator (Adjusted MSP, Total gwp100a, etc.)
+        "rho": rho_values[i, j],
+        "p_value": p_values[i, j],
+    })
 
     # rank |rho| within each output indicator
     sig["abs_rho"] = sig["rho"].abs()
@@ -81,4 +98,4 @@ def get_significant_params(rho_df, p_df,
     # final column order
     sig = sig[["indicator", "parameter", "rank", "rho", "p_value"]]
 
-    return sig
\ No newline at end of file
+    return sig
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:02:35 2026
+
+@author: IGB
+"""
+
+import numpy as np
+import pandas as pd
+import chaospy as cp
+
+__all__ = ('sample_CFs', 'get_nested_impacts', 'summarize_nested')
+
+
+def sample_CFs(IDs, values, distributions, N, seed=None, rule='L'):
+    """
+    Return N samples of the CFs of the inventory `IDs` (N x IDs). IDs in
+    `distributions` (dictionary of ID to chaospy distribution) are sampled
+    jointly; the others keep their CF in `values` (dictionary of CFs by ID,
+    e.g., `CCU.CFs['GWP_100']`; 0 if missing).
+    """
+    unknown = set(distributions).difference(IDs)
+    if unknown: raise ValueError(f'no inventory for {", ".join(sorted(unknown))}')
+    samples = np.tile(np.array([values.get(i, 0.) for i in IDs], float), (N, 1))
+    sampled = [i for i, ID in enumerate(IDs) if ID in distributions]
+    if sampled:
+        joint = cp.J(*[distributions[IDs[i]] for i in sampled])
+        samples[:, sampled] = joint.sample(size=N, rule=rule, seed=seed).reshape(len(sampled), N).T
+    return samples
+
+def get_nested_impacts(inventories, offsets, CF_samples):
+    """
+    Return the impact of every process sample (rows of `inventories`, with
+    CF-independent `offsets`) at every CF sample (rows of `CF_samples`) as a
+    process x CF array.
+    """
+    return np.asarray(inventories) @ np.asarray(CF_samples).T + np.asarray(offsets)[:, None]
+
+def summarize_nested(impacts, percentiles=(0.05, 0.25, 0.5, 0.75, 0.95), index=None):
+    """
+    Return the two-level uncertainty of a process x CF array of impacts: a
+    table with the mean, standard deviation, and percentiles over CF samples
+    of each process sample, and the shares of the total variance due to
+    process and CF uncertainty (law of total variance). Process samples
+    with NaN impacts (failed simulations) are left out of the shares.
+    """
+    impacts = np.asarray(impacts, float)
+    table = pd.DataFrame({'Mean': impacts.mean(1), 'Std': impacts.std(1)},
+                         index=pd.Index(range(impacts.shape[0]) if index is None else index, name='Sample'))
+    for q, value in zip(percentiles, np.quantile(impacts, percentiles, axis=1)):
+        table[f'{q:.0%}'] = value
+    impacts = impacts[~np.isnan(impacts).any(1)]
+    total = impacts.var()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = pd.Series({'Process': impacts.mean(1).var() / total,
+                            'CF': impacts.var(1).mean() / total})
+    return table, shares
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+@author: IGB
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from biosteam.evaluation._utils import var_indices
+from biosteam.utils import Timer
+
+__all__ = ('get_shards', 'get_baseline_state', 'set_baseline_state',
+           'evaluate_samples', 'evaluate_in_parallel',
+           'evaluate_batch_in_parallel')
+
+
+#%% Worker side
+
+# Models built by each worker process, keyed by the name given by the parent;
+# a worker builds each model only once and reuses it for every shard it receives
+_worker_models = {}
+
+# Converged baseline state of each worker model (see `get_baseline_state`)
+_worker_baselines = {}
+
+def _get_worker_model(key, model_factory):
+    try:
+        return _worker_models[key], _worker_baselines[key]
+    except KeyError:
+        _worker_models[key] = model = model_factory()
+        _worker_baselines[key] = baseline = get_baseline_state(model)
+        return model, baseline
+
+def _evaluate_shard(key, model_factory, index, samples, log=None, part=0,
+                    convergence_model_factory=None):
+    model, baseline = _get_worker_model(key, model_factory)
+    # A new convergence model per shard, so warm starts only draw on samples
+    # of the same shard and not on whatever the worker evaluated before
+    convergence_model = convergence_model_factory(model) if convergence_model_factory else None
+    records = _get_records(model)
+    start = len(records)
+    evaluate_sample = model._evaluate_sample
+    rows = []
+    for i, sample in zip(index, samples):
+        set_baseline_state(baseline)
+        _set_sample(model, i)
+        values = evaluate_sample(sample, convergence_model)
+        if log is not None: log.append(i, sample, values, part)
+        rows.append(values)
+    _set_sample(model, None)
+    shard_records = records[start:]
+    del records[start:]
+    return index, rows, shard_records
+
+
+def _set_sample(model, index):
+    # Label solver telemetry (see BugfixBarrage) with the sample index
+    specification = model.specification
+    if hasattr(specification, 'sample'): specification.sample = index
+
+def _get_records(model):
+    return getattr(model.specification, 'records', [])
+
+
+#%% Baseline state
+
+def get_baseline_state(model):
+    """
+    Converge `model` at its baseline and return the state of all streams of
+    its system, to start each sample from with `set_baseline_state`.
+    """
+    model.metrics_at_baseline()
+    return [(i, i.get_data()) for i in model.system.streams]
+
+def set_baseline_state(baseline):
+    for stream, data in baseline: stream.set_data(data)
+
+
+#%% Parent side
+
+def get_shards(index, n_shards):
+    """
+    Split the evaluation order into `n_shards` contiguous shards so that each
+    worker walks the same neighbouring samples as the serial run.
+    """
+    index = list(index)
+    n_shards = max(1, min(n_shards, len(index)))
+    return [i.tolist() for i in np.array_split(index, n_shards)]
+
+def _save_values(model, values):
+    N_metrics = len(model.metrics)
+    values = [[np.nan] * N_metrics if i is None else i for i in values]
+    model.table[var_indices(model.metrics)] = values
+    return model.table
+
+def _logged_values(model, log):
+    values = [None] * model._samples.shape[0]
+    if log is not None:
+        for i, row in log.completed(model._samples).items(): values[i] = row
+    return values
+
+def evaluate_samples(model, log=None, notify=0, convergence_model=None, baseline=True):
+    """
+    Evaluate the samples loaded in `model` in the serial order and save the
+    metric values to `model.table`, as `model.evaluate` does. If a ResultLog
+    is given, each finished sample is appended to it right away and samples
+    already in the log are skipped.
+
+    baseline : If True, converge the baseline first and start every sample
+        from that state, so that each result depends only on its sample and
+        matches `evaluate_in_parallel` for any number of workers. If False,
+        each sample starts from where the previous one converged, as in
+        `model.evaluate`.
+    """
+    if model._samples is None: raise RuntimeError('must load samples before evaluating')
+    values = _logged_values(model, log)
+    state = get_baseline_state(model) if baseline else None
+    _evaluate_index(model, model._index, values, log, notify, convergence_model, state)
+    return _save_values(model, values)
+
+def _evaluate_index(model, index, values, log=None, notify=0, convergence_model=None,
+                    baseline=None):
+    # Evaluate the samples in `index` that have no values yet, in that order,
+    # each from the `baseline` state if given
+    samples = model._samples
+    evaluate_sample = model._evaluate_sample
+    if notify:
+        timer = Timer()
+        timer.start()
+    count = 0
+    for i in index:
+        if values[i] is not None: continue
+        sample = samples[i]
+        if baseline is not None: set_baseline_state(baseline)
+        _set_sample(model, i)
+        values[i] = evaluate_sample(sample, convergence_model)
+        if log is not None: log.append(i, sample, values[i])
+        count += 1
+        if notify and not count % notify:
+            print(f"[{count}] Elapsed time: {timer.elapsed_time:.0f} sec")
+    _set_sample(model, None)
+    return values
+
+def evaluate_in_parallel(model, model_factory, n_workers=None,
+                         shards_per_worker=4, key=None, log=None, notify=0,
+                         convergence_model_factory=None):
+    """
+    Evaluate the samples loaded in `model` on a process pool and save the
+    metric values to `model.table`, in the same rows as `model.evaluate`.
+
+    model : Model with samples already loaded (`model.load_samples`).
+    model_factory : Picklable callable returning an equivalent Model, e.g.,
+        `functools.partial(create_model, system_name, dist_table)`.
+        Each worker calls it once.
+    n_workers : Number of worker processes; defaults to the number of cores.
+    shards_per_worker : Number of contiguous shards per worker; more shards
+        balance the load better. Each worker converges the baseline once and
+        starts every sample from it, so results do not depend on the number
+        of workers or shards and match `evaluate_samples` with a fresh model.
+    key : Name of the model in the workers; defaults to the system ID.
+    log : ResultLog to append finished samples to (one part file per shard);
+        samples already in the log are skipped.
+    notify : If 1 or greater, print progress after each finished shard.
+    convergence_model_factory : Picklable callable taking the worker's model
+        and returning a new convergence model (e.g., a RecycleWarmStart);
+        it is called once per shard. Warm starts draw on earlier samples of
+        the same shard, so with them results do depend on the shards.
+    """
+    if key is None: key = model.system.ID
+    tables = evaluate_batch_in_parallel(
+        {key: model}, {key: model_factory}, n_workers, shards_per_worker,
+        None if log is None else {key: log}, notify,
+        None if convergence_model_factory is None else {key: convergence_model_factory},
+    )
+    return tables[key]
+
+def evaluate_batch_in_parallel(models, model_factories, n_workers=None,
+                               shards_per_worker=4, logs=None, notify=0,
+                               convergence_model_factories=None):
+    """
+    Evaluate several models (e.g., one per system) on one process pool and
+    save the metric values to the table of each model. Arguments are as in
+    `evaluate_in_parallel`, but given as dictionaries keyed by model name.
+    Return a dictionary of model name to table.
+    """
+    logs = logs or {}
+    convergence_model_factories = convergence_model_factories or {}
+    if n_workers is None: n_workers = os.cpu_count() or 1
+    values = {}
+    jobs = []
+    for key, model in models.items():
+        if model._samples is None: raise RuntimeError(f'must load samples of {key!r} before evaluating')
+        values[key] = model_values = _logged_values(model, logs.get(key))
+        index = [i for i in model._index if model_values[i] is None]
+        if not index: continue
+        for part, shard in enumerate(get_shards(index, n_workers * shards_per_worker)):
+            jobs.append((key, part, shard))
+    N_samples = sum([len(shard) for _, _, shard in jobs])
+    if notify:
+        timer = Timer()
+        timer.start()
+    count = 0
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {executor.submit(_evaluate_shard, key, model_factories[key], shard,
+                                   models[key]._samples[shard], logs.get(key), part,
+                                   convergence_model_factories.get(key)): key
+                   for key, part, shard in jobs}
+        for future in as_completed(futures):
+            key = futures[future]
+            model_values = values[key]
+            index, rows, records = future.result()
+            for i, row in zip(index, rows): model_values[i] = row
+            _get_records(models[key]).extend(records)
+            count += len(index)
+            if notify: print(f"[{count}/{N_samples}] Elapsed time: {timer.elapsed_time:.0f} sec")
+    return {key: _save_values(model, values[key]) for key, model in models.items()}
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:05:37 2026
+
+@author: IGB
+"""
+
+import numpy as np
+import pandas as pd
+from ._fast_path import refresh_economics
+
+__all__ = ('PriceSensitivity',)
+
+
+def _forward_losses(taxable, coefficients):
+    # Vectorized taxable_earnings_with_fowarded_losses over rows, along with
+    # its derivative along the taxable cash flow changes in `coefficients`
+    earnings = taxable.copy()
+    derivative = np.broadcast_to(coefficients, taxable.shape).copy()
+    for i in range(earnings.shape[1] - 1):
+        loss = earnings[:, i] < 0
+        earnings[loss, i + 1] += earnings[loss, i]
+        earnings[loss, i] = 0
+        derivative[loss, i + 1] += derivative[loss, i]
+        derivative[loss, i] = 0
+    loss = earnings[:, -1] < 0
+    earnings[loss, -1] = 0
+    derivative[loss, -1] = 0
+    return earnings, derivative
+
+def _get_sales_coefficients(tea):
+    # Fraction of additional annual sales earned each year (as in tea.solve_sales)
+    coefficients = np.ones(tea._start + tea._years)
+    start = tea._start
+    coefficients[:start] = 0
+    w0 = tea._startup_time
+    coefficients[start] = w0*tea.startup_salesfrac + (1.-w0)
+    return coefficients
+
+def _solve_sales(taxable, nontaxable, incentives, coefficients, income_tax,
+                 discount_factors, ytol=100., maxiter=50):
+    # Additional sales to reach NPV = 0 for each row of cash flows; arguments
+    # broadcast to rows x years (income_tax to rows x 1). Newton's method is
+    # exact on each piece of the piecewise-linear NPV, so a few iterations are
+    # enough; rows that do not converge are NaN
+    income_tax = np.reshape(income_tax, (-1, 1))
+    arrays = [np.atleast_2d(i) for i in (taxable, nontaxable, incentives, discount_factors)]
+    rows = max([len(i) for i in arrays + [income_tax]])
+    taxable, nontaxable, incentives, discount_factors = [np.broadcast_to(i, (rows, i.shape[1])) for i in arrays]
+    income_tax = np.broadcast_to(income_tax, (rows, 1))
+    sales = np.zeros(taxable.shape[0])
+    NPV = np.full_like(sales, np.inf)
+    active = np.ones(sales.size, bool)
+    for i in range(maxiter):
+        T = taxable[active] + sales[active, None] * coefficients
+        earnings, derivative = _forward_losses(T, coefficients)
+        tax = income_tax[active]
+        DF = discount_factors[active]
+        NPV[active] = ((nontaxable[active] + T + incentives[active] - tax * earnings) * DF).sum(1)
+        slope = ((coefficients - tax * derivative) * DF).sum(1)
+        sales[active] -= NPV[active] / slope
+        active[active] = np.abs(NPV[active]) > ytol
+        if not active.any(): break
+    sales[np.abs(NPV) > ytol] = np.nan
+    return sales
+
+
+class PriceSensitivity:
+    """
+    Linear model of the cash flows of a converged system in price-like inputs
+    (stream prices, the power price, carbon credits), which change neither
+    the flows nor the capital costs. Sensitivity vectors of the taxable,
+    nontaxable and incentive cash flows to each input are computed once
+    from one TEA evaluation per input; break-even prices of any batch of
+    input combinations are then solved with array operations only.
+
+    system : Converged system with a TEA whose tax is a flat income tax on
+        earnings with forwarded losses and whose incentives do not depend on
+        earnings (e.g., CellulosicIncentivesTEA).
+    product : Stream whose break-even price is solved; its price should not
+        be one of the inputs.
+    setters : Dictionary of input names and callables taking the system and
+        a value (e.g., the setters of the contour plots).
+    values : Baseline values of the inputs; the system is left at them.
+
+    Examples
+    --------
+    >>> sensitivity = PriceSensitivity(system, ethanol, {'Carbon credit': set_carbon_credit,
+    ...                                                  'Electricity price': set_electricity_price},
+    ...                                [85, 0.03]) # doctest: +SKIP
+    >>> sensitivity.solve_price([[85, 0.03], [130, 0.05]], verify=1) # doctest: +SKIP
+
+    """
+
+    def __init__(self, system, product, setters, values):
+        self.system = system
+        self.tea = tea = system.TEA
+        self.product = product
+        self.names = list(setters)
+        self.setters = list(setters.values())
+        self.values = values = np.asarray(values, float)
+        self.verification = None
+        self._set(values)
+        self._baseline = baseline = self._get_cashflows()
+        self._discount_factors = 1 / (1 + tea.IRR)**tea._get_duration_array()
+        self._sales_coefficients = sales_coefficients = _get_sales_coefficients(tea)
+        self._price2cost = system._price2cost(product)
+        self._price = system.get_market_value(product) / abs(self._price2cost)
+        # One evaluation per input; the cash flows are linear in prices
+        self.sensitivities = sensitivities = np.zeros((3, len(values), sales_coefficients.size))
+        for i, value in enumerate(values):
+            step = abs(value) or 1.
+            x = values.copy()
+            x[i] += step
+            self._set(x)
+            sensitivities[:, i] = (self._get_cashflows() - baseline) / step
+        self._set(values)
+
+    def _set(self, values):
+        system = self.system
+        for f, value in zip(self.setters, values): f(system, value)
+        refresh_economics(system)
+
+    def _get_cashflows(self):
+        tea = self.tea
+        taxable, nontaxable, depreciation = tea._taxable_nontaxable_depreciation_cashflows()
+        tax = np.zeros_like(taxable)
+        incentives = tax.copy()
+        earnings, _ = _forward_losses(taxable[None], 0.)
+        tea._fill_tax_and_incentives(incentives, earnings[0], nontaxable, tax, depreciation)
+        if not np.allclose(tax, tea.income_tax * earnings[0]):
+            raise ValueError('tax must be a flat income tax on earnings with forwarded losses')
+        return np.array([taxable, nontaxable, incentives])
+
+    @property
+    def NPV_sensitivity(self):
+        """Sensitivity of NPV to each input at the baseline [USD per unit input]."""
+        taxable, nontaxable, incentives = self.sensitivities
+        baseline = np.repeat(self._baseline[:1], len(taxable), 0)
+        _, earnings = _forward_losses(baseline, taxable)
+        cashflow = nontaxable + taxable + incentives - self.tea.income_tax * earnings
+        return pd.Series(cashflow @ self._discount_factors, index=self.names)
+
+    def _cashflows(self, X):
+        X = np.atleast_2d(np.asarray(X, float)) - self.values
+        return [i + X @ j for i, j in zip(self._baseline, self.sensitivities)]
+
+    def NPV(self, X):
+        """Return the NPV [USD] at each row of input values in `X`."""
+        taxable, nontaxable, incentives = self._cashflows(X)
+        earnings, _ = _forward_losses(taxable, 0.)
+        cashflow = nontaxable + taxable + incentives - self.tea.income_tax * earnings
+        return cashflow @ self._discount_factors
+
+    def solve_sales(self, X, ytol=100., maxiter=50):
+        """
+        Return the additional sales [USD/yr] to reach the break-even point
+        (NPV = 0) at each row of input values in `X`; rows that do not converge
+        are NaN.
+        """
+        return _solve_sales(*self._cashflows(X), self._sales_coefficients,
+                            self.tea.income_tax, self._discount_factors, ytol, maxiter)
+
+    def solve_price(self, X, verify=0, rtol=1e-3, seed=0):
+        """
+        Return the break-even price [USD/kg] of the product at each row of
+        input values in `X` (as in `tea.solve_price`).
+
+        verify : Number of rows spot-checked against `tea.solve_price`; the
+            checks are in `verification`.
+        """
+        X = np.atleast_2d(np.asarray(X, float))
+        prices = self._price + self.solve_sales(X) / self._price2cost
+        if verify:
+            rng = np.random.default_rng(seed)
+            index = np.sort(rng.choice(X.shape[0], min(verify, X.shape[0]), replace=False))
+            self.verification = self.verify(X[index], prices[index], rtol)
+        return prices
+
+    def verify(self, X, prices, rtol=1e-3):
+        """
+        Compare `prices` with `tea.solve_price` at each row of input values in
+        `X` and return the comparison; raise a RuntimeError if any relative
+        difference exceeds `rtol`.
+        """
+        X = np.atleast_2d(np.asarray(X, float))
+        solved = np.zeros(X.shape[0])
+        try:
+            for i, x in enumerate(X):
+                self._set(x)
+                solved[i] = self.tea.solve_price(self.product)
+        finally:
+            self._set(self.values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            error = np.abs(prices - solved) / np.abs(solved)
+        verification = pd.DataFrame(X, columns=self.names)
+        verification['Linear price'] = prices
+        verification['Solved price'] = solved
+        verification['Relative error'] = error
+        if not (error <= rtol).all():
+            raise RuntimeError(f'linear prices differ from solved prices by up to {np.nanmax(error):.3g}')
+        return verification
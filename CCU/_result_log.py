@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:05:31 2026
+
+@author: IGB
+"""
+
+import os
+import csv
+import numpy as np
+from biosteam.evaluation._utils import var_indices
+
+__all__ = ('ResultLog',)
+
+
+class ResultLog:
+    """
+    Append-only log of Monte Carlo results. Each finished sample is written
+    as one row (sample index, parameter values, metric values) to a CSV part
+    file in `folder` as soon as it is evaluated, so a crashed run can be
+    resumed and the final table rebuilt from disk.
+
+    folder : Directory holding the part files; use one folder per
+        system, seed and number of samples.
+    parameter_names, metric_names : Column names, in the same order as the
+        parameters and metrics of the model.
+    retry_failed : Whether samples logged with all metrics NaN (failed
+        evaluations) are evaluated again when the run is resumed.
+    """
+
+    def __init__(self, folder, parameter_names, metric_names, retry_failed=True):
+        self.folder = folder
+        self.parameter_names = list(parameter_names)
+        self.metric_names = list(metric_names)
+        self.retry_failed = retry_failed
+        os.makedirs(folder, exist_ok=True)
+
+    @classmethod
+    def from_model(cls, folder, model, retry_failed=True):
+        names = lambda variables: [': '.join(i.index) for i in variables]
+        return cls(folder, names(model.parameters), names(model.metrics), retry_failed)
+
+    @property
+    def header(self):
+        return ['Sample'] + self.parameter_names + self.metric_names
+
+    def part_path(self, part=0):
+        return os.path.join(self.folder, f'part_{part}.csv')
+
+    def part_paths(self):
+        return sorted(os.path.join(self.folder, i) for i in os.listdir(self.folder)
+                      if i.startswith('part_') and i.endswith('.csv'))
+
+    def append(self, index, sample, values, part=0):
+        """Write the results of one sample and flush them to disk."""
+        path = self.part_path(part)
+        new = not os.path.exists(path) or not os.path.getsize(path)
+        with open(path, 'a', newline='') as file:
+            if not new and not _ends_with_newline(path): file.write('\n')
+            writer = csv.writer(file)
+            if new: writer.writerow(self.header)
+            writer.writerow([int(index), *[float(i) for i in sample],
+                             *[np.nan if i is None else float(i) for i in values]])
+            file.flush()
+
+    def load(self):
+        """Return sample indices, sample values, and metric values logged so far."""
+        N_parameters = len(self.parameter_names)
+        header = self.header
+        N_columns = len(header)
+        rows = []
+        for path in self.part_paths():
+            with open(path, newline='') as file: lines = file.read().splitlines(True)
+            if not lines: continue
+            # Drop a row left incomplete by an interrupted write
+            if not lines[-1].endswith('\n'): lines.pop()
+            reader = csv.reader(lines)
+            if next(reader, header) != header:
+                raise ValueError(f'layout of {path!r} does not match the model; '
+                                 'use a new log folder')
+            rows.extend([i for i in reader if len(i) == N_columns])
+        if not rows:
+            return (np.zeros(0, int), np.zeros((0, N_parameters)),
+                    np.zeros((0, len(self.metric_names))))
+        data = np.array(rows, dtype=float)
+        # Keep the last entry of samples logged more than once
+        index = data[:, 0].astype(int)
+        _, last = np.unique(index[::-1], return_index=True)
+        data = data[len(index) - 1 - last]
+        return (data[:, 0].astype(int), data[:, 1:N_parameters+1],
+                data[:, N_parameters+1:])
+
+    def completed(self, samples):
+        """
+        Return a dictionary of sample index to logged metric values for the
+        samples already evaluated. Raise a ValueError if the logged sample
+        values do not match `samples` (e.g., the seed or N changed). Logged
+        samples beyond the last row of `samples` are ignored, so a log can
+        be resumed by an extensible design one batch at a time. Failed
+        samples (all metrics NaN) are left out if `retry_failed` is True.
+        """
+        index, logged_samples, values = self.load()
+        included = index < samples.shape[0]
+        if self.retry_failed and values.shape[1]: included &= ~np.isnan(values).all(1)
+        index, logged_samples, values = index[included], logged_samples[included], values[included]
+        if index.size:
+            if not np.allclose(samples[index], logged_samples, equal_nan=True):
+                raise ValueError(f'samples logged in {self.folder!r} do not match '
+                                 'the loaded samples; use a new log folder')
+        return {i: j.tolist() for i, j in zip(index.tolist(), values)}
+
+    def fill_table(self, model):
+        """Save logged metric values to `model.table` and return it."""
+        index, _, values = self.load()
+        table = model.table
+        metric_values = table[var_indices(model.metrics)].to_numpy(dtype=float, copy=True)
+        metric_values[index] = values
+        table[var_indices(model.metrics)] = metric_values
+        return table
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.folder!r})'
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b'\n'
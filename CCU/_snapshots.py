@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:48:03 2026
+
+@author: IGB
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import biosteam as bst
+from ._fast_path import refresh_economics
+from ._impact_matrix import get_CF_matrix, get_impact_breakdowns
+from ._nested_uncertainty import sample_CFs, get_nested_impacts
+
+__all__ = ('SnapshotStore',)
+
+cost_dicts = ('baseline_purchase_costs', 'purchase_costs', 'installed_costs')
+
+
+def _dense(flow):
+    return flow.to_array() if hasattr(flow, 'to_array') else np.array(flow, float)
+
+def _phase_flows(stream):
+    phases = stream.phases
+    if len(phases) == 1: return [_dense(stream.mol)]
+    return [_dense(stream[i].mol) for i in phases]
+
+
+class SnapshotStore:
+    """
+    Store of compact snapshots of converged samples, one compressed npz file
+    per sample in `folder`. A snapshot holds what TEA and LCA metrics read
+    from a converged system: stream flows (by phase), temperatures and
+    pressures, unit power and heat utilities, unit purchase and installed
+    costs, and, if an LCA is given, its GWP inventory. Metrics can then be
+    recomputed for every sample (e.g., after changing CFs or a metric
+    definition) by restoring the snapshots, without simulating.
+
+    folder : Directory holding the snapshots; use one folder per system,
+        seed and number of samples.
+    system : System the snapshots are taken from and restored to.
+    lca : create_CCU_lca object whose inventory is stored for batch impacts
+        (see `get_impacts`).
+
+    Pass it as `snapshots` to `BugfixBarrage` to save every converged sample.
+
+    """
+
+    def __init__(self, folder, system, lca=None):
+        self.folder = folder
+        self.system = system
+        self.lca = lca
+        os.makedirs(folder, exist_ok=True)
+
+    def path(self, index):
+        return os.path.join(self.folder, f'sample_{int(index)}.npz')
+
+    def indices(self):
+        """Return the sorted indices of the samples with a snapshot."""
+        return sorted(int(i[7:-4]) for i in os.listdir(self.folder)
+                      if i.startswith('sample_') and i.endswith('.npz'))
+
+    def take(self, inventory=True):
+        """
+        Return a snapshot of the converged system as a dictionary of arrays;
+        the LCA inventory is included if `inventory` is True and there is an LCA.
+        """
+        system = self.system
+        streams = sorted(system.streams, key=lambda i: i.ID)
+        units = sorted(system.cost_units, key=lambda i: i.ID)
+        flows = [j for i in streams for j in _phase_flows(i)]
+        heat_utilities = [(i, j) for i, unit in enumerate(units) for j in unit.heat_utilities]
+        costs = {}
+        for k, name in enumerate(cost_dicts):
+            for i, unit in enumerate(units):
+                for item, cost in getattr(unit, name).items():
+                    if (i, item) not in costs: costs[i, item] = [np.nan] * len(cost_dicts)
+                    costs[i, item][k] = cost
+        snapshot = dict(
+            streams=np.array([i.ID for i in streams]),
+            phases=np.array([''.join(i.phases) for i in streams]),
+            T=np.array([i.T for i in streams]),
+            P=np.array([i.P for i in streams]),
+            flows=np.concatenate(flows) if flows else np.zeros(0),
+            units=np.array([i.ID for i in units]),
+            power=np.array([(i.power_utility.consumption, i.power_utility.production) for i in units]).reshape(-1, 2),
+            heat_utility_units=np.array([i for i, j in heat_utilities], int),
+            heat_utility_agents=np.array(['' if j.agent is None else j.agent.ID for i, j in heat_utilities]),
+            heat_utilities=np.array([(j.duty, j.flow, j.cost) for i, j in heat_utilities]).reshape(-1, 3),
+            cost_units=np.array([i for i, j in costs], int),
+            cost_items=np.array([j for i, j in costs]),
+            costs=np.array(list(costs.values())).reshape(-1, len(cost_dicts)),
+        )
+        lca = self.lca
+        if inventory and lca is not None:
+            IDs, inventory, offset = lca.inventory
+            snapshot.update(lca_key=np.array(lca.GWP_key), lca_IDs=np.array(IDs),
+                            lca_inventory=inventory, lca_offset=np.array(offset))
+        return snapshot
+
+    def save(self, index, snapshot=None):
+        """Write the snapshot of sample `index` (by default, of the current state)."""
+        if snapshot is None: snapshot = self.take()
+        path = self.path(index)
+        # Written to a temporary file first so an interrupted run never
+        # leaves a truncated snapshot behind
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as file: np.savez_compressed(file, **snapshot)
+        os.replace(temporary, path)
+
+    def load(self, index):
+        """Return the snapshot of sample `index` as a dictionary of arrays."""
+        with np.load(self.path(index)) as data: return dict(data)
+
+    def restore(self, snapshot):
+        """
+        Set the flows, utilities and costs of the system to those of a
+        snapshot (a sample index or a dictionary of arrays) and reload the
+        operating costs; the system is not simulated.
+        """
+        if not isinstance(snapshot, dict): snapshot = self.load(snapshot)
+        system = self.system
+        streams = {i.ID: i for i in system.streams}
+        units = {i.ID: i for i in system.cost_units}
+        try:
+            streams = [streams[i] for i in snapshot['streams']]
+            units = [units[i] for i in snapshot['units']]
+        except KeyError as key:
+            raise ValueError(f'{key} in snapshot is not in {system.ID}') from None
+        flows = snapshot['flows']
+        start = 0
+        for stream, phases, T, P in zip(streams, snapshot['phases'], snapshot['T'], snapshot['P']):
+            phases = str(phases)
+            stream.phases = phases
+            size = len(stream.chemicals)
+            for phase in phases:
+                flow = stream if len(phases) == 1 else stream[phase]
+                flow.mol[:] = flows[start:start + size]
+                start += size
+            stream.T = T
+            stream.P = P
+        for unit, (consumption, production) in zip(units, snapshot['power']):
+            unit.power_utility.consumption = consumption
+            unit.power_utility.production = production
+        counts = np.bincount(snapshot['heat_utility_units'], minlength=len(units))
+        for unit, count in zip(units, counts):
+            heat_utilities = unit.heat_utilities
+            del heat_utilities[count:]
+            heat_utilities.extend([bst.HeatUtility() for i in range(count - len(heat_utilities))])
+        position = np.zeros(len(units), int)
+        for i, agent, (duty, flow, cost) in zip(snapshot['heat_utility_units'],
+                                                snapshot['heat_utility_agents'],
+                                                snapshot['heat_utilities']):
+            heat_utility = units[i].heat_utilities[position[i]]
+            position[i] += 1
+            heat_utility.agent = bst.HeatUtility.get_agent(str(agent)) if agent else None
+            heat_utility.duty = duty
+            heat_utility.flow = flow
+            heat_utility.cost = cost
+        for unit in units:
+            for name in cost_dicts: getattr(unit, name).clear()
+        for i, item, costs in zip(snapshot['cost_units'], snapshot['cost_items'], snapshot['costs']):
+            for name, cost in zip(cost_dicts, costs):
+                if not np.isnan(cost): getattr(units[i], name)[str(item)] = cost
+        # Flows and costs changed, so no cached value holds
+        refresh_economics(system)
+
+    def recompute(self, model, index=None, metrics=None):
+        """
+        Return a table of metric values (samples x metrics) recomputed from
+        the snapshots: for each sample, the parameters are set to the sample
+        values of the model, the snapshot is restored, and the metrics are
+        evaluated. The system is then set back to its state before the call.
+
+        index : Sample indices; defaults to all samples with a snapshot.
+        metrics : Metrics to evaluate; defaults to all metrics of the model.
+        """
+        if index is None: index = self.indices()
+        if metrics is None: metrics = model.metrics
+        samples = model._samples
+        parameters = model.parameters
+        last_values = [i.last_value for i in parameters]
+        current = self.take(inventory=False)
+        values = np.full((len(index), len(metrics)), np.nan)
+        try:
+            for n, i in enumerate(index):
+                for parameter, value in zip(parameters, samples[i]):
+                    parameter.setter(value)
+                    parameter.last_value = value
+                self.restore(i)
+                # As in model evaluation, failed metrics are NaN
+                try: values[n] = [j() for j in metrics]
+                except Exception: pass
+        finally:
+            for parameter, value in zip(parameters, last_values):
+                if value is None: continue
+                parameter.setter(value)
+                parameter.last_value = value
+            self.restore(current)
+        return pd.DataFrame(values, index=pd.Index(index, name='Sample'),
+                            columns=pd.MultiIndex.from_tuples([i.index for i in metrics]))
+
+    def get_inventories(self, index=None):
+        """
+        Return the sample indices, the GWP indicator, the inventory IDs, the
+        inventories (samples x IDs), and the CF-independent GWP of each sample.
+        """
+        if index is None: index = self.indices()
+        key = IDs = None
+        inventories = np.zeros((len(index), 0))
+        offsets = np.zeros(len(index))
+        for n, i in enumerate(index):
+            with np.load(self.path(i)) as data:
+                if 'lca_IDs' not in data:
+                    raise ValueError(f'snapshot of sample {i} has no LCA inventory')
+                if IDs is None:
+                    key = str(data['lca_key'])
+                    IDs = data['lca_IDs'].tolist()
+                    inventories = np.zeros((len(index), len(IDs)))
+                elif data['lca_IDs'].tolist() != IDs:
+                    raise ValueError(f'inventory IDs of sample {i} differ from those of sample {index[0]}')
+                inventories[n] = data['lca_inventory']
+                offsets[n] = data['lca_offset']
+        return list(index), key, IDs or [], inventories, offsets
+
+    def get_impacts(self, CFs, indicators=None, index=None):
+        """
+        Return the total impact of each indicator per functional unit for
+        every sample (samples x indicators) from the stored inventories and
+        a CF table (e.g., `CCU.CFs` after changing some CFs), with array
+        operations only; the CF-independent part is added to GWP.
+        """
+        index, key, IDs, inventories, offsets = self.get_inventories(index)
+        indicators, CF_matrix = get_CF_matrix(CFs, IDs, indicators)
+        totals = get_impact_breakdowns(inventories, CF_matrix).sum(-1)
+        if key in indicators: totals[:, indicators.index(key)] += offsets
+        return pd.DataFrame(totals, index=pd.Index(index, name='Sample'), columns=indicators)
+
+    def get_nested_GWP(self, CFs, distributions, N, seed=None, index=None):
+        """
+        Return the sample indices and the GWP per functional unit of every
+        sample at each of `N` CF samples (samples x N), drawn from
+        `distributions` (dictionary of inventory ID to chaospy distribution)
+        with the other CFs as in the CF table `CFs`; no simulation is needed.
+        """
+        index, key, IDs, inventories, offsets = self.get_inventories(index)
+        CF_samples = sample_CFs(IDs, CFs[key], distributions, N, seed)
+        return index, get_nested_impacts(inventories, offsets, CF_samples)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.folder!r})'
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:41:19 2026
+
+@author: IGB
+"""
+
+import numpy as np
+import pandas as pd
+from itertools import combinations
+from biosteam.evaluation._utils import var_indices
+from ._model_utils import get_metric_index
+
+__all__ = ('PolynomialSurrogate',)
+
+
+def legendre_values(x, order):
+    """Return Legendre polynomials of degree 0 to `order` at `x` (in [-1, 1])."""
+    values = np.empty((order + 1, *x.shape))
+    values[0] = 1.
+    if order: values[1] = x
+    for n in range(1, order):
+        v = values[n + 1]
+        np.multiply(x, values[n], out=v)
+        v *= (2 * n + 1) / (n + 1)
+        if n == 1:
+            v -= 0.5 # P0 is 1
+        else:
+            v -= n / (n + 1) * values[n - 1]
+    return values
+
+def polynomial_terms(N_parameters, order, interactions=True):
+    """
+    Return terms of a total-degree polynomial basis as (parameters, degrees)
+    tuples, with at most two parameters per term.
+    """
+    terms = [((), ())]
+    terms.extend([((i,), (a,)) for a in range(1, order + 1) for i in range(N_parameters)])
+    if interactions:
+        terms.extend([((i, j), (a, b))
+                      for a in range(1, order) for b in range(1, order - a + 1)
+                      for i, j in combinations(range(N_parameters), 2)])
+    return terms
+
+def count_terms(N_parameters, order, interactions=True):
+    """Return the number of terms of the basis given by `polynomial_terms`."""
+    pairs = N_parameters * (N_parameters - 1) // 2
+    return 1 + order * N_parameters + (order * (order - 1) // 2 * pairs if interactions else 0)
+
+def select_basis(N_parameters, N_samples, order=2, interactions=True, oversampling=2.):
+    """
+    Return the richest (order, interactions) basis up to the one given with at
+    least `oversampling` samples per term: interactions are dropped first,
+    then the order is lowered. Raise a ValueError if even linear main
+    effects have too few samples.
+    """
+    for n in range(order, 0, -1):
+        for include in ((True, False) if interactions else (False,)):
+            if count_terms(N_parameters, n, include) * oversampling <= N_samples: return n, include
+    raise ValueError(f'{N_samples} samples are too few for a surrogate of {N_parameters} parameters; '
+                     f'at least {oversampling * (N_parameters + 1):.0f} are needed')
+
+
+class PolynomialSurrogate:
+    """
+    Polynomial chaos emulator fitted by least squares on Monte Carlo results.
+    Parameters are scaled to [-1, 1] by their bounds and expanded in Legendre
+    polynomials up to a total degree of `order`, with main effects and
+    two-parameter interactions. Predictions use matrix products over chunks.
+
+    Build it with `from_model` or `from_samples`, which shrink the basis to
+    the number of samples and refuse surrogates with a poor cross-validated
+    Q2; fitting directly raises a ValueError if there are fewer samples than
+    terms, as the least-squares problem would be underdetermined.
+
+    lower, upper : Parameter bounds (e.g., of the sampled distributions).
+    order : Total degree of the polynomial basis.
+    interactions : Whether to include two-parameter interaction terms.
+    parameter_names, metric_names : Names used for reports.
+    """
+
+    def __init__(self, lower, upper, order=2, interactions=True,
+                 parameter_names=None, metric_names=None):
+        self.lower = np.asarray(lower, float)
+        self.upper = np.asarray(upper, float)
+        self.order = order
+        self.interactions = interactions
+        self.parameter_names = None if parameter_names is None else list(parameter_names)
+        self.metric_names = None if metric_names is None else list(metric_names)
+        self.terms = polynomial_terms(self.lower.size, order, interactions)
+        self.coefficients = None
+        self.cross_validation = None
+
+    @classmethod
+    def from_samples(cls, X, Y, lower=None, upper=None, order=2, interactions=True,
+                     k_folds=5, seed=0, oversampling=2., min_Q2=0.9,
+                     parameter_names=None, metric_names=None):
+        """
+        Fit a surrogate to parameter samples `X` (N x P) and metrics `Y`
+        (N x M), and cross-validate it. The basis is the richest one up to
+        `order` and `interactions` with at least `oversampling` samples per
+        term (see `select_basis`). Raise a ValueError if the cross-validated
+        Q2 of any metric is below `min_Q2` (None to accept any surrogate).
+        Parameter bounds default to the range of `X`.
+        """
+        X = np.asarray(X, float)
+        Y = np.asarray(Y, float).reshape(len(X), -1)
+        N = np.isfinite(Y).all(1).sum()
+        if k_folds: N = N * (k_folds - 1) // k_folds # Training samples of each fold
+        order, interactions = select_basis(X.shape[1], N, order, interactions, oversampling)
+        surrogate = cls(X.min(0) if lower is None else lower, X.max(0) if upper is None else upper,
+                        order, interactions, parameter_names, metric_names)
+        if k_folds:
+            surrogate.cross_validate(X, Y, k_folds, seed)
+            if min_Q2 is not None: surrogate.check_accuracy(min_Q2)
+        return surrogate.fit(X, Y)
+
+    @classmethod
+    def from_model(cls, model, metrics=('Minimum selling price', 'Total GWP100a',
+                                        'Total capital investment'), **kwargs):
+        """
+        Fit a surrogate to the evaluated samples of `model` (in `model.table`)
+        for the given metric names, as in `from_samples`.
+        """
+        table = model.table
+        parameter_indices = var_indices(model.parameters)
+        metric_indices = [get_metric_index(table, i) for i in metrics]
+        X = table[parameter_indices].to_numpy(dtype=float)
+        Y = table[metric_indices].to_numpy(dtype=float)
+        return cls.from_samples(X, Y, parameter_names=[i[1] for i in parameter_indices],
+                                metric_names=[i[1] for i in metric_indices], **kwargs)
+
+    def check_accuracy(self, min_Q2=0.9):
+        """Raise a ValueError if the cross-validated Q2 of any metric is below `min_Q2`."""
+        cross_validation = self.cross_validation
+        if cross_validation is None: raise ValueError('surrogate is not cross-validated')
+        Q2 = cross_validation['Q2']
+        poor = Q2[~(Q2 >= min_Q2)]
+        if poor.size:
+            Q2 = ', '.join([f'{i}: {j:.3g}' for i, j in poor.items()])
+            raise ValueError(f'cross-validated Q2 below {min_Q2} ({Q2}); '
+                             'the surrogate is not accurate enough to use')
+
+    def _scale(self, X):
+        span = self.upper - self.lower
+        slope = 2. / np.where(span == 0, 1., span)
+        x = np.asarray(X, float) * slope
+        x -= 1. + self.lower * slope
+        return x
+
+    def design_matrix(self, X):
+        V = legendre_values(self._scale(X), self.order)
+        columns = [np.ones(V.shape[1])]
+        for parameters, degrees in self.terms[1:]:
+            column = V[degrees[0], :, parameters[0]]
+            if len(parameters) == 2: column = column * V[degrees[1], :, parameters[1]]
+            columns.append(column)
+        return np.column_stack(columns)
+
+    def _least_squares(self, A, Y):
+        N_terms = A.shape[1]
+        coefficients = np.empty((N_terms, Y.shape[1]))
+        finite = np.isfinite(Y)
+        for m in range(Y.shape[1]):
+            rows = finite[:, m]
+            if rows.sum() < N_terms:
+                # lstsq would silently return the minimum-norm solution
+                raise ValueError(f'{rows.sum()} samples are fewer than the {N_terms} terms of the basis; '
+                                 'lower the order or drop interactions')
+            coefficients[:, m] = np.linalg.lstsq(A[rows], Y[rows, m], rcond=None)[0]
+        return coefficients
+
+    def fit(self, X, Y):
+        """Fit coefficients to parameter samples `X` (N x P) and metrics `Y` (N x M)."""
+        Y = np.asarray(Y, float).reshape(len(X), -1)
+        self.coefficients = self._least_squares(self.design_matrix(X), Y)
+        self._compile()
+        return self
+
+    def _compile(self):
+        # Group coefficients by degree so that predictions are matrix products:
+        # main effects V_a @ c_a and interactions V_b^T (V_a @ C_ab) row by row
+        coefficients = self.coefficients
+        P = self.lower.size
+        M = coefficients.shape[1]
+        self._constant = coefficients[0]
+        self._main = main = np.zeros((self.order, P, M))
+        self._pairs = pairs = {}
+        for (parameters, degrees), c in zip(self.terms[1:], coefficients[1:]):
+            if len(parameters) == 1:
+                main[degrees[0] - 1, parameters[0]] = c
+            else:
+                if degrees not in pairs: pairs[degrees] = np.zeros((P, P * M))
+                i, j = parameters
+                pairs[degrees][i, j*M:(j+1)*M] = c
+
+    def cross_validate(self, X, Y, k_folds=5, seed=0):
+        """
+        Return k-fold cross-validated RMSE, normalized RMSE (by the standard
+        deviation), and Q2 of each metric, and store them in `cross_validation`.
+        """
+        X = np.asarray(X, float)
+        Y = np.asarray(Y, float).reshape(len(X), -1)
+        A = self.design_matrix(X)
+        folds = np.array_split(np.random.default_rng(seed).permutation(len(X)), k_folds)
+        predicted = np.full_like(Y, np.nan)
+        for test in folds:
+            train = np.ones(len(X), bool)
+            train[test] = False
+            predicted[test] = A[test] @ self._least_squares(A[train], Y[train])
+        residuals = predicted - Y
+        RMSE = np.sqrt(np.nanmean(residuals ** 2, 0))
+        std = np.nanstd(Y, 0)
+        self.cross_validation = pd.DataFrame(
+            {'RMSE': RMSE, 'Normalized RMSE': RMSE / std, 'Q2': 1 - (RMSE / std) ** 2},
+            index=self.metric_names,
+        )
+        return self.cross_validation
+
+    def predict(self, X, chunksize=5_000):
+        """Return predicted metrics (N x M) for parameter samples `X` (N x P)."""
+        X = np.atleast_2d(np.asarray(X, float))
+        M = self._constant.size
+        Y = np.empty((len(X), M))
+        for start in range(0, len(X), chunksize):
+            stop = start + chunksize
+            V = legendre_values(self._scale(X[start:stop]), self.order)
+            y = self._constant + sum([V[a + 1] @ main for a, main in enumerate(self._main)])
+            for (a, b), C in self._pairs.items():
+                W = (V[a] @ C).reshape(-1, C.shape[0], M)
+                y += np.matmul(V[b][:, None, :], W)[:, 0]
+            Y[start:stop] = y
+        return Y
+
+    def save(self, file):
+        parameters = np.array([i + (-1,) * (2 - len(i)) for i, _ in self.terms])
+        degrees = np.array([i + (0,) * (2 - len(i)) for _, i in self.terms])
+        cross_validation = self.cross_validation
+        np.savez_compressed(
+            file, lower=self.lower, upper=self.upper, order=self.order,
+            interactions=self.interactions, coefficients=self.coefficients,
+            term_parameters=parameters, term_degrees=degrees,
+            parameter_names=np.array(self.parameter_names or [], dtype=str),
+            metric_names=np.array(self.metric_names or [], dtype=str),
+            cross_validation=np.zeros((0, 3)) if cross_validation is None else cross_validation.to_numpy(),
+        )
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file) as data:
+            surrogate = cls(data['lower'], data['upper'], int(data['order']),
+                            bool(data['interactions']),
+                            data['parameter_names'].tolist() or None,
+                            data['metric_names'].tolist() or None)
+            surrogate.coefficients = data['coefficients']
+            cross_validation = data['cross_validation']
+        if cross_validation.size:
+            surrogate.cross_validation = pd.DataFrame(
+                cross_validation, index=surrogate.metric_names,
+                columns=['RMSE', 'Normalized RMSE', 'Q2'],
+            )
+        surrogate._compile()
+        return surrogate
+
+    def __repr__(self):
+        return (f'{type(self).__name__}({self.lower.size} parameters, '
+                f'{len(self.terms)} terms, order={self.order})')
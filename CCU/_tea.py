@@ -6,14 +6,26 @@ Created on Mon Jun  9 09:58:51 2025
 """
 
 
+import biosteam as bst
 from biorefineries.cornstover import CellulosicEthanolTEA as EtOH_TEA
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from ._price_sensitivity import _forward_losses, _get_sales_coefficients, _solve_sales
 
 
 
-__all__ = ('EtOH_TEA', 'CellulosicIncentivesTEA')
+__all__ = ('EtOH_TEA', 'CellulosicIncentivesTEA', 'compare_price_solvers')
 
 #%% Incentive TEA
 class CellulosicIncentivesTEA(EtOH_TEA):
+    #: Financial assumptions that can be varied in NPV_batch and solve_price_batch
+    batch_assumptions = ('IRR', 'income_tax', 'carbon_credit', 'credit_years')
+    
+    #: Whether solve_sales (and thus solve_price) uses the piecewise-linear
+    #: Newton solver, falling back to the root finder only if it fails
+    exact_solve_sales = True
+    
     def __init__(self, *args,
                  carbon_credit=85, # $85/tonne CO2 (45Q)
                  credit_years=12,
@@ -21,31 +33,191 @@ class CellulosicIncentivesTEA(EtOH_TEA):
         super().__init__(*args, **kwargs)
         self.carbon_credit = carbon_credit
         self.credit_years = credit_years
-        
+        self._unit_index = None
+        self._unit_masks = {}
+    
     @property
     def carbon_amount_utilized(self):
-        if "MeOH" not in self.system.flowsheet.stream:
-            return 0.0 
-        else:
-            methanol = self.system.flowsheet.MeOH
-            hours = self.operating_days * 24
-            CO2_utilized = methanol.get_atomic_flow('C') * 32.04 * hours/1000 # in ton/year
-            return CO2_utilized
+        stream = self.system.flowsheet.stream
+        if "MeOH" not in stream: return 0.0
+        hours = self.operating_days * 24
+        return stream.MeOH.get_atomic_flow('C') * 32.04 * hours/1000 # in ton/year
 
     @property
     def annual_credit(self):
         return self.carbon_amount_utilized * self.carbon_credit
     
+    # Capital costs: the installed and purchase costs of all cost units are
+    # read into one vector at each evaluation, and every aggregate (total,
+    # OSBL, unit groups) is a masked sum of it
+    
+    def _get_unit_index(self):
+        cost_units = self.system.cost_units
+        unit_index = self._unit_index
+        if unit_index is None or unit_index[0] is not cost_units:
+            units = list(cost_units)
+            self._unit_index = unit_index = (cost_units, units, {j: i for i, j in enumerate(units)})
+            self._unit_masks.clear()
+        return unit_index
+    
+    def _get_unit_costs(self):
+        cost_units, units, index = self._get_unit_index()
+        return (np.array([i.installed_cost for i in units]),
+                np.array([i.purchase_cost for i in units]))
+    
+    def _get_unit_mask(self, units):
+        # Mask of `units` among the cost units and the units outside them
+        cost_units, _, index = self._get_unit_index()
+        key = id(units)
+        masks = self._unit_masks
+        if key in masks and masks[key][0] is units: return masks[key][1:]
+        mask = np.zeros(len(index), bool)
+        others = []
+        for i in units:
+            if i in index: mask[index[i]] = True
+            else: others.append(i)
+        masks[key] = (units, mask, others)
+        return mask, others
+    
+    def get_installed_cost(self, units):
+        """Return the total installed equipment cost of `units` in million USD."""
+        if isinstance(self.system, bst.AgileSystem): return sum([i.installed_cost for i in units]) / 1e6
+        mask, others = self._get_unit_mask(units)
+        return (self._get_unit_costs()[0][mask].sum() + sum([i.installed_cost for i in others])) / 1e6
+    
+    def get_purchase_cost(self, units):
+        """Return the total equipment purchase cost of `units` in million USD."""
+        if isinstance(self.system, bst.AgileSystem): return sum([i.purchase_cost for i in units]) / 1e6
+        mask, others = self._get_unit_mask(units)
+        return (self._get_unit_costs()[1][mask].sum() + sum([i.purchase_cost for i in others])) / 1e6
+    
+    @property
+    def purchase_cost(self):
+        """Total purchase cost [USD]."""
+        if isinstance(self.system, bst.AgileSystem): return super().purchase_cost
+        return self._get_unit_costs()[1].sum()
+    
+    @property
+    def installed_equipment_cost(self):
+        """Total installed cost [USD]."""
+        system = self.system
+        if isinstance(system, bst.AgileSystem): return super().installed_equipment_cost
+        lang_factor = system.lang_factor
+        installed_cost, purchase_cost = self._get_unit_costs()
+        return purchase_cost.sum() * lang_factor if lang_factor else installed_cost.sum()
+    
+    @property
+    def OSBL_installed_equipment_cost(self):
+        if self.lang_factor or isinstance(self.system, bst.AgileSystem):
+            return super().OSBL_installed_equipment_cost
+        return self.get_installed_cost(self.OSBL_units) * 1e6
+    
     def _fill_tax_and_incentives(self, incentives, taxable_cashflow, nontaxable_cashflow, tax, depreciation):
         super()._fill_tax_and_incentives(incentives, taxable_cashflow, nontaxable_cashflow, tax, depreciation)
-        if self.carbon_amount_utilized is None:
-            return
-        annual_credit = (self.carbon_amount_utilized * self.carbon_credit)
+        # Credits are paid over the first `credit_years` operating years
+        start = self._start
+        incentives[start:start + int(self.credit_years)] += self.annual_credit
+    
+    def _batch_cashflows(self, assumptions):
+        # Cash flows shared by all assumption sets, with incentives, tax rates
+        # and discount factors for each set
+        unsupported = set(assumptions).difference(self.batch_assumptions)
+        if unsupported:
+            raise ValueError(f'cannot batch {", ".join(sorted(unsupported))}; '
+                             f'only {", ".join(self.batch_assumptions)}')
+        values = np.broadcast_arrays(*[np.asarray(assumptions.get(i, getattr(self, i)), float)
+                                       for i in self.batch_assumptions])
+        shape = values[0].shape
+        IRR, income_tax, carbon_credit, credit_years = [i.reshape(-1, 1) for i in values]
+        taxable, nontaxable, depreciation = self._taxable_nontaxable_depreciation_cashflows()
+        tax = np.zeros_like(taxable)
+        incentives = tax.copy()
+        earnings, _ = _forward_losses(taxable[None], 0.)
+        EtOH_TEA._fill_tax_and_incentives(self, incentives, earnings[0], nontaxable, tax, depreciation)
+        if incentives.any() or not np.allclose(tax, self.income_tax * earnings[0]):
+            raise ValueError('batch cash flows require the tax to be a flat income tax on earnings '
+                             'with forwarded losses and no incentives other than the carbon credit')
+        years = np.arange(taxable.size)
+        start = self._start
+        credited = (years >= start) & (years < start + credit_years.astype(int))
+        incentives = credited * (self.carbon_amount_utilized * carbon_credit)
+        discount_factors = 1 / (1 + IRR)**self._get_duration_array()
+        return shape, taxable, nontaxable, incentives, income_tax, discount_factors
+    
+    def NPV_batch(self, **assumptions):
+        """
+        Return the NPV [USD] under each set of financial assumptions given as
+        arrays (broadcast together) of any of `batch_assumptions`; the others
+        keep their current values. The flows and cost and depreciation tables
+        of the converged system are shared by all sets.
+        """
+        shape, taxable, nontaxable, incentives, income_tax, discount_factors = self._batch_cashflows(assumptions)
+        earnings, _ = _forward_losses(taxable[None], 0.)
+        cashflow = nontaxable + taxable + incentives - income_tax * earnings
+        return (cashflow * discount_factors).sum(1).reshape(shape)
+    
+    def solve_price_batch(self, streams, **assumptions):
+        """
+        Return the price [USD/kg] of a stream(s) at the break even point
+        (NPV = 0) under each set of financial assumptions, as in `solve_price`
+        (see `NPV_batch`). Sets that do not converge are NaN.
+        
+        Examples
+        --------
+        >>> tea.solve_price_batch(ethanol, IRR=[[0.08], [0.10], [0.12]],
+        ...                       carbon_credit=[85, 130, 180]) # doctest: +SKIP
+        
+        """
+        if not isinstance(streams, (list, tuple, set)): streams = [streams]
+        system = self.system
+        price2cost = sum([system._price2cost(i) for i in streams])
+        if price2cost == 0.: raise ValueError('cannot solve price of empty streams')
+        shape, *cashflows = self._batch_cashflows(assumptions)
+        taxable, nontaxable, incentives, income_tax, discount_factors = cashflows
+        sales = _solve_sales(taxable, nontaxable, incentives, _get_sales_coefficients(self),
+                             income_tax, discount_factors)
+        current_price = sum([system.get_market_value(i) for i in streams]) / abs(price2cost)
+        return (current_price + sales / price2cost).reshape(shape)
+    
+    def solve_sales(self):
+        """
+        Return the required additional sales [USD] to reach the breakeven 
+        point (NPV = 0) through cash flow analysis. The cash flow table is
+        built once; NPV is linear in sales except at the kinks of the tax on
+        forwarded losses, so Newton's method on the exact slope ends in a few
+        array operations.
         
-        for year in range(len(incentives)):
-            if year < 3:
-                continue
-            
-            project_year = year - 3 + 1
-            if project_year <= self.credit_years:
-                incentives[year]  += annual_credit
+        """
+        if not self.exact_solve_sales: return super().solve_sales()
+        try:
+            shape, *cashflows = self._batch_cashflows({})
+        except ValueError: # Other tax or incentives
+            return super().solve_sales()
+        taxable = cashflows[0]
+        if np.isnan(taxable).any(): return super().solve_sales() # Resimulates
+        sales = _solve_sales(*cashflows[:3], _get_sales_coefficients(self), *cashflows[3:])[0]
+        if np.isnan(sales): return super().solve_sales()
+        self._sales = sales
+        return sales
+
+
+def compare_price_solvers(tea, streams, repeat=10):
+    """
+    Return the break-even price of `streams` and the mean time of
+    `tea.solve_price` with the piecewise-linear Newton solver and with the
+    root finder of biosteam.
+    """
+    results = {}
+    exact = tea.exact_solve_sales
+    try:
+        for name, value in (('Piecewise Newton', True), ('Root finder', False)):
+            tea.exact_solve_sales = value
+            start = perf_counter()
+            for i in range(repeat): price = tea.solve_price(streams)
+            results[name] = {'Price [USD/kg]': price,
+                             'Time [ms]': 1e3 * (perf_counter() - start) / repeat}
+    finally:
+        tea.exact_solve_sales = exact
+    results = pd.DataFrame(results).T
+    results['Speedup'] = results['Time [ms]'].max() / results['Time [ms]']
+    return results
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:02:17 2026
+
+@author: IGB
+"""
+
+import numpy as np
+
+__all__ = ('RecycleWarmStart',)
+
+
+class RecycleWarmStart:
+    """
+    Convergence model for Monte Carlo evaluation that seeds recycle streams
+    with the converged state of the nearest sample finished so far (in
+    normalized parameter space) before the system is simulated. Pass it as
+    `convergence_model` to `Model.evaluate` or `evaluate_samples`.
+
+    system : System to seed.
+    streams : Streams to seed; defaults to all recycles of the system.
+    lower, upper : Parameter bounds used to normalize samples.
+    mask : Boolean mask of the parameters used for the distance.
+    """
+
+    def __init__(self, system, streams=None, lower=None, upper=None, mask=None):
+        self.system = system
+        self.streams = list(system.get_all_recycles() if streams is None else streams)
+        self.lower = None if lower is None else np.asarray(lower, float)
+        span = None if upper is None else np.asarray(upper, float) - self.lower
+        if span is not None: span[span == 0] = 1.
+        self.span = span
+        self.mask = None if mask is None else np.asarray(mask, bool)
+        self.reset()
+
+    @classmethod
+    def from_model(cls, model, streams=None, samples=None):
+        """
+        Create a warm start for `model`, normalizing by the range of `samples`
+        (defaults to the loaded samples). Only coupled parameters are used for
+        the distance if any are defined, as in `Model.load_samples`.
+        """
+        if samples is None: samples = model._samples
+        mask = [i.coupled for i in model.parameters]
+        if not any(mask): mask = None
+        return cls(model.system, streams, samples.min(0), samples.max(0), mask)
+
+    def reset(self):
+        self.points = []
+        self.states = []
+        self.seeded = 0
+
+    def _normalize(self, sample):
+        x = np.asarray(sample, float)
+        if self.lower is not None: x = (x - self.lower) / self.span
+        if self.mask is not None: x = x[self.mask]
+        return x
+
+    def practice(self, sample, predictors=None):
+        self.case_study = sample
+        return self
+
+    def __enter__(self):
+        if self.points:
+            x = self._normalize(self.case_study)
+            nearest = np.abs(np.array(self.points) - x).sum(1).argmin()
+            for stream, data in zip(self.streams, self.states[nearest]): stream.set_data(data)
+            self.seeded += 1
+        return self
+
+    def __exit__(self, type, exception, traceback):
+        sample = self.case_study
+        del self.case_study
+        if exception is None:
+            self.points.append(self._normalize(sample))
+            self.states.append([i.get_data() for i in self.streams])
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.system.ID}, {len(self.points)} converged samples)'
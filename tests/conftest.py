@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:37 2026
+
+@author: IGB
+"""
+import pytest
+import numpy as np
+import biosteam as bst
+from types import SimpleNamespace
+from scipy.optimize import brentq
+from biorefineries.tea.cellulosic_ethanol_tea import create_cellulosic_ethanol_tea
+from CCU import EtOH_TEA, CellulosicIncentivesTEA
+
+# =============================================================================
+# Small biosteam systems
+# =============================================================================
+
+def create_recycle_system(ID='recycle_sys'):
+    bst.main_flowsheet.set_flowsheet(ID)
+    bst.settings.set_thermo(['Water', 'Ethanol'], cache=True)
+    feed = bst.Stream('feed', Water=100., Ethanol=10., units='kmol/hr')
+    recycle = bst.Stream('recycle')
+    M1 = bst.Mixer('M1', ins=(feed, recycle))
+    F1 = bst.Flash('F1', ins=M1-0, outs=('vapor', ''), V=0.5, P=101325)
+    S1 = bst.Splitter('S1', ins=F1-1, outs=(recycle, 'bottoms'), split=0.5)
+    system = bst.System.from_units(ID, [M1, F1, S1])
+    system.set_tolerance(mol=1e-6, rmol=1e-6, maxiter=200)
+    return system
+
+def create_recycle_model():
+    system = create_recycle_system()
+    f = system.flowsheet
+    model = bst.Model(system)
+
+    @model.parameter(bounds=(5., 15.))
+    def set_ethanol(ethanol): f.stream.feed.imol['Ethanol'] = ethanol
+
+    @model.parameter(bounds=(0.2, 0.8))
+    def set_recycle_split(split): f.unit.S1.split[:] = split
+
+    @model.metric(name='Vapor ethanol', units='kmol/hr')
+    def get_vapor_ethanol(): return f.stream.vapor.imol['Ethanol']
+
+    @model.metric(name='Recycle', units='kmol/hr')
+    def get_recycle(): return f.stream.recycle.F_mol
+
+    return model
+
+def create_failing_system(failures):
+    # Each simulation fails while failures[0] is positive, counting it down
+    bst.main_flowsheet.set_flowsheet('failing_sys')
+    bst.settings.set_thermo(['Water', 'Ethanol'], cache=True)
+    feed = bst.Stream('feed', Water=100., Ethanol=10., units='kmol/hr')
+    M1 = bst.Mixer('M1', ins=feed)
+
+    @M1.add_specification(run=True)
+    def fail():
+        if failures[0]:
+            failures[0] -= 1
+            raise RuntimeError('diverged')
+
+    return bst.System.from_units('failing_sys', [M1])
+
+@pytest.fixture
+def recycle_system():
+    return create_recycle_system()
+
+@pytest.fixture
+def recycle_model():
+    return create_recycle_model()
+
+@pytest.fixture
+def failing_system():
+    failures = [0]
+    return create_failing_system(failures), failures
+
+@pytest.fixture
+def recycle_model_factory():
+    # Module-level, so it can be sent to worker processes
+    return create_recycle_model
+
+class StubLCA:
+    """Stand-in for create_CCU_lca with fixed GWPs and inventory."""
+    GWP_key = 'GWP_100'
+
+    def __init__(self, system, by_products=(), credits=(), GWP=1., net_electricity_GWP=0.,
+                 inventory=((), (), 0.)):
+        self.system = system
+        self.by_products = list(by_products)
+        self.credits = np.array(credits, float)
+        self.GWP = GWP
+        self.net_electricity_GWP = net_electricity_GWP
+        IDs, inventory, offset = inventory
+        self.inventory = (list(IDs), np.array(inventory, float), offset)
+
+    def GWP_byproduct_credits(self):
+        return self.credits
+
+@pytest.fixture
+def stub_lca():
+    return StubLCA
+
+# =============================================================================
+# Methanol storage system with the incentive TEA and a reference TEA
+# =============================================================================
+
+class ReferenceTEA(EtOH_TEA):
+    """45Q incentive TEA as first written: everything from biosteam's TEA."""
+
+    def __init__(self, *args, carbon_credit=85, credit_years=12, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.carbon_credit = carbon_credit
+        self.credit_years = credit_years
+
+    @property
+    def carbon_amount_utilized(self):
+        methanol = self.system.flowsheet.stream.MeOH
+        return methanol.get_atomic_flow('C') * 32.04 * self.operating_days * 24 / 1000
+
+    def _fill_tax_and_incentives(self, incentives, taxable_cashflow, nontaxable_cashflow, tax, depreciation):
+        super()._fill_tax_and_incentives(incentives, taxable_cashflow, nontaxable_cashflow, tax, depreciation)
+        annual_credit = self.carbon_amount_utilized * self.carbon_credit
+        for year in range(len(incentives)):
+            if year < 3: continue
+            if year - 2 <= self.credit_years: incentives[year] += annual_credit
+
+def create_methanol_tea(cls, ID):
+    bst.main_flowsheet.set_flowsheet(ID)
+    bst.settings.set_thermo(['Water', 'Methanol'], cache=True)
+    feed = bst.Stream('feed', Methanol=500., Water=10., units='kmol/hr', price=0.25)
+    water = bst.Stream('water', Water=100., units='kmol/hr', price=0.001)
+    T1 = bst.StorageTank('T1', ins=feed, outs='MeOH', tau=24)
+    T2 = bst.StorageTank('T2', ins=water, outs='process_water', tau=24)
+    system = bst.System.from_units(ID, [T1, T2])
+    system.simulate()
+    system.flowsheet.stream.MeOH.price = 0.4
+    return create_cellulosic_ethanol_tea(system, OSBL_units=[T2], cls=cls)
+
+@pytest.fixture
+def methanol_teas():
+    """Incentive TEA and reference TEA of two identical methanol systems."""
+    return (create_methanol_tea(CellulosicIncentivesTEA, 'incentives_sys'),
+            create_methanol_tea(ReferenceTEA, 'reference_sys'))
+
+# =============================================================================
+# Baseline CCU model (cellulosic ethanol with conventional electricity)
+# =============================================================================
+
+@pytest.fixture(scope='session')
+def _EtOH(tmp_path_factory):
+    from CCU.EtOH.models_EtOH_MeOH import create_model, available_systems
+    model = create_model(available_systems[0], snapshot_folder=str(tmp_path_factory.mktemp('snapshots')))
+    baseline = model.metrics_at_baseline()
+    system = model.system
+    lca = model.specification.snapshots.lca
+    return SimpleNamespace(model=model, system=system, tea=system.TEA, lca=lca,
+                           lca_CFs=dict(lca.CFs[lca.GWP_key]),
+                           ethanol=system.flowsheet.stream.ethanol,
+                           baseline=baseline, thermo=bst.settings.thermo,
+                           flowsheet=system.flowsheet)
+
+@pytest.fixture
+def EtOH(_EtOH):
+    """Converged CCU model at its baseline; set back to it after the test."""
+    bst.settings.set_thermo(_EtOH.thermo)
+    bst.main_flowsheet.set_flowsheet(_EtOH.flowsheet)
+    yield _EtOH
+    bst.settings.set_thermo(_EtOH.thermo)
+    bst.main_flowsheet.set_flowsheet(_EtOH.flowsheet)
+    model = _EtOH.model
+    model.specification.fast_path.reset()
+    model.metrics_at_baseline()
+
+# =============================================================================
+# Toy system for contour grids (analytic metrics, no simulation)
+# =============================================================================
+
+class ToySystem:
+    subsystems = ()
+
+    def __init__(self):
+        self.x = self.y = 0.
+        self.simulations = 0
+        self.converge_method = 'wegstein'
+
+    def simulate(self):
+        self.simulations += 1
+
+def set_x(system, x): system.x = x
+
+def set_y(system, y): system.y = y
+
+@pytest.fixture
+def toy():
+    return SimpleNamespace(system=ToySystem, set_x=set_x, set_y=set_y)
+
+# =============================================================================
+# Analytic TEA with a closed-form NPV in prices
+# =============================================================================
+
+class AnalyticTEA:
+    IRR = 0.1
+    income_tax = 0.35
+    startup_salesfrac = 0.5
+    _start = 2
+    _years = 10
+    _startup_time = 0.5
+
+    def __init__(self, system):
+        self.system = system
+        self.carbon_credit = 85.
+
+    def _get_duration_array(self):
+        return np.arange(-2, 10)
+
+    def _taxable_nontaxable_depreciation_cashflows(self):
+        system = self.system
+        sales = system.product_flow * system.product_price
+        C = np.zeros(12)
+        C[2:] = 3e8 * system.power_price + 5e7
+        S = np.zeros(12)
+        S[2] = 0.75 * sales
+        S[3:] = sales
+        D = np.zeros(12)
+        D[2:9] = 4e7
+        C_FC = np.zeros(12)
+        C_FC[:2] = 1.5e8
+        return S - C - D, D - C_FC, D
+
+    def _fill_tax_and_incentives(self, incentives, taxable_cashflow, nontaxable_cashflow, tax, depreciation):
+        tax[:] = self.income_tax * taxable_cashflow
+        incentives[2:8] += 2e5 * self.carbon_credit
+
+    def NPV(self):
+        taxable, nontaxable, depreciation = self._taxable_nontaxable_depreciation_cashflows()
+        earnings = taxable.copy()
+        for i in range(earnings.size - 1):
+            if earnings[i] < 0:
+                earnings[i + 1] += earnings[i]
+                earnings[i] = 0
+        earnings[-1] = max(earnings[-1], 0)
+        tax = np.zeros_like(taxable)
+        incentives = tax.copy()
+        self._fill_tax_and_incentives(incentives, earnings, nontaxable, tax, depreciation)
+        return ((nontaxable + taxable + incentives - tax) / (1 + self.IRR)**self._get_duration_array()).sum()
+
+    def solve_price(self, product):
+        system = self.system
+        price = system.product_price
+        def f(x):
+            system.product_price = x
+            return self.NPV()
+        try: return brentq(f, -100, 100, xtol=1e-12)
+        finally: system.product_price = price
+
+class AnalyticSystem:
+    _specifications = ()
+    cost_units = ()
+    product_flow = 1e8
+    product_price = 1.
+    power_price = 0.05
+
+    def __init__(self):
+        self.TEA = AnalyticTEA(self)
+
+    def _price2cost(self, stream):
+        return self.product_flow
+
+    def get_market_value(self, stream):
+        return self.product_flow * self.product_price
+
+@pytest.fixture
+def analytic_system():
+    return AnalyticSystem()
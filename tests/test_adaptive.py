@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:58:12 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+import chaospy as cp
+
+def test_sobol_sample_is_extensible():
+    distribution = cp.J(cp.Triangle(0, 0.3, 1), cp.Uniform(2, 5))
+    samples = CCU.sobol_sample(distribution, 64, seed=1)
+    batches = np.vstack([CCU.sobol_sample(distribution, 32, seed=1),
+                         CCU.sobol_sample(distribution, 32, start=32, seed=1)])
+    np.testing.assert_array_equal(samples, batches)
+    assert samples.shape == (64, 2)
+    assert (samples[:, 1] > 2).all() and (samples[:, 1] < 5).all()
+
+def test_bootstrap_widths_narrow_with_more_samples():
+    rng = np.random.default_rng(0)
+    widths = []
+    for N in (100, 1600):
+        X = rng.random((N, 3))
+        X[:, 2] = 1. # constant parameter
+        Y = np.column_stack([X[:, 0] + 0.1 * X[:, 1], X[:, 1] - 0.5 * X[:, 0]])
+        Y[0, 1] = np.nan
+        widths.append(CCU.get_bootstrap_widths(X, Y, n_bootstrap=100))
+    (percentiles_small, rho_small), (percentiles_large, rho_large) = widths
+    assert percentiles_small.shape == (3, 2) and rho_small.shape == (3, 2)
+    assert np.isnan(rho_large[2]).all()
+    assert (percentiles_large < percentiles_small).all()
+    assert (rho_large[:2] < rho_small[:2]).all()
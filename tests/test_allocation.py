@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:44:09 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+import pytest
+
+def test_allocation(recycle_system, stub_lca):
+    system = recycle_system
+    system.simulate()
+    s = system.flowsheet.stream
+    vapor, bottoms = s.vapor, s.bottoms
+    vapor.price, bottoms.price = 0.7, 0.3
+    lca = stub_lca(system, by_products=[bottoms, s.feed], credits=[0.3, 0.2])
+    allocation = CCU.GWPAllocation(lca, [vapor, bottoms])
+    assert allocation.names == ['vapor', 'bottoms']
+    # Credits of the allocated products are added back; shares by LHV
+    LHV = np.array([i.get_property('LHV', 'GGE/hr') for i in (vapor, bottoms)])
+    np.testing.assert_allclose(allocation.allocate(), 1.5 * LHV / LHV.sum())
+    mass = np.array([vapor.F_mass, bottoms.F_mass])
+    np.testing.assert_allclose(allocation.get_factors('mass'), mass / mass.sum())
+    value = mass * [0.7, 0.3]
+    np.testing.assert_allclose(allocation.get_factors('economic'), value / value.sum())
+    # Quantities are read once per simulation
+    data = allocation._get_data()
+    assert allocation._get_data() is data
+    system.simulate()
+    assert allocation._get_data() is not data
+    # Hybrid: the feed keeps its displacement credit
+    hybrid = CCU.GWPAllocation(lca, [vapor, bottoms], displaced=[s.feed])
+    np.testing.assert_allclose(hybrid.allocate(2.), 2.3 * LHV / LHV.sum())
+    with pytest.raises(ValueError): allocation.get_factors('exergy')
+
+def test_electricity_allocation_matches_the_CCU_model(EtOH):
+    model, system, lca = EtOH.model, EtOH.system, EtOH.lca
+    metrics = {i.index: i for i in model.metrics}
+    # Energy allocation as first written in the model, from annual GGEs
+    excess = system.get_electricity_production() - system.get_electricity_consumption() # kWh/yr
+    GGE_electricity = 60 * 60 / 120276 * excess
+    GGE_ethanol = EtOH.ethanol.get_property('LHV', 'GGE/hr') * system.operating_hours
+    GWP = lca.GWP - lca.net_electricity_GWP
+    assert GGE_electricity > 0
+    np.testing.assert_allclose(metrics['LCA', 'Total gwp100a - ethanol by allocation [kg-CO2-eq/kg]'](),
+                               GWP * GGE_ethanol / (GGE_electricity + GGE_ethanol), rtol=1e-9)
+    np.testing.assert_allclose(metrics['LCA', 'Total gwp100a - electricity by allocation [kg-CO2-eq/kg]'](),
+                               GWP * GGE_electricity / (GGE_electricity + GGE_ethanol), rtol=1e-9)
+    allocation = CCU.GWPAllocation(lca, [EtOH.ethanol], electricity=True)
+    assert allocation.names == ['ethanol', 'electricity']
+    np.testing.assert_allclose(allocation.get_factors('mass'), [1., 0.])
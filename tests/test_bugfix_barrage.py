@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:20:36 2026
+
+@author: IGB
+"""
+import CCU
+import pytest
+
+def test_telemetry_row_per_retry(failing_system):
+    system, failures = failing_system
+    failures[0] = 2
+    barrage = CCU.BugfixBarrage(system)
+    barrage.sample = 0
+    barrage()
+    # The first attempt and two retries, the last one with fixed point iteration
+    rows = barrage.records
+    assert [i['Retries'] for i in rows] == [0, 1, 1]
+    assert [i['Exception'] for i in rows] == ['RuntimeError', 'RuntimeError', '']
+    assert rows[-1]['Solver'] == 'fixedpoint'
+    barrage.sample = 1
+    barrage()
+    assert len(barrage.records) == 4
+    table = barrage.get_table()
+    assert table['Retries'].tolist() == [2, 0]
+    assert table['Exception'].tolist() == ['RuntimeError', '']
+    assert table['Simulated'].all()
+    # Every attempt fails: one row per retry and the error is raised
+    failures[0] = 10
+    barrage.sample = 2
+    with pytest.raises(RuntimeError): barrage()
+    assert barrage.get_table().loc[2, 'Retries'] == len(barrage.solvers) + 1
+    assert len(barrage.records) == 4 + len(barrage.solvers) + 2
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:44:03 2026
+
+@author: IGB
+"""
+import os
+import CCU
+import numpy as np
+
+def get_metric(system):
+    if system.x == 1 and system.y == 1: raise RuntimeError('failed to converge')
+    return system.x + 10 * system.y
+
+def test_contour_grid_evaluates_each_point_once(toy, tmp_path):
+    x_data = np.linspace(0, 1, 4)
+    y_data = np.linspace(0, 1, 3)
+    file = tmp_path / 'grid.npz'
+    w_data = CCU.evaluate_contour_grid(toy.system, toy.set_x, toy.set_y, x_data, y_data, get_metric,
+                                       n_workers=1, warm_start=False, retry=False, file=file)
+    expected = x_data + 10 * y_data[:, None]
+    expected[-1, -1] = np.nan
+    np.testing.assert_allclose(w_data, expected)
+    x_saved, y_saved, w_saved, flags = CCU.load_contour_grid(file)
+    np.testing.assert_array_equal(x_saved, x_data)
+    np.testing.assert_array_equal(y_saved, y_data)
+    np.testing.assert_array_equal(w_saved, w_data)
+    assert flags[-1, -1] == 2 and flags.sum() == 2
+
+def get_step(system):
+    if system.x == 0.5 and system.y == 0.5: raise RuntimeError('failed to converge')
+    return float(system.x > 0.3 + 0.4 * system.y)
+
+def test_refinement_concentrates_points_at_contour_levels(toy):
+    x_data, y_data, w_data, flags = CCU.refine_contour_grid(
+        toy.system, toy.set_x, toy.set_y, (0, 1), (0, 1), get_step, levels=[0.5],
+        shape=(5, 5), depth=3, n_workers=1, warm_start=False, retry=False,
+    )
+    assert w_data.shape == (33, 33)
+    simulated = flags != 1
+    assert simulated.sum() < w_data.size / 2
+    # Points simulated or interpolated away from the step are exact
+    X, Y = np.meshgrid(x_data, y_data)
+    expected = (X > 0.3 + 0.4 * Y).astype(float)
+    far = np.abs(X - 0.3 - 0.4 * Y) > 0.1
+    np.testing.assert_allclose(w_data[far], expected[far])
+    # The failed point is flagged and filled from its converged neighbours
+    failed = (X == 0.5) & (Y == 0.5)
+    assert (flags[failed] == 2).all() and np.isfinite(w_data).all()
+
+def get_process_ID(system): return float(os.getpid())
+
+def test_refinement_levels_share_one_pool_of_workers(toy):
+    x_data, y_data, w_data, flags = CCU.refine_contour_grid(
+        toy.system, toy.set_x, toy.set_y, (0, 1), (0, 1), get_process_ID,
+        shape=(3, 3), depth=2, n_workers=2, warm_start=False, retry=False,
+    )
+    # Cells whose corners ran on different workers are refined, yet all
+    # levels ran on the same two workers
+    simulated = flags == 0
+    assert simulated.sum() > 9
+    assert len(np.unique(w_data[simulated])) <= 2
+
+def set_feedstock_price(system, price): system.flowsheet.stream.cornstover.price = price
+
+def set_glucose_conversion(system, X): system.flowsheet.unit.R303.cofermentation[0].X = X
+
+def test_contour_grid_matches_simulations_of_a_CCU_system(EtOH):
+    system = EtOH.system
+    ethanol = EtOH.ethanol
+    get_MSP = lambda system: system.TEA.solve_price(ethanol)
+    x_data = np.array([0.08, 0.1])
+    y_data = np.array([0.9, 0.95])
+    # Feedstock price is economic-only, so each row is simulated once
+    w_data = CCU.evaluate_contour_grid(lambda: system, set_feedstock_price, set_glucose_conversion,
+                                       x_data, y_data, get_MSP, n_workers=1, warm_start=False,
+                                       economic=(True, False))
+    expected = np.zeros_like(w_data)
+    for i, y in enumerate(y_data):
+        for j, x in enumerate(x_data):
+            set_feedstock_price(system, x)
+            set_glucose_conversion(system, y)
+            system.simulate()
+            expected[i, j] = get_MSP(system)
+    # Recycles converge from different states, so prices agree to within their tolerance
+    np.testing.assert_allclose(w_data, expected, rtol=2e-3)
+    assert expected[1, 0] < expected[0, 0] < expected[0, 1]
+
+def test_sweep_orders_start_from_new_systems(toy):
+    systems = []
+    
+    def create_system():
+        systems.append(toy.system())
+        return systems[-1]
+    
+    report = CCU.compare_sweep_orders(create_system, toy.set_x, toy.set_y, np.linspace(0, 1, 3),
+                                      np.linspace(0, 1, 2), lambda system: system.x + system.y,
+                                      warm_start_streams=lambda system: [])
+    assert len(systems) == 2
+    assert [i.simulations for i in systems] == [6, 6]
+    assert list(report['Max metric difference']) == [0., 0.]
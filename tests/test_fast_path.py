@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:48:20 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+
+def test_economic_statements():
+    assert CCU.is_economic_statement('feedstock.price = x')
+    assert CCU.is_economic_statement('bst.PowerUtility.price = x')
+    assert CCU.is_economic_statement('tea.carbon_credit = x')
+    assert CCU.is_economic_statement("lca.change_CF('GWP_100', 'H2', x)")
+    assert CCU.is_economic_statement('u.BT.ash_disposal_price = x; s.O2.price = x')
+    assert not CCU.is_economic_statement('tea.operating_days = x')
+    assert not CCU.is_economic_statement('u.R302.glucose_to_ethanol.X = x')
+    assert not CCU.is_economic_statement('u.BT.boiler_efficiency = x')
+    assert not CCU.is_economic_statement('set_GHSV(x)')
+    assert not CCU.is_economic_statement('feedstock.price = ')
+
+def test_fast_path_skips_unchanged_process_parameters(recycle_model):
+    model = recycle_model
+    ethanol, split = model.parameters
+    fast_path = CCU.EconomicFastPath(model, [ethanol])
+    assert fast_path.process_parameters == [split]
+    assert not fast_path.skip_simulation()
+    ethanol.last_value, split.last_value = 10., 0.5
+    fast_path.converged()
+    ethanol.last_value = 12.
+    assert fast_path.skip_simulation()
+    split.last_value = 0.4
+    assert not fast_path.skip_simulation()
+    fast_path.reset()
+    split.last_value = 0.5
+    assert not fast_path.skip_simulation()
+    assert fast_path.skipped == 1
+
+def test_fast_path_metrics_match_full_simulation(EtOH):
+    model = EtOH.model
+    fast_path = model.specification.fast_path
+    names = [i.name for i in model.parameters]
+    sample = model.get_baseline_sample().values.copy()
+    economic = ['Feedstock unit price', 'Electricity unit price (conventional)', 'Feedstock GWP']
+    for name, factor in zip(economic, (1.2, 0.9, 1.1)): sample[names.index(name)] *= factor
+    model(sample) # Converges at the baseline process parameters
+    skipped = fast_path.skipped
+    fast = model(sample)
+    assert fast_path.skipped == skipped + 1
+    fast_path.reset()
+    simulated = model(sample)
+    assert fast_path.skipped == skipped + 1
+    # Simulating again moves the process water recycles slightly (< 0.03%)
+    np.testing.assert_allclose(fast.values, simulated.values, rtol=1e-3, atol=1e-9)
+    # The economic parameters did change the metrics
+    MSP = ('TEA', 'Minimum selling price [$/kg]')
+    GWP = ('LCA', 'Total gwp100a [kg-CO2-eq/kg]')
+    assert fast[MSP] > EtOH.baseline[MSP] and fast[GWP] > EtOH.baseline[GWP]
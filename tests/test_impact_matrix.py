@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:40:02 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+
+def test_impact_breakdowns_of_several_indicators():
+    CFs = {'GWP_100': {'H2': 3.53, 'Electricity': 0.011, 'MeOH': 0.58},
+           'Water': {'H2': 0.02}}
+    IDs = ['H2', 'Electricity', 'MeOH']
+    indicators, CF_matrix = CCU.get_CF_matrix(CFs, IDs)
+    assert indicators == ['GWP_100', 'Water']
+    np.testing.assert_array_equal(CF_matrix, [[3.53, 0.011, 0.58], [0.02, 0, 0]])
+    inventory = np.array([0.1, 2., -0.5])
+    breakdowns = CCU.get_impact_breakdowns(inventory, CF_matrix)
+    np.testing.assert_allclose(breakdowns.sum(-1), [0.353 + 0.022 - 0.29, 0.002])
+    # Stacked CF samples
+    samples = np.stack([CF_matrix, 2 * CF_matrix])
+    np.testing.assert_allclose(CCU.get_impact_breakdowns(inventory, samples)[1], 2 * breakdowns)
+
+def test_inventory_of_a_CCU_system_reproduces_its_impacts(EtOH):
+    lca = EtOH.lca
+    IDs, inventory, offset = lca.inventory
+    CFs = lca.CFs['GWP_100']
+    values = np.array([CFs.get(i, 0.) for i in IDs])
+    np.testing.assert_allclose(inventory @ values + offset, lca.GWP)
+    # Each item matches the LCA's own impact of it, so the offset is only
+    # the GWP the items leave out
+    breakdown = lca.material_GWP_breakdown
+    for ID, quantity, CF in zip(IDs, inventory, values):
+        if ID in breakdown: np.testing.assert_allclose(quantity * CF, breakdown[ID], atol=1e-12)
+    items = lca.material_GWP + lca.FGHTP_GWP + lca.net_electricity_GWP - lca.GWP_byproduct_credit_total()
+    np.testing.assert_allclose(inventory @ values, items, rtol=1e-12)
+    np.testing.assert_allclose(offset, lca.GWP - items, rtol=1e-9, atol=1e-12)
+    # The GWP at other CFs follows from the same inventory
+    changes = {'Electricity': 0.3, 'cornstover': 0.2, 'CSL': 2.}
+    try:
+        for ID, value in changes.items(): lca.change_CF('GWP_100', ID, value)
+        values = np.array([CFs.get(i, 0.) for i in IDs])
+        np.testing.assert_allclose(inventory @ values + offset, lca.GWP, rtol=1e-9)
+    finally:
+        for ID in changes: lca.change_CF('GWP_100', ID, EtOH.lca_CFs[ID])
+    # Other indicators, including IDs without a GWP CF
+    feeds = [i for i in EtOH.system.feeds if i is not EtOH.system.flowsheet.stream.cornstover]
+    water = sum([i.imass['Water'] for i in feeds if 'Water' in i.chemicals])
+    impacts = lca.get_impacts({'GWP_100': CFs, 'Water use': {'Water': 1., 'Electricity': 2., 'Unobtainium': 1.}})
+    np.testing.assert_allclose(impacts['GWP_100'], lca.GWP)
+    expected = (water + 2 * EtOH.system.power_utility.rate) / lca.functional_quantity_per_h
+    np.testing.assert_allclose(impacts['Water use'], expected)
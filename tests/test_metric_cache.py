@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:58:20 2026
+
+@author: IGB
+"""
+import CCU
+import pickle
+import biosteam as bst
+
+def test_cache_follows_the_system_state(recycle_system):
+    system = recycle_system
+    feed = system.flowsheet.stream.feed
+    vapor = system.flowsheet.stream.vapor
+    F1 = system.flowsheet.unit.F1
+    cache = CCU.SimulationCache.for_system(system)
+    assert CCU.SimulationCache.for_system(system) is cache
+    # Simulation semantics are untouched: same class, no specifications
+    assert type(system) is bst.System
+    assert not system.specifications and not system.simulate_after_specifications
+    calls = []
+    
+    @cache.memoize
+    def get_flow():
+        calls.append(None)
+        return vapor.F_mol
+    
+    system.simulate()
+    flow = get_flow()
+    assert get_flow() == flow > 0. and len(calls) == 1
+    # Any change to what the values read forgets them, whatever made it
+    feed.imol['Water'] = 200.
+    assert get_flow() == flow and len(calls) == 2
+    system.run()
+    assert get_flow() > flow and len(calls) == 3
+    flow = get_flow()
+    F1.V = 0.6
+    F1.simulate()
+    assert get_flow() > flow and len(calls) == 4
+    # Economic refreshes clear it without any change to the flows
+    CCU.refresh_economics(system)
+    get_flow()
+    assert len(calls) == 5
+
+def test_cache_does_not_prevent_pickling(methanol_teas):
+    tea, _ = methanol_teas
+    system = tea.system
+    cache = CCU.SimulationCache.for_system(system)
+    assert cache.memoize(lambda: tea.NPV)() == tea.NPV
+    assert tea.carbon_amount_utilized > 0.
+    assert type(system) is bst.System
+    # Memoized closures are left out
+    pickle.dumps(system)
+    pickle.dumps(tea)
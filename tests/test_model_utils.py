@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:20:44 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+import pandas as pd
+
+def test_significant_params_ranks_and_filter():
+    index = pd.MultiIndex.from_tuples([('A', 'Feedstock price'), ('A', 'IRR'), ('B', 'H2 price')])
+    columns = pd.MultiIndex.from_tuples([('TEA', 'Minimum selling price [$/kg]'),
+                                         ('LCA', 'Total gwp100a [kg-CO2-eq/kg]'),
+                                         ('TEA', 'Production rate [10^6 kg/yr]')])
+    rho_df = pd.DataFrame([[0.61234, -0.2, 0.9],
+                           [-0.8, np.nan, 0.9],
+                           [0.61234, 0.5, 0.9]], index=index, columns=columns)
+    p_df = pd.DataFrame([[0.001, 0.01, 0.],
+                         [0.001, 0.01, 0.],
+                         [0.001, 0.2, 0.]], index=index, columns=columns)
+    sig = CCU.get_significant_params(rho_df, p_df, indicator_filter=['Minimum selling price',
+                                                                     'Total gwp100a'])
+    assert list(sig.columns) == ['indicator', 'parameter', 'rank', 'rho', 'p_value']
+    MSP = sig[sig['parameter'] == columns[0]]
+    assert MSP['indicator'].tolist() == [index[1], index[0], index[2]]
+    assert MSP['rank'].tolist() == [1, 2, 2]
+    assert MSP['rho'].tolist() == [-0.8, 0.612, 0.612]
+    # NaN rho and p-values above the cutoff are dropped
+    GWP = sig[sig['parameter'] == columns[1]]
+    assert GWP['indicator'].tolist() == [index[0]]
+    assert columns[2] not in sig['parameter'].tolist()
+
+def test_significant_params_nothing_significant():
+    rho_df = pd.DataFrame([[0.5]], index=['x'], columns=['y'])
+    p_df = pd.DataFrame([[0.5]], index=['x'], columns=['y'])
+    sig = CCU.get_significant_params(rho_df, p_df)
+    assert sig.empty
+    assert list(sig.columns) == ['indicator', 'parameter', 'rank', 'rho', 'p_value']
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:41:06 2026
+
+@author: IGB
+"""
+import warnings
+from numpy.testing import assert_allclose
+
+def test_models_of_several_systems_share_a_process(EtOH):
+    from CCU.EtOH.models_EtOH_MeOH import create_model, available_systems
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        model = create_model(available_systems[1])
+    assert not [i for i in caught if 'replaced' in str(i.message)]
+    assert model.system.flowsheet is not EtOH.system.flowsheet
+    assert EtOH.system.flowsheet.stream.ethanol is EtOH.ethanol
+    # Metrics of the first model still read its own system (to within the
+    # recycle tolerance, as the baseline is simulated again)
+    model.metrics_at_baseline()
+    assert_allclose(EtOH.model.metrics_at_baseline(), EtOH.baseline, rtol=2e-3)
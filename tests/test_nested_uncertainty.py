@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:15:40 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+import chaospy as cp
+import pytest
+
+def test_nested_CF_sampling():
+    IDs = ['H2', 'MeOH', 'Electricity']
+    values = {'H2': 3.53, 'MeOH': 0.58, 'Electricity': 0.011}
+    distributions = {'H2': cp.Triangle(0., 0.6, 1.), 'Electricity': cp.Uniform(0.01, 0.02)}
+    CF_samples = CCU.sample_CFs(IDs, values, distributions, 500, seed=3221)
+    assert CF_samples.shape == (500, 3)
+    assert (CF_samples[:, 1] == 0.58).all()
+    assert ((CF_samples[:, 0] >= 0) & (CF_samples[:, 0] <= 1)).all()
+    np.testing.assert_allclose(CF_samples, CCU.sample_CFs(IDs, values, distributions, 500, seed=3221))
+    with pytest.raises(ValueError): CCU.sample_CFs(IDs, values, {'O2': cp.Uniform(0, 1)}, 10)
+    # One matrix product over process and CF samples
+    inventories = np.array([[0.2, -1., 3.], [0.3, -0.8, 2.], [0.25, -1.2, 4.]])
+    offsets = np.array([0.5, 0.4, 0.6])
+    GWP = CCU.get_nested_impacts(inventories, offsets, CF_samples)
+    assert GWP.shape == (3, 500)
+    np.testing.assert_allclose(GWP[1, 7], inventories[1] @ CF_samples[7] + offsets[1])
+    table, shares = CCU.summarize_nested(GWP, index=[4, 8, 9])
+    assert list(table.index) == [4, 8, 9]
+    np.testing.assert_allclose(table['Mean'], GWP.mean(1))
+    np.testing.assert_allclose(shares.sum(), 1.)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:05:13 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+from functools import partial
+from numpy.testing import assert_allclose
+
+def test_parallel_matches_serial_evaluation(recycle_model, recycle_model_factory):
+    model = recycle_model
+    samples = np.random.default_rng(3221).uniform([5., 0.2], [15., 0.8], (12, 2))
+    model.load_samples(samples)
+    serial = CCU.evaluate_samples(model).copy()
+    assert not serial.isna().any().any()
+    # Every sample starts from the same converged baseline, so neither the
+    # number of workers nor the shard boundaries change the results
+    for n_workers, shards_per_worker in [(1, 1), (2, 2), (3, 1), (3, 3)]:
+        model.load_samples(samples)
+        parallel = CCU.evaluate_in_parallel(model, recycle_model_factory, n_workers=n_workers,
+                                            shards_per_worker=shards_per_worker)
+        assert_allclose(parallel.values, serial.values, rtol=0, atol=0)
+
+def create_warm_start(model, samples):
+    return CCU.RecycleWarmStart.from_model(model, samples=samples)
+
+def test_parallel_warm_start_is_reproducible(recycle_model, recycle_model_factory):
+    model = recycle_model
+    samples = np.random.default_rng(3221).uniform([5., 0.2], [15., 0.8], (12, 2))
+    model.load_samples(samples)
+    factory = partial(create_warm_start, samples=samples)
+    tables = []
+    for run in range(2):
+        model.load_samples(samples)
+        table = CCU.evaluate_in_parallel(model, recycle_model_factory, n_workers=2, shards_per_worker=3,
+                                         convergence_model_factory=factory)
+        tables.append(table.copy())
+    # Warm starts only use samples of the same shard, whatever the scheduling
+    assert_allclose(tables[0].values, tables[1].values, rtol=0, atol=0)
+    model.load_samples(samples)
+    serial = CCU.evaluate_samples(model, convergence_model=factory(model))
+    assert_allclose(tables[0].values, serial.values, rtol=1e-4)
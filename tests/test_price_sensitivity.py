@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:31:16 2026
+
+@author: IGB
+"""
+import CCU
+import biosteam as bst
+import numpy as np
+
+def set_power_price(system, price): system.power_price = price
+
+def set_carbon_credit(system, credit): system.TEA.carbon_credit = credit
+
+def test_linear_prices_match_solved_prices(analytic_system):
+    system = analytic_system
+    sensitivity = CCU.PriceSensitivity(system, None, {'Power price': set_power_price,
+                                                      'Carbon credit': set_carbon_credit},
+                                       [0.05, 85])
+    X = np.array([[0.05, 85], [0., 200], [0.2, 0.], [0.5, 130]])
+    prices = sensitivity.solve_price(X, verify=2)
+    assert sensitivity.verification.shape[0] == 2
+    table = sensitivity.verify(X, prices, rtol=1e-6)
+    np.testing.assert_allclose(table['Relative error'], 0, atol=1e-6)
+    assert (system.power_price, system.TEA.carbon_credit) == (0.05, 85)
+    # NPV sensitivities are the slopes of the NPV at the baseline
+    NPV = system.TEA.NPV()
+    set_power_price(system, 0.051)
+    slope = (system.TEA.NPV() - NPV) / 0.001
+    set_power_price(system, 0.05)
+    np.testing.assert_allclose(sensitivity.NPV_sensitivity['Power price'], slope, rtol=1e-6)
+    np.testing.assert_allclose(sensitivity.NPV([0.05, 85]), NPV)
+
+def set_feedstock_price(system, price): system.flowsheet.stream.cornstover.price = price
+
+def set_electricity_price(system, price): bst.PowerUtility.price = price
+
+def test_linear_prices_match_solved_prices_of_a_CCU_system(EtOH):
+    system = EtOH.system
+    values = [system.flowsheet.stream.cornstover.price, bst.PowerUtility.price]
+    sensitivity = CCU.PriceSensitivity(system, EtOH.ethanol, {'Feedstock price': set_feedstock_price,
+                                                              'Electricity price': set_electricity_price},
+                                       values)
+    X = np.array([values, [0.07, 0.03], [0.11, 0.12], [0.09, 0.]])
+    prices = sensitivity.solve_price(X)
+    # Checked against the TEA at every point (raises if off by more than 0.1%)
+    table = sensitivity.verify(X, prices)
+    assert table['Relative error'].max() < 1e-3
+    np.testing.assert_allclose(prices[0], EtOH.tea.solve_price(EtOH.ethanol), rtol=1e-6)
+    assert prices[1] < prices[0] < prices[2]
+    assert [system.flowsheet.stream.cornstover.price, bst.PowerUtility.price] == values
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:31:47 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+import pytest
+
+def test_resume_after_truncated_part_file(tmp_path):
+    samples = np.array([[1., 2.], [3., 4.], [5., 6.], [7., 8.]])
+    log = CCU.ResultLog(tmp_path, ['a', 'b'], ['x', 'y'])
+    log.append(0, samples[0], [10., 20.])
+    log.append(1, samples[1], [None, None]) # Failed
+    log.append(2, samples[2], [30., 40.], part=1)
+    # Interrupted while writing sample 3
+    with open(log.part_path(1), 'a') as file: file.write('3,7.0,8.0,50.')
+    completed = log.completed(samples)
+    assert completed == {0: [10., 20.], 2: [30., 40.]}
+    # Failed samples are kept as done if asked
+    kept = CCU.ResultLog(tmp_path, ['a', 'b'], ['x', 'y'], retry_failed=False)
+    assert sorted(kept.completed(samples)) == [0, 1, 2]
+    # Resuming repairs the partial row and the last entry of a sample wins
+    log.append(3, samples[3], [50., 60.], part=1)
+    log.append(1, samples[1], [70., 80.])
+    completed = log.completed(samples)
+    assert completed[1] == [70., 80.] and completed[3] == [50., 60.]
+    index, logged_samples, values = log.load()
+    assert index.tolist() == [0, 1, 2, 3]
+    np.testing.assert_allclose(logged_samples, samples)
+    with pytest.raises(ValueError): log.completed(samples + 1.)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:06:12 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+
+def test_snapshots_restore_and_recompute(recycle_model, stub_lca, tmp_path):
+    model = recycle_model
+    system = model.system
+    s = system.flowsheet.stream
+    F1 = system.flowsheet.unit.F1
+    
+    @model.parameter(bounds=(0.5, 2.))
+    def set_vapor_price(price): s.vapor.price = price
+    
+    sales = lambda: s.vapor.F_mass * s.vapor.price
+    sales.index = ('TEA', 'Sales')
+    lca = stub_lca(system, inventory=(['H2', 'Electricity'], [0.2, -1.], 0.5))
+    store = CCU.SnapshotStore(str(tmp_path), system, lca)
+    samples = np.array([[6., 0.5, 1.], [12., 0.3, 2.]])
+    states = []
+    for i, sample in enumerate(samples):
+        model(sample)
+        states.append((s.vapor.F_mass, s.recycle.F_mol, F1.installed_cost, F1.Hnet))
+        store.save(i)
+    assert store.indices() == [0, 1]
+    store.restore(0)
+    assert (s.vapor.F_mass, s.recycle.F_mol, F1.installed_cost, F1.Hnet) == states[0]
+    # Metrics are recomputed from the snapshots at the sample parameters
+    model.load_samples(samples, sort=False)
+    table = store.recompute(model, metrics=[*model.metrics, sales])
+    np.testing.assert_allclose(table[('TEA', 'Sales')], [states[0][0], 2 * states[1][0]])
+    np.testing.assert_allclose(table.iloc[:, 1], [states[0][1], states[1][1]])
+    assert (s.vapor.F_mass, s.recycle.F_mol, F1.installed_cost, F1.Hnet) == states[0]
+    assert s.vapor.price == 2.
+    # Impacts of any CF table from the stored inventories
+    impacts = store.get_impacts({'GWP_100': {'H2': 10., 'Electricity': 0.4},
+                                 'Water': {'Electricity': 2.}})
+    np.testing.assert_allclose(impacts['GWP_100'], 0.5 + 2. - 0.4)
+    np.testing.assert_allclose(impacts['Water'], -2.)
+
+def test_snapshots_recompute_the_metrics_of_a_CCU_model(EtOH):
+    model = EtOH.model
+    store = model.specification.snapshots
+    names = [i.name for i in model.parameters]
+    samples = np.tile(model.get_baseline_sample().values, (3, 1))
+    samples[:, names.index('Co-fermentation glucose-to-ethanol')] = [0.9, 0.95, 0.97]
+    samples[:, names.index('Feedstock unit price')] = [0.08, 0.1, 0.09]
+    model.load_samples(samples, sort=False)
+    table = CCU.evaluate_samples(model).copy()
+    assert store.indices() == [0, 1, 2]
+    recomputed = store.recompute(model)
+    assert np.isfinite(recomputed.values).all()
+    # The metrics of every sample, recomputed without simulating
+    np.testing.assert_allclose(recomputed.values, table.values[:, len(names):], rtol=1e-9, atol=1e-12)
+    MSP = recomputed[('TEA', 'Minimum selling price [$/kg]')]
+    assert MSP[2] < MSP[1]
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:02:37 2026
+
+@author: IGB
+"""
+import CCU
+import numpy as np
+import pytest
+
+def test_polynomial_surrogate_fit_predict_and_reload(tmp_path):
+    rng = np.random.default_rng(0)
+    lower = np.array([0., 1., -2., 5.])
+    upper = np.array([1., 3., 2., 5.]) # constant parameter
+    X = lower + (upper - lower) * rng.random((300, 4))
+    Y = np.column_stack([1 + X[:, 0]**2 - 3 * X[:, 1] * X[:, 2], X[:, 2]])
+    Y[0, 0] = np.nan
+    surrogate = CCU.PolynomialSurrogate(lower, upper, metric_names=['a', 'b'])
+    CV = surrogate.cross_validate(X, Y)
+    assert (CV['Q2'] > 0.999).all()
+    surrogate.fit(X, Y)
+    X_new = lower + (upper - lower) * rng.random((50, 4))
+    Y_new = np.column_stack([1 + X_new[:, 0]**2 - 3 * X_new[:, 1] * X_new[:, 2], X_new[:, 2]])
+    np.testing.assert_allclose(surrogate.predict(X_new, chunksize=7), Y_new, atol=1e-9)
+    np.testing.assert_allclose(surrogate.predict(X_new),
+                               surrogate.design_matrix(X_new) @ surrogate.coefficients, atol=1e-9)
+    file = tmp_path / 'surrogate.npz'
+    surrogate.save(file)
+    loaded = CCU.PolynomialSurrogate.load(file)
+    np.testing.assert_array_equal(loaded.predict(X_new), surrogate.predict(X_new))
+    assert loaded.metric_names == ['a', 'b']
+    assert loaded.cross_validation.equals(CV)
+
+def test_surrogate_basis_and_accuracy_with_many_parameters():
+    # As in the Monte Carlo runs: 57 parameters and 1000 samples
+    rng = np.random.default_rng(3221)
+    P, N = 57, 1000
+    X = rng.random((N, P))
+    w = rng.normal(size=P)
+    f = lambda X: X @ w + 0.5 * (X[:, :10]**2).sum(1)
+    Y = np.column_stack([f(X), np.exp(X[:, 0]) + X[:, 3]])
+    # 1711 terms with interactions, so only main effects are fitted
+    assert len(CCU.PolynomialSurrogate(np.zeros(P), np.ones(P)).terms) == 1711
+    surrogate = CCU.PolynomialSurrogate.from_samples(X, Y, metric_names=['a', 'b'])
+    assert not surrogate.interactions and len(surrogate.terms) == 115
+    assert (surrogate.cross_validation['Q2'] > 0.999).all()
+    X_new = rng.random((200, P))
+    np.testing.assert_allclose(surrogate.predict(X_new)[:, 0], f(X_new), atol=1e-2)
+    # Underdetermined fits and poor surrogates are refused
+    with pytest.raises(ValueError, match='fewer than the 1711 terms'):
+        CCU.PolynomialSurrogate(np.zeros(P), np.ones(P)).fit(X, Y)
+    with pytest.raises(ValueError, match='Q2'):
+        CCU.PolynomialSurrogate.from_samples(X, rng.random((N, 1)))
+    with pytest.raises(ValueError, match='too few'):
+        CCU.PolynomialSurrogate.from_samples(X[:100], Y[:100])
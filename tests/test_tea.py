@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:02:51 2026
+
+@author: IGB
+"""
+import CCU
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+
+def test_incentives_match_reference_TEA(methanol_teas):
+    tea, reference = methanol_teas
+    MeOH = tea.system.flowsheet.stream.MeOH
+    assert tea.carbon_amount_utilized > 0.
+    assert_allclose(tea.carbon_amount_utilized, reference.carbon_amount_utilized)
+    NPVs = []
+    for credit_years in (0, 5, 12, 40):
+        tea.credit_years = reference.credit_years = credit_years
+        NPVs.append(tea.NPV)
+        assert_allclose(tea.NPV, reference.NPV, rtol=1e-10)
+        assert_allclose(tea.get_cashflow_table().values, reference.get_cashflow_table().values, rtol=1e-10, atol=1e-10)
+        assert_allclose(tea.solve_price(MeOH), reference.solve_price(reference.system.flowsheet.stream.MeOH),
+                        rtol=1e-8)
+    assert (np.diff(NPVs) > 0).all()
+    # The utilized carbon and the credit follow the flows, however the system is run
+    utilized = tea.carbon_amount_utilized
+    credit = tea.annual_credit
+    NPV = tea.NPV
+    for system in (tea.system, reference.system):
+        system.flowsheet.stream.feed.imol['Methanol'] *= 2
+        system.run()
+    assert_allclose(tea.carbon_amount_utilized, 2 * utilized)
+    assert_allclose(tea.annual_credit, 2 * credit)
+    assert tea.NPV > NPV
+    assert_allclose(tea.NPV, reference.NPV, rtol=1e-10)
+    assert_allclose(tea.solve_price(MeOH), reference.solve_price(reference.system.flowsheet.stream.MeOH),
+                    rtol=1e-8)
+
+def test_batch_NPV_and_prices_match_scalar_TEA(methanol_teas):
+    tea, reference = methanol_teas
+    MeOH = reference.system.flowsheet.stream.MeOH
+    IRR = np.array([[0.08], [0.12]])
+    credit_years = np.array([0, 7, 12])
+    NPV = tea.NPV_batch(IRR=IRR, credit_years=credit_years, carbon_credit=130.)
+    prices = tea.solve_price_batch(tea.system.flowsheet.stream.MeOH, IRR=IRR, credit_years=credit_years,
+                                   carbon_credit=130.)
+    assert NPV.shape == prices.shape == (2, 3)
+    reference.carbon_credit = 130.
+    for i, j in np.ndindex(2, 3):
+        reference.IRR = IRR[i, 0]
+        reference.credit_years = credit_years[j]
+        assert_allclose(NPV[i, j], reference.NPV, rtol=1e-10)
+        assert_allclose(prices[i, j], reference.solve_price(MeOH), rtol=1e-6)
+    # The TEA itself is left as it was
+    assert (tea.IRR, tea.carbon_credit, tea.credit_years) == (0.10, 85, 12)
+    with pytest.raises(ValueError): tea.NPV_batch(operating_days=[300, 330])
+
+def test_exact_solve_sales_matches_root_finder(methanol_teas):
+    tea, reference = methanol_teas
+    MeOH = tea.system.flowsheet.stream.MeOH
+    feed = tea.system.flowsheet.stream.feed
+    for price in (0.1, 0.25, 0.6): # From profits to forwarded losses at the current MeOH price
+        feed.price = price
+        tea.exact_solve_sales = True
+        sales = tea.solve_sales()
+        exact = tea.solve_price(MeOH)
+        tea.exact_solve_sales = False
+        assert_allclose(sales, tea.solve_sales(), rtol=1e-6)
+        assert_allclose(exact, tea.solve_price(MeOH), rtol=1e-6)
+    tea.exact_solve_sales = True
+    table = CCU.compare_price_solvers(tea, MeOH, repeat=2)
+    assert_allclose(*table['Price [USD/kg]'], rtol=1e-6)
+
+def test_capital_costs_follow_unit_simulations(methanol_teas):
+    tea, reference = methanol_teas
+    T1 = tea.system.flowsheet.unit.T1
+    T2 = tea.system.flowsheet.unit.T2
+    installed = tea.installed_equipment_cost
+    TCI = tea.TCI
+    for system in (tea.system, reference.system):
+        system.flowsheet.unit.T1.tau = 72
+        system.flowsheet.unit.T1.simulate()
+    assert tea.installed_equipment_cost > installed and tea.TCI > TCI
+    for name in ('installed_equipment_cost', 'purchase_cost', 'OSBL_installed_equipment_cost', 'TCI', 'NPV'):
+        assert_allclose(getattr(tea, name), getattr(reference, name), rtol=1e-10)
+    T2.tau = 72
+    T2.simulate()
+    assert_allclose(tea.OSBL_installed_equipment_cost, T2.installed_cost)
+    assert_allclose(tea.get_installed_cost([T1, T2]) * 1e6, tea.installed_equipment_cost)